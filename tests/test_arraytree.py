@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""
+ArrayTree results computed from arrays must equal those of the same
+ToyTree, and edits go through a ToyTree built from the arrays.
+"""
+
+import numpy as np
+import pytest
+import toytree
+from toytree.Benchmark import random_newick
+
+NEWICKS = [
+    "((a:1,b:2)90:1,(c:1,(d:3,e:1)50:2)100:1);",
+    "(a:1,b:2,(c:1,d:1,e:2):1);",
+    random_newick(60, seed=1),
+]
+
+
+
+@pytest.mark.parametrize("newick", NEWICKS)
+def test_arraytree_matches_toytree(newick):
+    tre = toytree.tree(newick)
+    arr = toytree.ArrayTree(newick)
+    assert (arr.ntips, arr.nnodes) == (tre.ntips, tre.nnodes)
+    assert arr.get_tip_labels() == tre.get_tip_labels()
+    assert np.array_equal(arr.get_edges(), tre.get_edges())
+    assert arr.write() == tre.write()
+    for feature in ("name", "idx", "dist", "support"):
+        assert np.array_equal(
+            arr.get_node_values(feature, True, True),
+            tre.get_node_values(feature, True, True))
+    assert np.allclose(
+        arr.get_node_values("height", True, True),
+        tre.get_node_values("height", True, True))
+    for layout in ("r", "d", "c"):
+        for use_edge_lengths in (True, False):
+            assert np.allclose(
+                arr.get_node_coordinates(layout, use_edge_lengths),
+                tre.get_node_coordinates(layout, use_edge_lengths))
+
+
+@pytest.mark.parametrize("newick", NEWICKS)
+def test_arraytree_from_toytree(newick):
+    tre = toytree.tree(newick)
+    arr = toytree.ArrayTree(tre)
+    assert arr.write() == tre.write()
+    assert arr.toytree().write() == tre.write()
+
+
+def test_arraytree_edits_do_not_change_arrays():
+    arr = toytree.ArrayTree(NEWICKS[0])
+    dropped = arr.toytree().drop_tips(["a"])
+    assert dropped.ntips == 4
+    assert arr.ntips == 5
+    assert "a" in arr.get_tip_labels()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""
+Edits inside ToyTree.batch_edit defer updating idxs and coordinates, but
+reads inside the context must return the same values as after the edits
+were applied one at a time.
+"""
+
+import numpy as np
+import pytest
+import toytree
+
+
+
+def get_tree():
+    return toytree.rtree.unittree(30, seed=123)
+
+
+def edit(tre):
+    return tre.drop_tips(["r1", "r2", "r3"]).root(["r10", "r11"])
+
+
+READS = {
+    "ntips": lambda t: t.ntips,
+    "nnodes": lambda t: t.nnodes,
+    "len": lambda t: len(t),
+    "tip_labels": lambda t: t.get_tip_labels(),
+    "tip_labels_idx": lambda t: t.get_tip_labels(idx=t.nnodes - 2),
+    "mrca_idx": lambda t: t.get_mrca_idx_from_tip_labels(["r20", "r21"]),
+    "tip_coords": lambda t: t.get_tip_coordinates().tolist(),
+    "node_coords": lambda t: t.get_node_coordinates().tolist(),
+    "edges": lambda t: t.get_edges().tolist(),
+    "edge_values": lambda t: t.get_edge_values("dist").tolist(),
+    "node_values": lambda t: t.get_node_values("name", 1, 1).tolist(),
+    "descendants": lambda t: t.get_node_descendant_idxs(t.nnodes - 2),
+    "name_to_idx": lambda t: t.get_feature_dict("name", "idx"),
+    "node_dict": lambda t: t.get_node_dict(),
+    "idx_dict": lambda t: {i: j.name for i, j in t.idx_dict.items()},
+    "treenode_idx": lambda t: (t.treenode & "r20").idx,
+    "traversal": lambda t: t.get_traversal_idxs("postorder").tolist(),
+    "write": lambda t: t.write(),
+}
+
+
+
+@pytest.mark.parametrize("read", sorted(READS))
+def test_reads_inside_batch_are_current(read):
+    tre = get_tree()
+    expect = READS[read](edit(tre))
+    with tre.batch_edit() as etre:
+        edit(etre)
+        assert READS[read](etre) == expect
+        etre.ladderize(direction=1)
+    assert READS[read](etre) == READS[read](edit(tre).ladderize(direction=1))
+
+
+def test_batch_edits_match_chained_edits():
+    tre = get_tree()
+    with tre.batch_edit() as etre:
+        edit(etre).ladderize()
+    expect = edit(tre).ladderize()
+    assert etre.write() == expect.write()
+    assert np.allclose(
+        etre.get_node_coordinates(), expect.get_node_coordinates())
+    assert tre.ntips == 30
+
+
+def test_rotations_inside_batch_update_locally():
+    tre = get_tree()
+    clades = [
+        tre.get_tip_labels(idx) for idx in range(tre.ntips, tre.nnodes - 1)]
+    expect = tre
+    with tre.batch_edit() as etre:
+        for names in clades[::3]:
+            etre.rotate_node(names=names)
+            expect = expect.rotate_node(names=names)
+            assert not etre._pending_update
+            assert etre.get_tip_labels() == expect.get_tip_labels()
+    assert etre.write() == expect.write()
+    assert np.allclose(
+        etre.get_node_coordinates(), expect.get_node_coordinates())
+    assert etre.get_feature_dict("name", "idx") == (
+        expect.get_feature_dict("name", "idx"))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""
+Node heights and the name, mrca and clade indexes are cached on the root
+of each tree, and must be recomputed after edits to that tree only.
+"""
+
+import toytree
+from toytree.TreeNode import TreeNode, LCA_INDEX_QUERIES
+
+NEWICK = "((a:1,b:2):1,(c:1,(d:3,e:1):2):1);"
+
+
+
+def get_node(tre, name):
+    return next(tre.treenode.iter_search_nodes(name=name))
+
+
+def test_edits_invalidate_only_their_tree():
+    tre1 = toytree.tree(NEWICK)
+    tre2 = toytree.tree(NEWICK)
+    heights1 = tre1.treenode._get_heights()
+    heights2 = tre2.treenode._get_heights()
+    assert tre1.treenode.height == tre2.treenode.height == 6
+
+    get_node(tre1, "d").dist = 10
+    assert tre1.treenode.height == 13
+    assert tre1.treenode._get_heights() is not heights1
+    assert tre2.treenode._get_heights() is heights2
+    assert tre2.treenode.height == 6
+
+
+def test_renames_invalidate_only_their_tree():
+    tre1 = toytree.tree(NEWICK)
+    tre2 = toytree.tree(NEWICK)
+    index2 = tre2.treenode._get_name_index()
+    get_node(tre1, "a").name = "z"
+    assert [i.name for i in tre1.treenode.search_nodes(name="z")] == ["z"]
+    assert not tre1.treenode.search_nodes(name="a")
+    assert tre2.treenode._get_name_index() is index2
+
+
+def test_children_list_edits_invalidate():
+    tre = toytree.tree(NEWICK)
+    root = tre.treenode
+    assert root.height == 6
+
+    # append a deep tip in place
+    parent = get_node(tre, "c").up
+    tip = TreeNode(name="f", dist=20)
+    parent.children.append(tip)
+    tip.up = parent
+    assert root.height == 21
+    assert root.search_nodes(name="f") == [tip]
+
+    # remove it again
+    parent.children.remove(tip)
+    assert root.height == 6
+    assert not root.search_nodes(name="f")
+
+    # reorder children, the clade index is in tip order
+    names = [i.name for i in root.get_leaves()]
+    root.get_common_ancestor("a", "b")
+    for node in root.traverse():
+        node.children.reverse()
+    assert [i.name for i in root.get_leaves()] == names[::-1]
+    assert root.get_common_ancestor("d", "e").children[0].name == "e"
+
+
+def test_moved_subtree_joins_new_tree():
+    tre1 = toytree.tree(NEWICK)
+    tre2 = toytree.tree("((x:1,y:1):1,z:1);")
+    root1 = tre1.treenode
+    assert root1.height == 6
+
+    # move clade (x, y) from tre2 to tre1, then edit a dist inside it
+    clade = get_node(tre2, "x").up
+    clade.detach()
+    get_node(tre1, "a").up.add_child(clade)
+    assert root1.height == 6
+    get_node(tre1, "x").dist = 50
+    assert root1.height == 52
+    assert root1.search_nodes(name="y")
+
+
+def test_mrca_index_built_on_repeated_queries():
+    tre = toytree.tree(NEWICK)
+    root = tre.treenode
+    for i in range(2):
+        get_node(tre, "a").dist += 1
+        for query in range(LCA_INDEX_QUERIES):
+            assert root.get_common_ancestor("d", "e") is get_node(tre, "d").up
+            assert root._lcache[1] is None
+        assert root.get_common_ancestor("a", "c") is root
+        assert root._lcache[1] is not None
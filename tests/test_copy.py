@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+"""
+Copies of a ToyTree share nodes until they are exposed by .treenode or 
+.idx_dict, and changes to nodes of one tree never reach another tree.
+"""
+
+import toytree
+from toytree.utils import fuzzy_match_tipnames
+
+NEWICK = "((a:1,b:2):1,(c:1,(d:3,e:1):2):1);"
+
+
+
+def test_node_taken_before_copy_does_not_change_copy():
+    tre = toytree.tree(NEWICK)
+    newick = tre.write()
+    root = tre.treenode
+    cop = tre.copy()
+    root.children[0].dist = 100
+    assert cop.write() == newick
+    assert tre.write() != newick
+
+
+def test_rename_before_copy_does_not_change_copy():
+    tre = toytree.tree(NEWICK)
+    idx_dict = tre.idx_dict
+    cop = tre.copy()
+    idx_dict[0].name = "z"
+    assert "z" in tre.get_tip_labels()
+    assert "z" not in cop.get_tip_labels()
+
+
+def test_feature_before_copy_does_not_change_copy():
+    tre = toytree.tree(NEWICK)
+    node = tre.idx_dict[0]
+    cop = tre.copy()
+    node.add_feature("Ne", 1000)
+    assert tre.idx_dict[0].Ne == 1000
+    assert not hasattr(cop.idx_dict[0], "Ne")
+    assert "Ne" not in cop.features
+
+
+def test_edit_copy_does_not_change_original():
+    tre = toytree.tree(NEWICK)
+    newick = tre.write()
+    cop = tre.copy()
+    cop.treenode.children[0].dist = 50
+    cop.idx_dict[1].name = "z"
+    assert tre.write() == newick
+    chain = cop.copy().copy()
+    chain.treenode.children[1].dist = 20
+    assert cop.treenode.children[1].dist != 20
+    assert tre.write() == newick
+
+
+def test_copies_share_nodes_until_exposed():
+    tre = toytree.tree(NEWICK)
+    cop = tre.copy()
+    assert cop._nodes is tre._nodes
+
+    # reading does not clone nodes
+    cop.get_tip_labels()
+    cop.get_node_values("dist", True, True)
+    cop.get_mrca_idx_from_tip_labels(["a", "b"])
+    cop.write()
+    assert cop._nodes is tre._nodes
+
+    # edits return new trees that share nothing with the original
+    dropped = cop.drop_tips(["a"])
+    assert dropped._nodes is not tre._nodes
+    assert cop._nodes is tre._nodes
+
+    # exposing clones
+    treenode = cop.treenode
+    assert cop._nodes is not tre._nodes
+    assert treenode is not tre._nodes.treenode
+
+
+def test_copy_of_exposed_tree_is_a_clone():
+    tre = toytree.tree(NEWICK)
+    tre.treenode
+    cop = tre.copy()
+    assert cop._nodes is not tre._nodes
+    assert cop.copy()._nodes is cop._nodes
+
+
+def test_matched_mrca_node_does_not_change_copy():
+    tre = toytree.tree(NEWICK)
+    cop = tre.copy()
+    node = fuzzy_match_tipnames(tre, ["d", "e"], None, None, True, False)
+    node.dist = 55
+    assert 55 in tre.get_node_values("dist", True, True)
+    assert 55 not in cop.get_node_values("dist", True, True)
+
+    # matching names or rotating does not expose or clone nodes
+    cop2 = cop.copy()
+    fuzzy_match_tipnames(cop, ["d", "e"], None, None, False, True)
+    with cop.batch_edit() as etre:
+        etre.rotate_node(names=["d", "e"])
+    assert not etre._nodes.exposed
+    assert cop2.write() != etre.write()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+"""
+Tree functions must not recurse over nodes, so that comb (caterpillar)
+trees deeper than the recursion limit can be loaded and processed.
+"""
+
+import sys
+import pytest
+import toytree
+from toytree.Benchmark import comb_newick
+from toytree.PCM import PIC
+from toytree.utils import ToytreeError
+
+NTIPS = 5000
+
+
+
+@pytest.fixture(scope="module")
+def comb():
+    assert NTIPS > sys.getrecursionlimit()
+    return toytree.tree(comb_newick(NTIPS))
+
+
+
+def test_load_comb_tree(comb):
+    assert comb.ntips == NTIPS
+    assert comb.nnodes == 2 * NTIPS - 1
+    assert sorted(comb.get_tip_labels()) == sorted(
+        "r{}".format(i) for i in range(NTIPS))
+    assert comb.treenode.height == NTIPS - 1
+
+
+def test_ladderize_comb_tree(comb):
+    tre = comb.copy()
+    treenode = tre.treenode
+    assert treenode.ladderize() == NTIPS
+    for node in treenode.traverse():
+        if node.children:
+            assert node.children[0].is_leaf()
+    assert treenode.ladderize(direction=1) == NTIPS
+    for node in treenode.traverse():
+        if node.children:
+            assert node.children[-1].is_leaf()
+
+
+def test_cached_content_comb_tree(comb):
+    treenode = comb.treenode
+    content = treenode.get_cached_content()
+    assert len(content) == comb.nnodes
+    assert content[treenode] == set(treenode.get_leaves())
+    names = treenode.get_cached_content("name", list)
+    for node in treenode.traverse():
+        assert len(names[node]) == len(content[node])
+    assert sorted(names[treenode]) == sorted(comb.get_tip_labels())
+
+
+def test_pic_comb_tree(comb):
+    tre = comb.set_node_values(
+        "trait", {i: 2.5 for i in range(NTIPS)}, default=0.0)
+    results = PIC(tre, "trait")
+    assert len(results) == NTIPS - 1
+    for state, var, contrast, cvar in results.values():
+        assert state == pytest.approx(2.5)
+        assert contrast == pytest.approx(0.0)
+        assert var > 0 and cvar > 0
+
+
+def test_pic_values():
+    tre = toytree.tree("((a:1,b:1):1,c:2);")
+    tre = tre.set_node_values(
+        "trait", {"a": 0.0, "b": 2.0, "c": 4.0}, default=0.0)
+    results = {
+        tuple(sorted(node.get_leaf_names())): res
+        for node, res in PIC(tre, "trait").items()
+    }
+    state, var, contrast, cvar = results[("a", "b")]
+    assert (state, var, abs(contrast), cvar) == (1.0, 1.5, 2.0, 2.0)
+    state, var, contrast, cvar = results[("a", "b", "c")]
+    expected = (4.0 / 2.0 + 1.0 / 1.5) / (1 / 2.0 + 1 / 1.5)
+    assert state == pytest.approx(expected)
+    assert abs(contrast) == pytest.approx(3.0)
+    assert cvar == pytest.approx(3.5)
+
+
+def test_ascii_comb_tree():
+    # drawings of comb trees grow with ntips squared, so this is smaller
+    ntips = sys.getrecursionlimit() + 100
+    treenode = toytree.tree(comb_newick(ntips)).treenode
+    lines, mid = treenode._asciiArt()
+    assert len(lines) == 2 * ntips - 1
+    assert 0 <= mid < len(lines)
+    compact = treenode.get_ascii(compact=True).strip("\n").split("\n")
+    assert len(compact) == ntips
+    assert [i.rsplit("-", 1)[-1] for i in compact] == treenode.get_leaf_names()
+
+
+def test_write_and_copy_comb_tree(comb):
+    newick = comb.write()
+    assert toytree.tree(newick).write() == newick
+    assert comb.copy().write() == newick
+
+
+@pytest.mark.parametrize("newick", [
+    "(((a:1):1,(b:1,c:1,e:1):1):1,d:2);",
+    "((a:1,b:1,c:1):1,d:2);",
+    "(a:1,b:1,c:1);",
+])
+def test_pic_requires_bifurcating_tree(newick):
+    tre = toytree.tree(newick)
+    tre = tre.set_node_values("trait", default=1.0)
+    with pytest.raises(ToytreeError):
+        PIC(tre, "trait")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+"""
+Added node features are stored in typed columns indexed by node idx, which
+must stay consistent with node attributes through edits, copies and pickling.
+"""
+
+import pickle
+import numpy as np
+import pytest
+import toytree
+from toytree.FeatureTable import FeatureColumns
+
+
+
+def get_tree():
+    "tree with an int feature on every node and a str feature on tips"
+    tre = toytree.tree("((a:1,b:2):1,(c:1,(d:1,e:3):2):1);")
+    tre = tre.set_node_values("n", default=0)
+    for idx in range(tre.nnodes):
+        tre = tre.set_node_values("n", {idx: idx * 10})
+    return tre.set_node_values("t", {i: "x" + i for i in "abcde"})
+
+
+def by_name(tre, feature):
+    "dict of feature values of tips by name, from the feature table"
+    return dict(zip(tre.get_node_values("name", 1, 1), tre.features[feature]))
+
+
+
+def test_columns_are_typed():
+    tre = get_tree()
+    columns = tre.features._get_columns()
+    assert isinstance(columns, FeatureColumns)
+    assert columns.values["n"].dtype == np.int64
+    assert tre.features["n"].dtype == np.int64
+    assert tre.features["n"].tolist() == [
+        i * 10 for i in range(tre.nnodes)][::-1]
+
+
+def test_missing_values():
+    tre = get_tree()
+    tre.features["f"] = np.arange(tre.nnodes, dtype=float)
+    node = tre.idx_dict[0]
+    node.del_feature("f")
+    node.del_feature("n")
+    assert np.isnan(tre.features["f"][-1])
+    assert np.isnan(tre.features["n"][-1])
+    assert tre.features["n"].dtype == float
+    assert not hasattr(node, "n")
+
+    # missing strs are None, and "" was set on internal nodes
+    tips = by_name(tre, "t")
+    assert tips["a"] == "xa"
+    assert tre.features["t"][0] == ""
+    del tre.features["t"]
+    assert "t" not in tre.features
+
+
+def test_node_attributes_read_and_write_columns():
+    tre = get_tree()
+    node = tre.idx_dict[3]
+    assert node.n == 30
+    assert isinstance(node.n, int)
+    assert "n" in node.features
+    node.add_feature("n", 3.5)
+    node.add_feature("new", "value")
+    assert tre.features["n"][tre.nnodes - 1 - 3] == 3.5
+    assert tre.features["n"][tre.nnodes - 1 - 4] == 40
+    assert tre.features["new"][tre.nnodes - 1 - 3] == "value"
+    assert "new" in tre.features
+
+
+def test_set_node_values_by_name_and_default():
+    tre = toytree.tree("((a:1,b:2):1,(c:1,(d:1,e:3):2):1);")
+    ntre = tre.set_node_values("Ne", {"a": 5, "b": 7})
+    assert "Ne" not in tre.features
+    assert (ntre.treenode & "a").Ne == 5
+    assert (ntre.treenode & "c").Ne == ""
+    ntre = ntre.set_node_values("Ne", {"c": 1.5}, default=2.5)
+    assert (ntre.treenode & "a").Ne == 2.5
+    assert (ntre.treenode & "c").Ne == 1.5
+
+
+def test_columns_follow_edits():
+    tre = get_tree()
+    expect = by_name(tre, "t")
+    for edit in (
+        lambda t: t.root("a"),
+        lambda t: t.drop_tips(["c"]),
+        lambda t: t.rotate_node(names=["d", "e"]),
+        lambda t: t.ladderize(direction=1),
+        lambda t: t.prune(["a", "b", "e"]),
+    ):
+        ntre = edit(tre)
+        names = by_name(ntre, "t")
+        for node in ntre.treenode.get_leaves():
+            assert node.t == expect[node.name]
+            assert names[node.name] == expect[node.name]
+
+
+def test_copies_and_pickles_keep_own_columns():
+    tre = get_tree()
+    copy = tre.copy()
+    copy.features["n"] = -1
+    copy.treenode.add_feature("n", -2)
+    assert tre.features["n"].tolist() == get_tree().features["n"].tolist()
+    assert copy.features["n"][0] == -2
+
+    loaded = pickle.loads(pickle.dumps(tre))
+    assert loaded.features["n"].tolist() == tre.features["n"].tolist()
+    assert by_name(loaded, "t") == by_name(tre, "t")
+
+
+def test_detached_nodes_keep_features():
+    tre = get_tree()
+    node = tre.treenode.children[1]
+    values = {i.name: i.n for i in node.traverse()}
+    subtree = toytree.tree(node)
+    assert {i.name: i.n for i in subtree.treenode.traverse()} == values
+    assert sorted(subtree.features["n"].tolist()) == sorted(values.values())
+
+
+def test_annotations_moved_to_columns():
+    tre = toytree.tree(
+        "((a[&&NHX:k=1],b[&&NHX:k=2]),c);", lazy_annotations=True)
+    assert "k" in tre.features
+    values = by_name(tre, "k")
+    assert [values[i] for i in "abc"] == ["1", "2", None]
+
+
+@pytest.mark.parametrize(
+    "values, kind", [
+        ([True, False], "b"), ([1, 2], "i"), ([1.5, 2.5], "f"),
+        (["a", "bb"], "U"), ([1, 2.5], "O"), ([1, "a"], "O"),
+        ([(1,), (2,)], "O"),
+    ])
+def test_column_kinds(values, kind):
+    "columns keep values of one kind typed, and mixed values as they are"
+    tre = toytree.tree("(a,b);")
+    nodes = [tre.idx_dict[i] for i in range(3)]
+    columns = tre.features._get_columns()
+    columns.set_rows("v", [0, 1, 2], [values[0]] * 3)
+    nodes[1].add_feature("v", values[1])
+    assert columns.values["v"].dtype.kind == kind
+    assert [i.v for i in nodes] == [values[0], values[1], values[0]]
+    assert type(nodes[1].v) is type(values[1])
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+"""
+Reading trees from plain and compressed newick and NEXUS files, skipping
+burnin and thinning while reading.
+"""
+
+import bz2
+import gzip
+import lzma
+import pytest
+import toytree
+from toytree.utils import ToytreeError
+
+NTREES = 12
+BURNIN = 2
+THIN = 3
+KEPT = list(range(BURNIN, NTREES, THIN))
+
+OPENERS = {"": open, ".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+
+def get_nexus():
+    "NEXUS trees block where the dist of tip 'apple' is the tree index"
+    lines = [
+        "#NEXUS",
+        "begin trees;",
+        "    translate",
+        "        1 apple,",
+        "        2 banana,",
+        "        3 cherry;",
+    ]
+    for idx in range(NTREES):
+        lines.append(
+            "    tree t{} = [&U] ((1:{},2:1):1,3:1);".format(idx, idx))
+    lines.append("end;")
+    return "\n".join(lines) + "\n"
+
+
+def get_newicks():
+    "one newick per line where the dist of tip 'apple' is the tree index"
+    return "".join(
+        "((apple:{},banana:1):1,cherry:1);\n".format(idx)
+        for idx in range(NTREES)
+    )
+
+
+def write_file(tmp_path, name, text, suffix):
+    path = str(tmp_path / (name + suffix))
+    with OPENERS[suffix](path, "wt") as out:
+        out.write(text)
+    return path
+
+
+def apple_dists(trees):
+    return [int((tre.treenode & "apple").dist) for tre in trees]
+
+
+
+@pytest.mark.parametrize("suffix", sorted(OPENERS))
+@pytest.mark.parametrize("getter", [get_nexus, get_newicks])
+def test_mtree_burnin_thin(tmp_path, suffix, getter):
+    path = write_file(tmp_path, "trees", getter(), suffix)
+    mtre = toytree.mtree(path, burnin=BURNIN, thin=THIN)
+    assert apple_dists(mtre.treelist) == KEPT
+    assert all(
+        set(tre.get_tip_labels()) == {"apple", "banana", "cherry"}
+        for tre in mtre.treelist)
+
+
+@pytest.mark.parametrize("suffix", sorted(OPENERS))
+@pytest.mark.parametrize("getter", [get_nexus, get_newicks])
+def test_iter_trees_burnin_thin(tmp_path, suffix, getter):
+    path = write_file(tmp_path, "trees", getter(), suffix)
+    trees = toytree.iter_trees(path, burnin=BURNIN, thin=THIN)
+    assert apple_dists(trees) == KEPT
+
+
+@pytest.mark.parametrize("suffix", sorted(OPENERS))
+def test_mtree_reads_all_trees(tmp_path, suffix):
+    path = write_file(tmp_path, "trees", get_nexus(), suffix)
+    mtre = toytree.mtree(path)
+    assert mtre.ntrees == NTREES
+    assert apple_dists(mtre.treelist) == list(range(NTREES))
+    assert mtre.tdict == {"1": "apple", "2": "banana", "3": "cherry"}
+
+
+def test_compressed_by_content_not_suffix(tmp_path):
+    path = write_file(tmp_path, "trees", get_newicks(), ".gz")
+    renamed = tmp_path / "trees.nwk"
+    (tmp_path / "trees.gz").rename(renamed)
+    assert apple_dists(toytree.mtree(str(renamed))) == list(range(NTREES))
+
+
+def test_burnin_past_end_and_bad_thin(tmp_path):
+    path = write_file(tmp_path, "trees", get_newicks(), "")
+    assert list(toytree.iter_trees(path, burnin=NTREES)) == []
+    with pytest.raises(ToytreeError):
+        list(toytree.iter_trees(path, thin=0))
+
+
+@pytest.mark.parametrize("getter", [get_nexus, get_newicks])
+def test_file_index_matches_mtree(tmp_path, getter):
+    path = write_file(tmp_path, "trees", getter(), "")
+    index = toytree.TreeFileIndex(path, sidecar=False)
+    assert len(index) == NTREES
+    assert apple_dists([index[i] for i in KEPT]) == KEPT
+    assert apple_dists(index[BURNIN::THIN].treelist) == KEPT
+    index.close()
+
+
+def test_file_index_rejects_compressed(tmp_path):
+    path = write_file(tmp_path, "trees", get_nexus(), ".gz")
+    with pytest.raises(ToytreeError):
+        toytree.TreeFileIndex(path, sidecar=False)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+"""
+Parsed trees are stored in the parse cache only when it is enabled, and
+trees are only copied for the cache when they are stored.
+"""
+
+import pytest
+import toytree
+from toytree.Toytree import ToyTree
+
+NEWICK = "((a:1,b:2):1,(c:1,(d:3,e:1):2):1);"
+
+
+
+@pytest.fixture
+def ncopies(monkeypatch):
+    "counts calls to ToyTree.copy"
+    calls = []
+    copy = ToyTree.copy
+    def counted(self, *args, **kwargs):
+        calls.append(self)
+        return copy(self, *args, **kwargs)
+    monkeypatch.setattr(ToyTree, "copy", counted)
+    yield calls
+    toytree.parse_cache.disable()
+
+
+def test_uncached_parse_does_not_copy(ncopies):
+    toytree.parse_cache.disable()
+    tre = toytree.tree(NEWICK)
+    toytree.mtree([NEWICK, NEWICK])
+    assert not ncopies
+
+    # uncacheable input with the cache enabled
+    toytree.parse_cache.enable()
+    toytree.tree(tre.treenode)
+    assert not ncopies
+
+
+def test_cached_parse_returns_copies(ncopies):
+    toytree.parse_cache.enable()
+    toytree.parse_cache.clear()
+    tre1 = toytree.tree(NEWICK)
+    assert len(ncopies) == 1
+    tre2 = toytree.tree(NEWICK)
+    assert toytree.parse_cache.info()["hits"] == 1
+    assert tre2.write() == tre1.write()
+    tre2.treenode.children[0].dist = 100
+    assert toytree.tree(NEWICK).write() == tre1.write()
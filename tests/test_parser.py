@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""
+The single pass newick parser (Newick2TreeNode) must build the same trees
+as the previous regex parser (RegexNewick2TreeNode) in every format.
+"""
+
+import random
+import pytest
+from toytree.TreeParser import (
+    Newick2TreeNode, RegexNewick2TreeNode, NewickError)
+
+
+
+def dump(treenode):
+    "node data in preorder, with features as strings"
+    return [
+        (
+            node.name, node.dist, node.support, len(node.children),
+            sorted(
+                (i, str(getattr(node, i)))
+                for i in node.features if i != "height"),
+        )
+        for node in treenode.traverse("preorder")
+    ]
+
+
+def parse_both(newick, fmt):
+    "node data from each parser, or None if it raised a NewickError"
+    results = []
+    for parser in (Newick2TreeNode, RegexNewick2TreeNode):
+        try:
+            results.append(dump(parser(newick, fmt).newick_from_string()))
+        except NewickError:
+            results.append(None)
+    return results
+
+
+
+CASES = [
+    (0, "(A,B);"),
+    (0, " ( A : 1 , B : 2 ) ; "),
+    (0, "(A:1e-3,B:2.5E+2);"),
+    (0, "((A,B)0.95:0.1,C);"),
+    (0, "((A:1,B:2)100:1,(C:1,D:1)90:2);"),
+    (0, "(A:1[&&NHX:a=1:b=2],B:2);"),
+    (0, "(a[&&NHX:x=1]:1,b:2);"),
+    (0, "(a:1,b:2)[comment];"),
+    (0, "(A,B)"),
+    (0, "()"),
+    (1, "((A:1,B:2)C:1,D:3)E;"),
+    (2, "((A:1,B:1)0.95:0.1,C:1);"),
+    (3, "((A:1,B:2)C:1,D:3)E:0;"),
+    (4, "((A:1,B:2),D:3);"),
+    (5, "((A:1,B:2):4,D:3);"),
+    (6, "((A,B):4,D);"),
+    (7, "((A:1,B:2)X,D:3)Y;"),
+    (8, "((A,B)X,D)Y;"),
+    (9, "(,(,));"),
+]
+
+SINGLE_NODE_CASES = [
+    (0, "A;"),
+    (0, "A:1;"),
+    (1, "A;"),
+    (0, "A"),
+    (10, "a[&x=1];"),
+]
+
+MRBAYES_CASES = [
+    (10, "(a[&x=1]:1,b[&x=2,y={1,2}]:2[&c=3])[&r=1];"),
+    (10, "((a[&x=1]:1,b[&x=2]:2)[&p=0.9,h={1.5,2}]:0.3,c[&x=3]:0.1)[&r=1];"),
+    (10, "(a[&x=1]:1,b[&y=2]:2)[&r=1]:0.5;"),
+    (10, "(a[&x=1],b[&y=2]);"),
+    (10, "(a[&x=1]:1,b:2);"),
+    (10, "(a:1,b:2);"),
+    (10, "(a:1[&x=1],b:2[&y=2]);"),
+    (10, "(a[&x=1]:1[&z=3],b:2);"),
+    (10, "(a[&x=1, y=2]:1,b:2);"),
+]
+
+
+
+@pytest.mark.parametrize(
+    "fmt, newick", CASES + SINGLE_NODE_CASES + MRBAYES_CASES)
+def test_parsers_agree(fmt, newick):
+    new, old = parse_both(newick, fmt)
+    assert new is not None
+    assert new == old
+
+
+@pytest.mark.parametrize(
+    "fmt, newick", [
+        (0, "(:1,:2);"), (3, "((A:1,B:2)C:1,D:3)E;"), (6, "((A:1,B:2),D:3);"),
+    ])
+def test_parsers_agree_on_format_errors(fmt, newick):
+    assert parse_both(newick, fmt) == [None, None]
+
+
+def test_single_node_is_named_root():
+    root = Newick2TreeNode("A:1;", 0).newick_from_string()
+    assert root.name == "A"
+    assert not root.children
+
+
+def test_mrbayes_annotations_merged():
+    newick = "(a[&x=1]:1[&z=3],b[&y=2]);"
+    for parser in (Newick2TreeNode, RegexNewick2TreeNode):
+        root = parser(newick, 10).newick_from_string()
+        nodea, nodeb = root.children
+        assert (nodea.x, nodea.z, nodea.dist) == ("1", "3", 1.0)
+        assert (nodeb.y, nodeb.dist) == ("2", 0.0)
+
+
+@pytest.mark.parametrize(
+    "newick", ["((A,B),C", "(A,B));", "(A,B)(C);", "(A,B)C(D);"])
+def test_parsers_raise_on_broken_newick(newick):
+    for parser in (Newick2TreeNode, RegexNewick2TreeNode):
+        with pytest.raises(NewickError):
+            parser(newick, 1).newick_from_string()
+
+
+@pytest.mark.parametrize("fmt", range(11))
+def test_parsers_agree_on_random_trees(fmt):
+    rng = random.Random(fmt)
+    for rep in range(20):
+        nodes = []
+        for tip in range(rng.randint(2, 30)):
+            dist = "%.4g" % rng.random()
+            if fmt == 10:
+                nodes.append("t%d[&a=%d,r={0.1,0.2}]:%s" % (tip, rep, dist))
+            elif fmt in (6, 8, 9):
+                nodes.append("t%d" % tip)
+            else:
+                nodes.append("t%d:%s" % (tip, dist))
+
+        # join random pairs with internal node data for the format
+        while len(nodes) > 1:
+            left = nodes.pop(rng.randrange(len(nodes)))
+            right = nodes.pop(rng.randrange(len(nodes)))
+            dist = "%.3g" % rng.random()
+            if fmt in (0, 2):
+                label = "%d:%s" % (rng.randint(0, 100), dist)
+            elif fmt in (1, 3):
+                label = "n%d:%s" % (len(nodes), dist)
+            elif fmt in (5, 6):
+                label = ":" + dist
+            elif fmt in (7, 8):
+                label = "x%d" % len(nodes)
+            elif fmt == 10:
+                label = "[&p=%.2f]:%s[&q=1]" % (rng.random(), dist)
+            else:
+                label = ""
+            nodes.append("({},{}){}".format(left, right, label))
+
+        new, old = parse_both(nodes[0] + ";", fmt)
+        assert new is not None
+        assert new == old
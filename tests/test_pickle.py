@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+"""
+ToyTrees and MultiTrees are pickled as arrays of node data, and must
+unpickle to the same trees, including deep trees past the recursion limit.
+"""
+
+import pickle
+import sys
+import numpy as np
+import toytree
+
+NEWICK = "((a:1,b:2)0.9:1,(c:1,(d:3,e:1)0.5:2)1:1);"
+MBNEWICK = "((a[&r=1]:1,b[&r=2]:2)[&p=0.9]:1,c[&r=3]:1);"
+
+
+
+def dump(tre):
+    "node data in idx order with extra features"
+    return [
+        (
+            node.idx, node.name, node.dist, node.support,
+            node.up.idx if node.up else None,
+            [child.idx for child in node.children],
+            sorted(
+                (i, getattr(node, i)) for i in node.features
+                if i not in ("dist", "support", "name", "height", "idx")
+            ),
+        )
+        for node in (tre.idx_dict[i] for i in range(tre.nnodes))
+    ]
+
+
+def comb_newick(ntips):
+    "newick string of a comb tree as deep as its number of tips"
+    return "(" * (ntips - 1) + "t0" + "".join(
+        ",t{}:1)".format(i) for i in range(1, ntips)) + ";"
+
+
+
+def test_pickle_tree():
+    tre = toytree.tree(NEWICK)
+    tre = tre.set_node_values("obj", {0: [1, 2], 5: {"a": 1}})
+    tre.style.edge_colors = "red"
+    new = pickle.loads(pickle.dumps(tre))
+    assert dump(new) == dump(tre)
+    assert new.write() == tre.write()
+    assert new.style.edge_colors == "red"
+    assert np.allclose(new.get_node_coordinates(), tre.get_node_coordinates())
+
+
+def test_pickle_keeps_lazy_annotations():
+    tre = toytree.tree(MBNEWICK, tree_format=10, lazy_annotations=True)
+    new = pickle.loads(pickle.dumps(tre))
+    assert dump(new) == dump(toytree.tree(MBNEWICK, tree_format=10))
+
+
+def test_pickle_multitree():
+    mtre = toytree.mtree([NEWICK, "((a:2,c:1):1,(b:1,(d:1,e:1):1):1);"])
+    mtre.treelist[1].style.node_sizes = 12
+    new = pickle.loads(pickle.dumps(mtre))
+    assert new.ntrees == 2
+    for old, tre in zip(mtre.treelist, new.treelist):
+        assert dump(tre) == dump(old)
+    assert new.treelist[1].style.node_sizes == 12
+
+
+def test_pickle_deep_tree():
+    ntips = sys.getrecursionlimit() + 1000
+    tre = toytree.tree(comb_newick(ntips))
+    new = pickle.loads(pickle.dumps(tre))
+    assert new.ntips == ntips
+    assert new.get_tip_labels() == tre.get_tip_labels()
+    assert new.treenode.height == tre.treenode.height
+
+
+def test_unpickled_tree_is_independent():
+    tre = toytree.tree(NEWICK)
+    new = pickle.loads(pickle.dumps(tre))
+    new.idx_dict[0].dist = 100
+    assert tre.idx_dict[0].dist != 100
+    assert new.drop_tips(["a"]).ntips == 4
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""
+ToyTrees and MultiTrees saved with .save() and reloaded with toytree.load()
+have the same nodes, features, tip order and coordinates.
+"""
+
+import numpy as np
+import pytest
+import toytree
+from toytree.utils import ToytreeError
+
+NEWICK = "((a:1,b:2)0.9:1,(c:1,(d:3,e:1)0.5:2)1:1);"
+
+
+
+def dump(tre):
+    "node data in idx order with extra features"
+    return [
+        (
+            node.idx, node.name, node.dist, node.support,
+            node.up.idx if node.up else None,
+            [child.idx for child in node.children],
+            sorted(
+                (i, getattr(node, i)) for i in node.features
+                if i not in ("dist", "support", "name", "height", "idx")
+            ),
+        )
+        for node in (tre.idx_dict[i] for i in range(tre.nnodes))
+    ]
+
+
+def get_tree():
+    tre = toytree.tree(NEWICK)
+    tre = tre.set_node_values("flag", {i: bool(i % 2) for i in range(9)})
+    tre = tre.set_node_values("count", {i: i * 10 for i in range(5)})
+    tre = tre.set_node_values("rate", {0: 0.5, 3: 1.25})
+    tre = tre.set_node_values("label", {5: "x", 8: "root"})
+    return tre
+
+
+
+def test_save_load_tree(tmp_path):
+    tre = get_tree()
+    path = str(tmp_path / "tree.npz")
+    tre.save(path)
+    new = toytree.load(path)
+    assert isinstance(new, toytree.Toytree.ToyTree)
+    assert dump(new) == dump(tre)
+    assert new.get_tip_labels() == tre.get_tip_labels()
+    assert new.write(tree_format=0) == tre.write(tree_format=0)
+    assert np.allclose(new.get_node_coordinates(), tre.get_node_coordinates())
+
+
+def test_save_load_keeps_missing_and_mixed_values(tmp_path):
+    tre = get_tree()
+    tre = tre.set_node_values("mixed", {0: 1, 1: "one", 2: 1.5})
+    tre.idx_dict[3].add_feature("only", 3)
+    path = str(tmp_path / "tree.npz")
+    tre.save(path)
+    new = toytree.load(path)
+    assert new.idx_dict[0].mixed == 1
+    assert new.idx_dict[1].mixed == "one"
+    assert new.idx_dict[2].mixed == 1.5
+    assert new.idx_dict[3].only == 3
+    assert "only" not in new.idx_dict[4].features
+    assert dump(new) == dump(tre)
+
+
+def test_save_load_multitree(tmp_path):
+    mtre = toytree.mtree([NEWICK, "((a:2,c:1):1,(b:1,(d:1,e:1):1):1);"])
+    path = str(tmp_path / "trees.npz")
+    mtre.save(path)
+    new = toytree.load(path)
+    assert isinstance(new, toytree.Multitree.MultiTree)
+    assert new.ntrees == 2
+    for old, tre in zip(mtre.treelist, new.treelist):
+        assert dump(tre) == dump(old)
+
+
+def test_saved_tree_is_editable(tmp_path):
+    path = str(tmp_path / "tree.npz")
+    get_tree().save(path)
+    tre = toytree.load(path)
+    dropped = tre.drop_tips(["a"])
+    assert dropped.ntips == 4
+    assert "a" not in dropped.get_tip_labels()
+    assert tre.ntips == 5
+
+
+def test_save_rejects_unsaveable_values(tmp_path):
+    tre = toytree.tree(NEWICK)
+    tre = tre.set_node_values("obj", {0: [1, 2]})
+    with pytest.raises(ToytreeError):
+        tre.save(str(tmp_path / "tree.npz"))
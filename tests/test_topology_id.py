@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+"""
+Topology ids are md5 hashes of the sorted lists of tip values on each side
+of the edges of a tree, and must not change with how splits are computed.
+"""
+
+from hashlib import md5
+import pytest
+import toytree
+
+
+
+def hash_edges(node, attr):
+    "the topology id computed directly from the edges of a tree"
+    edge_keys = []
+    for side1, side2 in node.get_edges():
+        key1 = sorted(getattr(i, attr) for i in side1)
+        key2 = sorted(getattr(i, attr) for i in side2)
+        edge_keys.append(sorted([key1, key2]))
+    return md5(str(sorted(edge_keys)).encode('utf-8')).hexdigest()
+
+
+
+@pytest.mark.parametrize(
+    "newick, attr", [
+        ("((a:1,b:2):1,(c:1,(d:1,e:3):2):1);", "name"),
+        ("((a:1,b:2):1,(c:1,(d:1,e:3):2):1);", "dist"),
+        ("((a,a),(b,(c,d)));", "name"),
+    ])
+def test_topology_id_format(newick, attr):
+    tre = toytree.tree(newick)
+    assert tre.treenode.get_topology_id(attr) == hash_edges(tre.treenode, attr)
+
+
+def test_topology_id_ignores_child_order():
+    tre = toytree.rtree.unittree(30, seed=123)
+    rotated = tre.ladderize(direction=1)
+    other = toytree.rtree.unittree(30, seed=321)
+    assert tre.treenode.get_topology_id() == rotated.treenode.get_topology_id()
+    assert tre.treenode.get_topology_id() != other.treenode.get_topology_id()
@@ -0,0 +1,560 @@
+#!/usr/bin/env python
+
+"""
+A read-only array representation of a tree for querying very large trees.
+Topology is stored as NumPy arrays of parent idxs and children in CSR 
+format, with dist and support arrays and a table of names, instead of a 
+graph of TreeNode objects. Node idxs follow the ToyTree convention (tips
+0-ntips in plot order, internal nodes numbered down from the root in 
+levelorder of the ladderized tree), so results can be compared directly 
+with a ToyTree. 
+
+ArrayTree is not a storage backend for ToyTree. It supports tip labels,
+node values, edges, heights, coordinates and newick output computed from
+the arrays. Editing, features, node lookups and drawing all require a
+ToyTree, which is built from the arrays by .toytree() (also used by 
+.treenode and .draw()), and changes to it are not applied to the arrays.
+
+tre = toytree.ArrayTree(newick)
+tre.get_tip_labels()
+tre.get_node_coordinates()
+"""
+
+from __future__ import print_function, absolute_import
+
+import re
+import numpy as np
+
+from .Toytree import ToyTree
+from .TreeStyle import TreeStyle
+from .TreeParser import TreeParser
+from .TreeWriter import format_node, ILLEGAL_NEWICK_CHARS
+from .TreeArrays import parse_arrays, tree_to_arrays, arrays_to_tree
+from .utils import ToytreeError
+
+
+# dtype of node idxs in parent, children and offset arrays
+IDX_DTYPE = np.int32
+
+
+
+class ArrayTree(object):
+    """
+    Read-only tree stored as arrays, parsed from a newick string, file or
+    URL, or converted from a ToyTree. Trees are ladderized as in ToyTree.
+    Use .toytree() to edit, annotate or draw the tree.
+
+    Parameters:
+    -----------
+    newick: (str or ToyTree)
+        newick string, file or URL with one tree, or a ToyTree.
+    tree_format: (int)
+        ete format for newick tree structure. Default is 0.
+
+    Attributes:
+    -----------
+    parent: ndarray
+        parent idx of each node, -1 for the root (idx nnodes - 1).
+    children, child_offsets: ndarray
+        children of node i are children[child_offsets[i]:child_offsets[i+1]]
+        in plot order.
+    dist, support: ndarray
+        float64 edge lengths and supports of each node.
+    names: ndarray
+        utf-8 encoded (bytes) name of each node, empty if unnamed. Unnamed
+        nodes are reported by their idx, as in ToyTree.
+    """
+    def __init__(self, newick=None, tree_format=0):
+
+        self.ntips = 0
+        self.nnodes = 0
+        self.style = TreeStyle(tree_style='n')
+        self._treenode = None
+        self._tipmin = None
+
+        if isinstance(newick, ToyTree):
+            self._set_from_toytree(newick)
+        elif isinstance(newick, (str, bytes)):
+            self._set_from_newick(newick, tree_format)
+        elif newick is None:
+            self._set_from_newick(";", 0)
+        else:
+            raise ToytreeError(
+                "ArrayTree requires a newick string, file, URL or ToyTree")
+
+
+    def __len__(self):
+        return self.ntips
+
+
+    @property
+    def nbytes(self):
+        "total size in bytes of the node arrays"
+        return sum(i.nbytes for i in (
+            self.parent, self.children, self.child_offsets,
+            self.dist, self.support, self.names))
+
+
+    @property
+    def treenode(self):
+        """
+        TreeNode of the root, built from the arrays the first time it is
+        requested. Changes to these nodes are not applied to the arrays.
+        """
+        if self._treenode is None:
+            self._treenode = self.toytree().treenode
+        return self._treenode
+
+
+    # --------------------------------------------------------------------
+    # build arrays
+    # --------------------------------------------------------------------
+    def _set_from_newick(self, newick, tree_format):
+        "parse newick (or NEXUS, file or URL) to arrays and ladderize"
+        # read the first newick string from a file, URL, NEXUS or string
+        parser = TreeParser(newick, tree_format, debug=True)
+        newick = parser.load_newicks()[0].strip()
+        arrays = parse_arrays(newick, tree_format)
+
+        # apply NEXUS translate names
+        names = arrays["names"]
+        if parser.tdict:
+            names = [parser.tdict.get(i, i) for i in names]
+        self._set_ladderized(
+            arrays["children"], arrays["child_offsets"],
+            len(arrays["tip_names"]), arrays["dist"], arrays["support"],
+            names)
+
+
+    def _set_ladderized(
+        self, children, child_offsets, ntips, dist, support, names):
+        """
+        Store arrays renumbered to ToyTree idxs after ladderizing, from
+        arrays where tips are 0-ntips and each internal node comes after
+        its children (e.g., postorder), as returned by parse_arrays.
+        """
+        nnodes = dist.shape[0]
+        counts = np.diff(child_offsets)
+        chl = children.tolist()
+        offl = child_offsets.tolist()
+
+        # number of tips under each node, children come before parents
+        sizes = [1] * nnodes
+        for pidx in range(ntips, nnodes):
+            sizes[pidx] = sum(sizes[i] for i in chl[offl[pidx]:offl[pidx + 1]])
+
+        # ladderize: stable sort of the children of each node by size
+        sizes = np.array(sizes, dtype=np.int64)
+        seg = np.repeat(np.arange(nnodes), counts)
+        children = children[np.lexsort((sizes[children], seg))]
+        chl = children.tolist()
+
+        # levelorder over the ladderized tree, and the position of the first
+        # tip under each node in the preorder order of tips.
+        sizel = sizes.tolist()
+        root = nnodes - 1
+        tipstart = [0] * nnodes
+        order = [root]
+        for pidx in order:
+            start = tipstart[pidx]
+            for cidx in chl[offl[pidx]:offl[pidx + 1]]:
+                tipstart[cidx] = start
+                start += sizel[cidx]
+                order.append(cidx)
+
+        # internal nodes are numbered down from the root in levelorder, and
+        # tips down from ntips - 1 in the preorder order of tips.
+        newidx = np.zeros(nnodes, dtype=np.int64)
+        internal = [i for i in order if i >= ntips]
+        newidx[internal] = np.arange(nnodes - 1, ntips - 1, -1)
+        newidx[:ntips] = ntips - 1 - np.array(tipstart[:ntips], dtype=np.int64)
+
+        # parent idxs in new numbering, -1 for the root
+        parent = np.full(nnodes, -1, dtype=IDX_DTYPE)
+        parent[newidx[children]] = newidx[seg]
+
+        # children in CSR format in new numbering, keeping sorted order
+        new_counts = np.zeros(nnodes, dtype=np.int64)
+        new_counts[newidx] = counts
+        new_offsets = np.zeros(nnodes + 1, dtype=np.int64)
+        new_offsets[1:] = np.cumsum(new_counts)
+        pos = new_offsets[newidx[seg]] + (
+            np.arange(seg.shape[0]) - child_offsets[seg])
+        new_children = np.zeros(seg.shape[0], dtype=IDX_DTYPE)
+        new_children[pos] = newidx[children]
+
+        # node values in new numbering
+        self.ntips = ntips
+        self.nnodes = nnodes
+        self.parent = parent
+        self.children = new_children
+        self.child_offsets = new_offsets.astype(IDX_DTYPE)
+        self.dist = np.zeros(nnodes, dtype=np.float64)
+        self.dist[newidx] = dist
+        self.support = np.zeros(nnodes, dtype=np.float64)
+        self.support[newidx] = support
+        self.names = np.zeros(nnodes, dtype=_get_name_dtype(names))
+        self.names[newidx] = [i.encode() for i in names]
+
+
+    def _set_from_toytree(self, ttree):
+        "store arrays of a ToyTree, keeping its idxs and node order"
+        arrays = tree_to_arrays(ttree)
+        parent = arrays["parent"]
+        nnodes = parent.shape[0]
+
+        # children sorted by parent, and by preorder among sisters
+        rank = np.zeros(nnodes, dtype=np.int64)
+        rank[arrays["preorder"]] = np.arange(nnodes)
+        nonroot = np.flatnonzero(parent >= 0)
+        children = nonroot[np.lexsort((rank[nonroot], parent[nonroot]))]
+        offsets = np.zeros(nnodes + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(parent[nonroot], minlength=nnodes))
+
+        # names that were filled with idx labels are stored as unnamed
+        names = [
+            "" if name == str(idx) else str(name)
+            for idx, name in enumerate(arrays["names"])
+        ]
+
+        self.ntips = arrays["ntips"]
+        self.nnodes = nnodes
+        self.parent = parent.astype(IDX_DTYPE)
+        self.children = children.astype(IDX_DTYPE)
+        self.child_offsets = offsets.astype(IDX_DTYPE)
+        self.dist = arrays["dist"]
+        self.support = arrays["support"]
+        self.names = np.array(
+            [i.encode() for i in names], dtype=_get_name_dtype(names))
+        self.style = ttree.style.copy()
+
+
+    # --------------------------------------------------------------------
+    # traversal and values
+    # --------------------------------------------------------------------
+    def get_children(self, idx):
+        "returns array of the child idxs of node idx"
+        return self.children[self.child_offsets[idx]:self.child_offsets[idx + 1]]
+
+
+    def get_preorder(self):
+        "returns array of node idxs in preorder traversal order"
+        chl = self.children.tolist()
+        offl = self.child_offsets.tolist()
+        order = []
+        stack = [self.nnodes - 1]
+        while stack:
+            idx = stack.pop()
+            order.append(idx)
+            stack.extend(reversed(chl[offl[idx]:offl[idx + 1]]))
+        return np.array(order, dtype=np.int64)
+
+
+    def get_root_distances(self, use_edge_lengths=True):
+        """
+        Returns array of the distance from the root to each node, not
+        including the root dist, or the number of edges to the root if
+        use_edge_lengths=False. Sums are made by pointer jumping over all
+        nodes at once, taking log2(depth) numpy steps.
+        """
+        if use_edge_lengths:
+            toroot = self.dist.copy()
+        else:
+            toroot = np.ones(self.nnodes, dtype=np.float64)
+        anc = self.parent.astype(np.int64)
+        toroot[anc < 0] = 0.
+
+        # add the distance to the current ancestor and jump to its ancestor
+        mask = anc >= 0
+        while mask.any():
+            up = anc[mask]
+            toroot[mask] += toroot[up]
+            anc[mask] = anc[up]
+            mask = anc >= 0
+        return toroot
+
+
+    def get_node_heights(self):
+        "returns array of node heights (distance from the farthest tip)"
+        toroot = self.get_root_distances()
+        return toroot[:self.ntips].max() - toroot
+
+
+    def get_edges(self):
+        "returns array with paired edges (parent, child)"
+        edges = np.zeros((self.nnodes - 1, 2), dtype=int)
+        edges[:, 0] = self.parent[:-1]
+        edges[:, 1] = np.arange(self.nnodes - 1)
+        return edges
+
+
+    def get_names(self):
+        "returns list of node names in idx order, with idx for unnamed nodes"
+        return [
+            name.decode() if name else str(idx)
+            for idx, name in enumerate(self.names.tolist())
+        ]
+
+
+    def get_tip_labels(self, idx=None):
+        """
+        Returns tip labels in the order they will be plotted on the tree.
+        If idx is a node idx then the labels of tips descended from that
+        node are returned.
+        """
+        if idx is None:
+            lo, hi = 0, self.ntips
+        else:
+            lo = int(self._get_tipmin()[idx])
+            hi = self._get_tipmax(idx) + 1
+        return [
+            name.decode() if name else str(tidx)
+            for tidx, name in enumerate(self.names[lo:hi].tolist(), lo)
+        ]
+
+
+    def _get_tipmin(self):
+        "lowest tip idx under each node, children come before parents"
+        if self._tipmin is None:
+            tipmin = np.arange(self.nnodes)
+            chl = self.children.tolist()
+            offl = self.child_offsets.tolist()
+            tlist = tipmin.tolist()
+            for idx in range(self.ntips, self.nnodes):
+                tlist[idx] = min(tlist[i] for i in chl[offl[idx]:offl[idx + 1]])
+            self._tipmin = np.array(tlist, dtype=IDX_DTYPE)
+        return self._tipmin
+
+
+    def _get_tipmax(self, idx):
+        "highest tip idx under node idx, which is under its first children"
+        while idx >= self.ntips:
+            idx = int(self.children[self.child_offsets[idx]])
+        return idx
+
+
+    def get_node_values(self, feature=None, show_root=False, show_tips=False):
+        """
+        Returns node values in node plot order, as in ToyTree. The 'name',
+        'idx', 'dist', 'support' and 'height' features are read from the
+        arrays, other features from the materialized treenode.
+        """
+        if feature == "name":
+            vals = self.get_names()
+        elif feature == "idx":
+            vals = list(range(self.nnodes))
+        elif feature == "dist":
+            vals = self.dist.tolist()
+        elif feature == "support":
+            vals = self.support.tolist()
+        elif feature == "height":
+            vals = self.get_node_heights().tolist()
+        elif feature:
+            return self.toytree().get_node_values(feature, show_root, show_tips)
+        else:
+            vals = [" "] * self.nnodes
+
+        # hide root and tips, and reverse to plot order
+        if not show_root:
+            vals[-1] = ""
+        if not show_tips:
+            vals[:self.ntips] = [""] * self.ntips
+        vals = vals[::-1]
+
+        # convert float to ints for prettier printing unless all floats
+        if all(float(i).is_integer() for i in vals if isinstance(i, float)):
+            vals = [int(i) if isinstance(i, float) else i for i in vals]
+        return np.array(vals)
+
+
+    # --------------------------------------------------------------------
+    # coordinates
+    # --------------------------------------------------------------------
+    def get_node_coordinates(self, layout=None, use_edge_lengths=True):
+        """
+        Returns an array with (x, y) coordinates of nodes in idx order,
+        equal to those of the same ToyTree, computed from the arrays.
+        """
+        if layout is None:
+            layout = self.style.layout
+        if layout == 'c':
+            return self._get_radial_coords(use_edge_lengths)
+        return self._get_linear_coords(layout, use_edge_lengths)
+
+
+    def get_tip_coordinates(self, layout=None, use_edge_lengths=True):
+        "returns an array with (x, y) coordinates of tips"
+        return self.get_node_coordinates(layout, use_edge_lengths)[:self.ntips]
+
+
+    def _get_child_means(self, values):
+        "fill values of internal nodes with the mean of their children"
+        chl = self.children.tolist()
+        offl = self.child_offsets.tolist()
+        vlist = values.tolist()
+        for idx in range(self.ntips, self.nnodes):
+            child = chl[offl[idx]:offl[idx + 1]]
+            vlist[idx] = sum(vlist[i] for i in child) / float(len(child))
+        return np.array(vlist, dtype=np.float64)
+
+
+    def _get_linear_coords(self, layout, use_edge_lengths):
+        "x, y coordinates of nodes in a right, left, up or down layout"
+        if layout not in "drlu":
+            raise ToytreeError("layout not recognized")
+
+        # tips are evenly spaced, internal nodes centered over children
+        x = np.zeros(self.nnodes, dtype=np.float64)
+        x[:self.ntips] = np.arange(self.ntips)
+        x = self._get_child_means(x)
+
+        # tips align at zero and nodes are at their height
+        if use_edge_lengths:
+            toroot = self.get_root_distances()
+            y = toroot[:self.ntips].max() - toroot
+            y -= y.min()
+
+        # nodes are one unit above their highest child
+        else:
+            ylist = [0.] * self.nnodes
+            chl = self.children.tolist()
+            offl = self.child_offsets.tolist()
+            for idx in range(self.ntips, self.nnodes):
+                ylist[idx] = max(ylist[i] for i in chl[offl[idx]:offl[idx + 1]]) + 1
+            y = np.array(ylist, dtype=np.float64)
+
+        # orient as in Coords.get_linear_coords, where 'd' and 'u' layouts
+        # share the same coordinates.
+        verts = np.zeros((self.nnodes, 2), dtype=np.float64)
+        if layout == 'r':
+            verts[:, 0] = y * -1
+            verts[:, 1] = x
+        elif layout == 'l':
+            verts[:, 0] = y
+            verts[:, 1] = x
+        else:
+            verts[:, 0] = x * -1
+            verts[:, 1] = y * -1
+        return verts
+
+
+    def _get_radial_coords(self, use_edge_lengths):
+        "x, y coordinates of nodes in a circular layout as in Coords"
+        toroot = self.get_root_distances(use_edge_lengths)
+
+        # tips are evenly spread in radians from 0 to -2pi
+        radians = np.zeros(self.nnodes, dtype=np.float64)
+        radians[:self.ntips] = np.linspace(0, -np.pi * 2, self.ntips + 1)[:-1]
+        radians = self._get_child_means(radians)
+
+        # radius is the distance from the root, tips align if no lengths
+        radius = toroot.copy()
+        if not use_edge_lengths:
+            radius[:self.ntips] = radius[:self.ntips].max() - 1
+
+        verts = np.zeros((self.nnodes, 2), dtype=np.float64)
+        verts[:, 0] = radius * np.cos(radians)
+        verts[:, 1] = -radius * np.sin(radians)
+        return verts
+
+
+    # --------------------------------------------------------------------
+    # conversion and output
+    # --------------------------------------------------------------------
+    def toytree(self):
+        """
+        Returns a ToyTree built from the arrays, with the same idxs, node
+        order and coordinates, without ladderizing or a Coords.update().
+        """
+        verts = self.get_node_coordinates()
+        ttree = arrays_to_tree({
+            "parent": self.parent.astype(np.int64),
+            "preorder": self.get_preorder(),
+            "dist": self.dist,
+            "support": self.support,
+            "names": self.get_names(),
+            "features": {},
+            "ntips": self.ntips,
+            "layout": self.style.layout,
+            "verts": verts,
+        })
+        ttree.style = self.style.copy()
+        ttree._coords.verts = verts
+        return ttree
+
+
+    def write(self, tree_format=0, dist_formatter=None):
+        """
+        Returns a newick string of the tree written from the arrays, equal
+        to ToyTree.write() without features.
+        """
+        chl = self.children.tolist()
+        offl = self.child_offsets.tolist()
+        parl = self.parent.tolist()
+        distl = self.dist.tolist()
+        suppl = self.support.tolist()
+        names = self.get_names()
+        node = _NodeValues()
+        root = self.nnodes - 1
+        if not chl:
+            return None
+
+        # (idx, visited) pairs, nodes are closed when visited again
+        newick = []
+        stack = [(root, False)]
+        while stack:
+            idx, post = stack.pop()
+            node.name = names[idx]
+            node.dist = distl[idx]
+            node.support = suppl[idx]
+
+            if post:
+                newick.append(")")
+                if idx != root:
+                    newick.append(format_node(
+                        node, "internal", tree_format, dist_formatter))
+                continue
+
+            # a comma comes before every node that is not the first child
+            pidx = parl[idx]
+            if idx != root and chl[offl[pidx]] != idx:
+                newick.append(",")
+
+            child = chl[offl[idx]:offl[idx + 1]]
+            if not child:
+                node.name = _clean_name(node.name)
+                newick.append(format_node(node, "leaf", tree_format))
+            else:
+                newick.append("(")
+                stack.append((idx, True))
+                stack.extend((i, False) for i in reversed(child))
+        newick.append(";")
+        return "".join(newick)
+
+
+    def draw(self, *args, **kwargs):
+        """
+        Draw the tree. Arguments are the same as ToyTree.draw(). The tree
+        is drawn from a ToyTree built from the arrays with coordinates
+        computed from the arrays.
+        """
+        return self.toytree().draw(*args, **kwargs)
+
+
+
+class _NodeValues(object):
+    "holds the values of one node for formatting with TreeWriter"
+    __slots__ = ("name", "dist", "support")
+
+
+
+def _clean_name(name):
+    "replace characters that are not allowed in newick names"
+    return re.sub("[" + ILLEGAL_NEWICK_CHARS + "]", "_", name)
+
+
+
+def _get_name_dtype(names):
+    "bytes dtype wide enough for the utf-8 encoded names"
+    width = max((len(i.encode()) for i in names), default=1)
+    return "S{}".format(max(width, 1))
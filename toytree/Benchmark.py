@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+"""
+Timing functions for comparing the performance of toytree internals on
+large trees. These are not run on import, call them directly, e.g.:
+
+from toytree.Benchmark import benchmark_newick_parsers
+benchmark_newick_parsers(ntips=100000, ntrees=5)
+"""
+
+from __future__ import print_function
+
+import time
+import random
+
+from .TreeParser import Newick2TreeNode, RegexNewick2TreeNode
+
+
+
+def random_newick(ntips, tree_format=0, seed=None):
+    """
+    Returns a random bifurcating newick string with ntips built by joining
+    random pairs of subtrees. Nodes have names, supports and dists for
+    format 0, and MrBayes-like [&...] annotations for format 10.
+    """
+    rng = random.Random(seed)
+    nodes = []
+    for tip in range(ntips):
+        if tree_format == 10:
+            nodes.append(
+                "r{}[&rate={:.4g},height_95%_HPD={{0.1,0.2}}]:{:.6g}"
+                .format(tip, rng.random(), rng.random()))
+        else:
+            nodes.append("r{}:{:.6g}".format(tip, rng.random()))
+
+    # join random pairs until one node remains. Swap-pop keeps this O(n).
+    while len(nodes) > 1:
+        pair = []
+        for _ in range(2):
+            idx = rng.randrange(len(nodes))
+            nodes[idx], nodes[-1] = nodes[-1], nodes[idx]
+            pair.append(nodes.pop())
+        if tree_format == 10:
+            nodes.append(
+                "({},{})[&posterior={:.4g}]:{:.6g}"
+                .format(pair[0], pair[1], rng.random(), rng.random()))
+        else:
+            nodes.append(
+                "({},{}){}:{:.6g}"
+                .format(pair[0], pair[1], rng.randint(0, 100), rng.random()))
+    return nodes[0] + ";"
+
+
+
+def benchmark_newick_parsers(ntips=10000, ntrees=5, tree_format=0, seed=123):
+    """
+    Returns a dict with the mean time in seconds to parse a random newick
+    string of ntips with the single pass tokenizing parser (Newick2TreeNode)
+    and the previous split/regex parser (RegexNewick2TreeNode).
+    """
+    newicks = [
+        random_newick(ntips, tree_format, seed + i) for i in range(ntrees)
+    ]
+    results = {}
+    for name, parser in [
+        ("tokenizer", Newick2TreeNode),
+        ("regex", RegexNewick2TreeNode),
+        ]:
+        start = time.time()
+        for newick in newicks:
+            parser(newick, tree_format).newick_from_string()
+        results[name] = (time.time() - start) / ntrees
+    results["speedup"] = results["regex"] / results["tokenizer"]
+    return results
+
+
+
+def comb_newick(ntips):
+    """
+    Returns a newick string for a caterpillar (comb) tree with ntips, 
+    where every internal node has one tip child, so that the tree depth 
+    equals ntips. Used to check that tree functions do not recurse.
+    """
+    parts = ["r0:1"]
+    for tip in range(1, ntips):
+        parts.append(",r{}:1):1".format(tip))
+    return "(" * (ntips - 1) + "".join(parts) + ";"
+
+
+
+def benchmark_comb_tree(ntips=1000000):
+    """
+    Returns a dict with the time in seconds to load a comb tree of ntips
+    to a ToyTree (parse, ladderize and coords), and to then ladderize it,
+    get tip labels, write it to newick, copy it and calculate independent
+    contrasts. With recursive tree functions a comb tree of > 1000 tips 
+    would exceed the recursion limit. The results of get_cached_content
+    and get_ascii grow with ntips squared on a comb tree, so these are
+    only checked on smaller comb trees in the tests.
+    """
+    from .Toytree import ToyTree
+    from .PCM import PIC
+
+    newick = comb_newick(ntips)
+    results = {}
+
+    start = time.time()
+    tree = ToyTree(newick)
+    results["load"] = time.time() - start
+
+    for name, func in [
+        ("ladderize", lambda: tree.treenode.ladderize()),
+        ("get_tip_labels", tree.get_tip_labels),
+        ("write", tree.write),
+        ("copy", tree.copy),
+        ]:
+        start = time.time()
+        func()
+        results[name] = time.time() - start
+
+    start = time.time()
+    traits = tree.set_node_values(
+        "trait", {i: float(i) for i in range(ntips)}, default=0.)
+    results["set_node_values"] = time.time() - start
+    start = time.time()
+    PIC(traits, "trait")
+    results["PIC"] = time.time() - start
+
+    assert tree.ntips == ntips
+    return results
@@ -187,9 +187,10 @@ class CanvasSetup:
 
                 # generate locations
                 if self.style.use_edge_lengths:
-                    th = self.tree.treenode.height
+                    th = self.tree._nodes.treenode.height
                 else:
-                    th = self.tree.treenode.get_farthest_leaf(True)[1] + 1
+                    root = self.tree._nodes.treenode
+                    th = root.get_farthest_leaf(True)[1] + 1
                 if self.style.layout == "r":
                     top = self.style.xbaseline - th
                 else:
@@ -212,9 +213,10 @@ class CanvasSetup:
 
                 # generate locations
                 if self.style.use_edge_lengths:
-                    th = self.tree.treenode.height
+                    th = self.tree._nodes.treenode.height
                 else:
-                    th = self.tree.treenode.get_farthest_leaf(True)[1] + 1
+                    root = self.tree._nodes.treenode
+                    th = root.get_farthest_leaf(True)[1] + 1
                 if self.style.layout == "d":
                     top = self.style.ybaseline + th
                 else:
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+"""
+Index of the tips in the clade of every node as a bitset, stored as a
+Python int, for fast tests of clade membership, subsets, disjointness and
+equality with bit operations.
+"""
+
+from __future__ import print_function
+import numpy as np
+
+
+
+class CladeIndex(object):
+    """
+    Built in one postorder pass over the subtree of a TreeNode. Each tip
+    is assigned a bit position, by default in the order of get_leaves(),
+    and the bitset of each node is the union of those of its children.
+
+    If a dict 'order' mapping tip attribute values (e.g., names) to bit
+    positions is entered then tips are assigned the position of their
+    attr value, and tips whose value is not in the dict are left out of
+    all clades. This allows comparing clades among trees with the same
+    set of tip names.
+
+    Use TreeNode._get_clade_index() to get an index of the tip order that
+    is cached on the tree root until the tree is edited.
+
+    Attributes:
+    -----------
+    bits: dict mapping each node to the bitset of tips in its clade.
+    tips: list of tip nodes in order of their bit positions (None for
+        positions of the order not found in the tree).
+    """
+    def __init__(self, node, order=None, attr="name"):
+
+        # nodes in preorder, children are in order for the tip order
+        nodes = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            nodes.append(current)
+            stack.extend(reversed(current._children))
+
+        # tip positions
+        if order is None:
+            self.tips = [i for i in nodes if not i._children]
+            tbits = {j: 1 << i for i, j in enumerate(self.tips)}
+        else:
+            self.tips = [None] * len(order)
+            tbits = {}
+            for tip in nodes:
+                if not tip._children:
+                    pos = order.get(getattr(tip, attr, None))
+                    if pos is None:
+                        tbits[tip] = 0
+                    else:
+                        tbits[tip] = 1 << pos
+                        self.tips[pos] = tip
+
+        # fill bits in reversed preorder, so children before parents
+        self.bits = bits = {}
+        for current in reversed(nodes):
+            if current._children:
+                value = 0
+                for child in current._children:
+                    value |= bits[child]
+                bits[current] = value
+            else:
+                bits[current] = tbits[current]
+
+
+    def get_bits(self, tips):
+        """
+        Returns the bitset of a collection of tip nodes.
+        """
+        value = 0
+        for tip in tips:
+            value |= self.bits[tip]
+        return value
+
+
+    def get_tips(self, bits):
+        """
+        Returns the list of tip nodes in a bitset in order of position.
+        """
+        return [self.tips[i] for i in get_positions(bits)]
+
+
+
+def get_positions(bits):
+    """
+    Returns a list of the positions of the set bits of an int bitset in
+    increasing order.
+    """
+    if not bits:
+        return []
+    nbytes = (bits.bit_length() + 7) // 8
+    arr = np.frombuffer(bits.to_bytes(nbytes, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(arr, bitorder="little")).tolist()
+
+
+
+def count_bits(bits):
+    """
+    Returns the number of set bits of an int bitset.
+    """
+    return bin(bits).count("1")
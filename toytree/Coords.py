@@ -4,17 +4,13 @@
 A class object for generating and storing Toytree plotting coordinates.
 """
 
+import weakref
 import numpy as np
+from .TreeNode import TreeData
+from .TreeLevels import TreeLevels
 from .utils import ToytreeError
 
 
-"""
-TODO:
-
-- it may be useful to decompose update so plotting coords change but not idxs
--
-"""
-
 
 class Coords:
     """
@@ -29,6 +25,11 @@ class Coords:
     verts: ndarray
         2-d array with relative cartesian coordinate positions of nodes (n)
         Rows are ordered by the numbered 'idx' feature of nodes.
+    orders: dict
+        Read-only arrays of node idxs in 'preorder', 'postorder' and 
+        'levelorder' traversals, and 'depths', the number of edges from 
+        the root to each node ordered by idx. Use get_orders() to fill it
+        if it was reset by a partial update.
         ...
     """
     def __init__(self, ttree):
@@ -40,29 +41,36 @@ class Coords:
         self.edges = None
         self.verts = None
 
+        # idx arrays of traversal orders and node depths, and TreeLevels
+        self.orders = None
+        self._levels = None
+
+
+    # the toytree is referenced weakly so that it is not part of a 
+    # reference cycle and is freed as soon as it is unused. This keeps 
+    # nodes shared by copies from being cloned for trees already gone.
+    @property
+    def ttree(self):
+        return self._ttree()
+    @ttree.setter
+    def ttree(self, value):
+        self._ttree = weakref.ref(value)
+
 
     def update(self, layout=None):
         """
         Updates cartesian coordinates for drawing tree graph
         """
-        # new idx_dict (can't just overwrite existing b/c nnodes may changed)
-        self.ttree.idx_dict = {}
-
-        # store tree dimensions on update
-        self.ttree.nnodes = 0
-        self.ttree.ntips = 0
-        for node in self.ttree.treenode.traverse():
-            self.ttree.nnodes += 1
-            if node.is_leaf():
-                self.ttree.ntips += 1
-
-        # updates idxs and fixed_idx for any tree manipulations
+        # updates idxs, idx_dict and tree dimensions for any manipulations
         self.update_idxs()
-        self.circ = Circle(self.ttree)
 
         # get new edges shape and fill idx_dict
         self.edges = self.get_edges()
 
+        # tree height from the distances of tips to the root
+        toroot = self.get_root_distances()
+        self.circ = Circle(self.ttree, toroot[:self.ttree.ntips].max())
+
         # get edges and verts (node locations)
         layout = self.ttree.style.layout
         if layout == 'c':
@@ -72,32 +80,229 @@ class Coords:
 
 
 
+    def update_from_arrays(
+        self, nodes, parent, ntips, verts=None, treeheight=None):
+        """
+        Fills the same attributes as update() for a tree restored from 
+        arrays, where nodes is a list of TreeNodes in idx order that already
+        have .idx and names, and parent is an array of parent idxs. Verts 
+        and the tree height are computed only if not provided.
+        """
+        self.ttree.nnodes = len(nodes)
+        self.ttree.ntips = ntips
+        self.ttree.idx_dict = dict(enumerate(nodes))
+        self.orders = None
+        self.circ = Circle(self.ttree, treeheight)
+
+        # edges are (parent, child) for every node except the root
+        self.edges = np.zeros((len(nodes) - 1, 2), dtype=int)
+        self.edges[:, 0] = parent[:-1]
+        self.edges[:, 1] = np.arange(len(nodes) - 1)
+
+        if verts is not None:
+            self.verts = np.array(verts, dtype=float)
+        elif self.ttree.style.layout == 'c':
+            self.verts = self.get_radial_coords()
+        else:
+            self.verts = self.get_linear_coords(layout=self.ttree.style.layout)
+
+
+
+    def update_from_copy(self, coords):
+        """
+        Fills the same attributes as update() for a tree that shares (or
+        cloned) the nodes and idx_dict of the tree of coords, by copying its
+        arrays.
+        """
+        self.ttree.nnodes = coords.ttree.nnodes
+        self.ttree.ntips = coords.ttree.ntips
+        self.circ = Circle(self.ttree, coords.circ.radius)
+        self.edges = coords.edges.copy()
+        self.verts = coords.verts.copy()
+        self.orders = coords.orders
+        self._levels = coords._levels
+
+
+
     def update_idxs(self):
         """
         set root idx highest, then all internal nodes are numbered down
         in levelorder traversal, but tips are ordered numerically from
-        bottom to top in right facing ladderized tree plot order.
+        bottom to top in right facing ladderized tree plot order. Also 
+        sets a new idx_dict, nnodes and ntips on the toytree, the arrays 
+        of traversal orders, and stores the name index of the tree on its
+        root node.
         """
+        # internal nodes in levelorder, tips in preorder (get_leaves order)
+        root = self.ttree._nodes.treenode
+        preorder, postorder, levelorder, depths = _walk_orders(root)
+        internal = [i for i in levelorder if i.children]
+        tips = [i for i in preorder if not i.children]
 
-        # internal nodes: root is highest idx
+        # new idx_dict (can't just overwrite existing b/c nnodes may changed)
+        self.ttree.ntips = len(tips)
+        self.ttree.nnodes = len(internal) + len(tips)
+        self.ttree.idx_dict = idx_dict = {}
+
+        # all nodes get a new TreeData, since the tree may have been edited
+        # in place, which drops its caches, and the nodes may have left a 
+        # tree that still uses the old one.
+        old = root._data
+        columns = (old.columns if old is not None else None)
+        data = TreeData()
+        data.loose = False
+
+        # internal nodes: root is highest idx, then external nodes: lowest
+        # numbers are for tips (0-N). The old row of each node in the 
+        # feature columns is recorded to renumber them.
+        nodes = internal + tips
+        rows = []
         idx = self.ttree.nnodes - 1
-
-        for node in self.ttree.treenode.traverse("levelorder"):
-            if not node.is_leaf():
-                node.add_feature("idx", idx)
-                self.ttree.idx_dict[idx] = node
-                if not node.name:
-                    node.name = str(idx)
-                idx -= 1
-
-        # external nodes: lowest numbers are for tips (0-N)
-        for node in self.ttree.treenode.get_leaves():
-            node.add_feature("idx", idx)
-            self.ttree.idx_dict[idx] = node
+        for node in nodes:
+            if node._data is not old and node._data is not None:
+                if node._data.columns is not None:
+                    node._store_features()
+            if columns is not None:
+                rows.append(columns.get_row(node))
+            if node._features or node._annotations is not None:
+                data.loose = True
+            node._data = data
+            node.idx = idx
+            idx_dict[idx] = node
             if not node.name:
                 node.name = str(idx)
             idx -= 1
 
+        # feature columns in the new idx order, nodes not in them are -1
+        if columns is not None:
+            rows = np.array([-1 if i is None else i for i in rows], dtype=int)
+            data.columns = columns.renumber(nodes[::-1], rows[::-1])
+
+        # traversal orders as idxs, and name index with the names set above
+        self._set_orders(preorder, postorder, levelorder, depths)
+        root._set_name_index(levelorder)
+
+
+
+    def get_orders(self):
+        """
+        Returns the dict of arrays of node idxs in traversal orders and of 
+        node depths (see .orders), filling it if needed from the current 
+        idxs of nodes.
+        """
+        if self.orders is None:
+            self._set_orders(*_walk_orders(self.ttree._nodes.treenode))
+        return self.orders
+
+
+
+    def get_levels(self):
+        """
+        Returns a TreeLevels of the tree for vectorized passes over nodes
+        grouped by depth. It is cached with the orders it is built from.
+        """
+        orders = self.get_orders()
+        if self._levels is None or self._levels[0] is not orders:
+            levels = TreeLevels(
+                orders["levelorder"], orders["depths"], self.edges[:, 0])
+            self._levels = (orders, levels)
+        return self._levels[1]
+
+
+
+    def _set_orders(self, preorder, postorder, levelorder, depths):
+        "fill .orders from lists of nodes and depths from _walk_orders"
+        self.orders = {
+            "preorder": np.array([i.idx for i in preorder], dtype=int),
+            "postorder": np.array([i.idx for i in postorder], dtype=int),
+            "levelorder": np.array([i.idx for i in levelorder], dtype=int),
+            "depths": np.zeros(len(levelorder), dtype=int),
+        }
+        self.orders["depths"][self.orders["levelorder"]] = depths
+
+        # arrays are shared by copies of the tree so cannot be modified
+        for arr in self.orders.values():
+            arr.setflags(write=False)
+
+
+
+    def update_subtree(self, node):
+        """
+        Updates idxs, idx_dict, edges and verts after the order of children
+        was changed for one or more nodes in the subtree of node, without 
+        adding, removing or changing edge lengths of nodes. Only the nodes 
+        in the subtree are renumbered (they reuse the same set of idxs) and 
+        only they and their ancestors are repositioned. Edits that add or 
+        remove nodes shift the idxs of all nodes, since tips are numbered 
+        from 0 and the root is nnodes - 1, and require a full update().
+        """
+        # the tree may have been edited in place, drop its caches
+        data = self.ttree._nodes.treenode._data
+        if data is not None:
+            data.edits += 1
+        self.orders = None
+
+        # subtree tips in preorder reuse their range of idxs, first is max
+        tips = [i for i in node.traverse("preorder") if not i.children]
+        tidxs = sorted((i.idx for i in tips), reverse=True)
+
+        # subtree internal nodes at each depth are contiguous in levelorder
+        # so each depth reuses its set of idxs in the new levelorder.
+        internal = []
+        level = [node] if node.children else []
+        while level:
+            internal.extend(level)
+            level = [j for i in level for j in i.children if j.children]
+        iidxs = sorted((i.idx for i in internal), reverse=True)
+
+        # old vertex rows of nodes before renumbering
+        nodes = internal + tips
+        oldidxs = [i.idx for i in nodes]
+        oldrows = self.verts[oldidxs]
+        idx_dict = self.ttree._nodes.idx_dict
+        for idx, snode in zip(iidxs + tidxs, nodes):
+            snode.idx = idx
+            idx_dict[idx] = snode
+            if snode.up is not None:
+                self.edges[idx] = (snode.up.idx, idx)
+        self.verts[iidxs + tidxs] = oldrows
+
+        # feature columns of the tree move with the nodes
+        if data is not None and data.columns is not None:
+            data.columns.move_rows(nodes, oldidxs, iidxs + tidxs)
+
+        # update positions of the subtree nodes and ancestors, children first
+        path = internal[::-1] + list(node.iter_ancestors())
+        if self.ttree.style.layout == 'c':
+            # radii are unchanged, radians are set from the tips up. Nodes
+            # without stored radians (e.g., from arrays) need a full update.
+            try:
+                for tip in tips:
+                    tip.radians = self.circ.tip_radians[tip.idx]
+                    tip.x, tip.y = self.circ.get_node_coords(tip)
+                    self.verts[tip.idx] = [tip.x, tip.y]
+                for pnode in path:
+                    pnode.radians = np.mean(
+                        [i.radians for i in pnode.children])
+                    pnode.x, pnode.y = self.circ.get_node_coords(pnode)
+                    self.verts[pnode.idx] = [pnode.x, pnode.y]
+            except AttributeError:
+                self.verts = self.get_radial_coords()
+        else:
+            # heights are unchanged, only positions along the tip axis of 
+            # the layout (a column of verts, negated for 'd' and 'u' which 
+            # get_linear_coords orients the same) are updated.
+            layout = self.ttree.style.layout
+            col = (1 if layout in "rl" else 0)
+            sign = (1 if layout in "rl" else -1)
+            for tip in tips:
+                tip.x = tip.idx
+                self.verts[tip.idx, col] = sign * tip.x
+            for pnode in path:
+                cidxs = [i.idx for i in pnode.children]
+                self.verts[pnode.idx, col] = self.verts[cidxs, col].mean()
+                pnode.x = sign * self.verts[pnode.idx, col]
+
 
 
     # def update_fixed_order(self):
@@ -124,66 +329,66 @@ class Coords:
         """
         # use cache to fill edges array
         edges = np.zeros((self.ttree.nnodes - 1, 2), dtype=int)
+        idx_dict = self.ttree._nodes.idx_dict
         for idx in range(self.ttree.nnodes - 1):
-            parent = self.ttree.idx_dict[idx].up
+            parent = idx_dict[idx].up
             if parent:
                 edges[idx, :] = (parent.idx, idx)
         return edges
 
 
 
+    def get_root_distances(self, use_edge_lengths=True):
+        """
+        Returns an array of the distance from the root to each node in idx
+        order, summed in one vectorized pass down the levels of the tree.
+        The root dist is not included. If use_edge_lengths=False the 
+        distance is the number of edges to the root.
+        """
+        orders = self.get_orders()
+        if not use_edge_lengths:
+            return orders["depths"].astype(float)
+
+        nodes = map(self.ttree._nodes.idx_dict.get, range(self.ttree.nnodes))
+        dists = np.array([node._dist for node in nodes], dtype=float)
+        dists[-1] = 0.
+        return self.get_levels().propagate_down(dists)
+
+
+
     def get_radial_coords(self, use_edge_lengths=True):
         """
         Assign .edges and .verts for node positions in a fan tree.
         The farthest tip aligns at the circumference.
         """
+        nnodes = self.ttree.nnodes
+        ntips = self.ttree.ntips
 
-        verts = np.zeros((self.ttree.nnodes, 2), dtype=float)
+        # distance (or number of edges) from the root to each node
+        toroot = self.get_root_distances(use_edge_lengths)
+        treeheight = toroot.max() if nnodes else 0.
 
-        # shortname
-        if not use_edge_lengths:
-            nbits = self.ttree.treenode.get_farthest_leaf(True)[1]
-
-        # use cache to fill edges array
-        for idx in range(self.ttree.nnodes):
-            node = self.ttree.idx_dict[idx]
-
-            # leaves: x positions are evenly spaced around circumference
-            if node.is_leaf() and (not node.is_root()):
-
-                # store radians (how far around from zero to 2pi)
-                node.radians = self.circ.tip_radians[idx]
-
-                # get positions of tips using radians and radius
-                if use_edge_lengths:
-                    node.radius = self.circ.radius - node.height
-                    node.x, node.y = self.circ.get_node_coords(node)
-                else:
-                    node.radius = nbits
-                    node.x, node.y = self.circ.get_node_coords(node)
-
-            # internal nodes comes after tips. Inherit position from children.
-            else:
-
-                # height is either distance or nodes from root
-                if use_edge_lengths:
-                    node.radius = self.circ.radius - node.height
-                else:
-                    node.radius = sum(1 for i in node.iter_ancestors())
-                    # max([i.radius for i in node.children]) - 1
-
-                # x position is halfway between children x-pos
-                node.radians = np.mean([i.radians for i in node.children])
-                node.x, node.y = self.circ.get_node_coords(node)
-
-            # store the x,y vertex positions
-            verts[node.idx] = [node.x, node.y]
+        # radius of nodes from their height, or if not using edge lengths
+        # from their number of edges to the root with tips aligned.
+        if use_edge_lengths:
+            radius = self.circ.radius - (treeheight - toroot)
+        else:
+            radius = toroot.copy()
+            radius[:ntips] = toroot[:ntips].max() - 1
+
+        # leaves are evenly spaced around circumference (radians from zero
+        # to 2pi), internal nodes are halfway between their children.
+        radians = np.zeros(nnodes, dtype=float)
+        radians[:ntips] = self.circ.tip_radians
+        radians = self.get_levels().reduce_up(radians, np.mean)
+
+        # store the x,y vertex positions, and on the nodes
+        verts = np.zeros((nnodes, 2), dtype=float)
+        verts[:, 0] = self.circ.o[0] + radius * np.cos(radians)
+        verts[:, 1] = self.circ.o[1] - radius * np.sin(radians)
+        _set_node_coords(self.ttree._nodes.idx_dict, verts, radius, radians)
         return verts
 
-        # scale so that node idx 0 (or fixed_order x) is at (0, 0)
-        # adjust = self.ttree._coords.verts[:, 1].min()
-        # self.ttree._coords.verts[:, 1] -= adjust        
-
 
 
     def get_linear_coords(
@@ -198,71 +403,43 @@ class Coords:
         X and Y positions here refer to base assumption that tree is right
         facing, reorient_coordinates() will handle re-translating this.        
         """
-        verts = np.zeros((self.ttree.nnodes, 2), dtype=float)
-
-        # store verts array with x,y positions of nodes (lengths of branches)
-        # we want tips to align at the right face (larger axis number)
-        fartip = self.ttree.treenode.get_farthest_leaf()[0]
-        hgt = sum([
-            fartip.dist,
-            sum(i.dist for i in fartip.iter_ancestors() if not i.is_root())
-        ])
-
-        # finding tip distance from root is a little slow, it would be faster
-        # just progress forward from root, but this wouldn't easily allow for
-        # spacing fixed order tips. So instead we start from tips. 
-        for idx in range(self.ttree.nnodes):
-            node = self.ttree.idx_dict[idx]
-
-            # position the x-labels
-            if node.is_leaf() and (not node.is_root()):
-                if use_edge_lengths:
-                    toroot = sum(
-                        i.dist for i in node.iter_ancestors()
-                        if not i.is_root()
-                    )
-                    node.y = hgt - (node.dist + toroot)
-                else:
-                    node.y = 0.
-
-                # order of xlabels
-                if fixed_order is not None:
-
-                    # the position is explicit
-                    if fixed_position is not None:
-                        node.x = fixed_position[fixed_order.index(node.name)]
-
-                    # simply use the index as position
-                    else:
-                        node.x = fixed_order.index(node.name)
-                else:
-
-                    # the position is exxplicit
-                    if fixed_position is not None:
-                        node.x = fixed_position[node.idx]
-
-                    # simply use the index as position
-                    else:
-                        node.x = node.idx
-
-            else:
-                nch = node.children
-                # empty trees only
-                if not nch:
-                    node.x = node.y = 0
-
-                # all other trees
-                else:
-                    if use_edge_lengths:
-                        node.y = nch[0].y + nch[0].dist
-                    else:
-                        node.y = max((i.y for i in nch)) + 1
-
-                    # internal node at midpoint of children
-                    node.x = sum(i.x for i in nch) / float(len(nch))
-
-            # store the vertex
-            verts[idx] = [node.x, node.y]
+        nnodes = self.ttree.nnodes
+        ntips = self.ttree.ntips
+        levels = self.get_levels()
+
+        # position the x-labels, by default the order of tips is their idx
+        xpos = np.zeros(nnodes, dtype=float)
+        if fixed_order is not None:
+            order = {name: pos for (pos, name) in enumerate(fixed_order)}
+            idx_dict = self.ttree._nodes.idx_dict
+            tpos = [order[idx_dict[idx].name] for idx in range(ntips)]
+        else:
+            tpos = list(range(ntips))
+
+        # the position is explicit or simply use the index as position
+        if fixed_position is not None:
+            xpos[:ntips] = np.asarray(fixed_position, dtype=float)[tpos]
+        else:
+            xpos[:ntips] = tpos
+
+        # internal nodes at the midpoint of their children
+        xpos = levels.reduce_up(xpos, np.mean)
+
+        # we want tips to align at the right face (larger axis number), 
+        # and nodes at their height, or one unit above their highest child.
+        if use_edge_lengths:
+            toroot = self.get_root_distances()
+            hgt = toroot[:ntips].max() if nnodes else 0.
+            ypos = hgt - toroot
+        else:
+            ypos = levels.reduce_up(
+                np.zeros(nnodes), np.maximum, np.ones(nnodes))
+
+        # store the vertices, and on the nodes
+        verts = np.zeros((nnodes, 2), dtype=float)
+        verts[:, 0] = xpos
+        verts[:, 1] = ypos
+        _set_node_coords(self.ttree._nodes.idx_dict, verts)
 
         # scale so that node idx 0 (or fixed_order x) is at (0, 0)
         if use_edge_lengths:
@@ -313,7 +490,7 @@ class Coords:
         # get circular layout
         if layout == 'c':
             self.radii = np.array(
-                [self.ttree.idx_dict[i].radius for i in range(self.nnodes)])
+                [self.ttree._nodes.idx_dict[i].radius for i in range(self.nnodes)])
         else:
             self.radii = np.repeat(0, self.ntips)
 
@@ -332,6 +509,61 @@ class Coords:
 
 
 
+def _set_node_coords(idx_dict, verts, radius=None, radians=None):
+    "store positions (and polar coordinates if entered) on the nodes"
+    xpos = verts[:, 0].tolist()
+    ypos = verts[:, 1].tolist()
+    for idx in range(verts.shape[0]):
+        node = idx_dict[idx]
+        node.x = xpos[idx]
+        node.y = ypos[idx]
+    if radius is not None:
+        radius = radius.tolist()
+        radians = radians.tolist()
+        for idx in range(verts.shape[0]):
+            node = idx_dict[idx]
+            node.radius = radius[idx]
+            node.radians = radians[idx]
+
+
+
+def _walk_orders(root):
+    """
+    Returns lists of the nodes under root in preorder, postorder and 
+    levelorder, the same orders as TreeNode.traverse(), and a list of the
+    depth of each node in levelorder.
+    """
+    # preorder, children are pushed in reverse to visit the first one next
+    preorder = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        preorder.append(node)
+        stack.extend(reversed(node._children))
+
+    # postorder is the reverse of a preorder that visits last children first
+    postorder = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        postorder.append(node)
+        stack.extend(node._children)
+    postorder.reverse()
+
+    # levelorder, one depth at a time
+    levelorder = []
+    depths = []
+    level = [root]
+    depth = 0
+    while level:
+        levelorder.extend(level)
+        depths.extend([depth] * len(level))
+        level = [j for i in level for j in i._children]
+        depth += 1
+    return preorder, postorder, levelorder, depths
+
+
+
 class Circle:
     """
     When init from a toytree it can return coordinates based on 
@@ -341,11 +573,12 @@ class Circle:
     The radius for farthest tip-ends is set to the tree height, 
     and origin is at 0.0.
     """
-    def __init__(self, tre):
+    def __init__(self, tre, radius=None):
 
         # set radius
-        self.tre = tre
-        self.radius = self.tre.treenode.height 
+        if radius is None:
+            radius = tre._nodes.treenode.height
+        self.radius = radius
         # get_distance(self.tre.treenode.get_farthest_leaf()[0])
 
         # origin
@@ -353,7 +586,7 @@ class Circle:
         # self.tre.style.xbaseline, self.tre.style.ybaseline)  # -self.radius, 0)
 
         # tips (bottom to top) are evenly spread from 0 to -2pi (counter clock)
-        self.tip_radians = np.linspace(0, -np.pi * 2, self.tre.ntips + 1)[:-1]
+        self.tip_radians = np.linspace(0, -np.pi * 2, tre.ntips + 1)[:-1]
 
 
     def get_node_coords(self, node):
@@ -0,0 +1,552 @@
+#!/usr/bin/env python
+
+"""
+Columnar storage of the node features of a tree (FeatureColumns), and
+access to them from a ToyTree (FeatureTable).
+"""
+
+from numbers import Number, Integral, Real
+from collections.abc import Set
+import numpy as np
+from .TreeNode import TreeNode
+from .utils import ToytreeError
+
+# features stored on nodes instead of in columns
+NODE_FEATURES = frozenset(["dist", "support", "name", "height", "idx"])
+
+# dtype of a column of values of one kind (see get_kind)
+COLUMN_DTYPES = {"b": bool, "i": np.int64, "f": np.float64, "U": str}
+
+
+
+def get_kind(vtype):
+    "returns the kind of column for a type of value: b, i, f, U or O"
+    if issubclass(vtype, (bool, np.bool_)):
+        return "b"
+    if issubclass(vtype, Integral):
+        return "i"
+    if issubclass(vtype, Real):
+        return "f"
+    if issubclass(vtype, str):
+        return "U"
+    return "O"
+
+
+
+def is_column_feature(feature):
+    """
+    Returns True if a feature can be stored in columns, i.e., it is not
+    one of the features stored on nodes, or a TreeNode attribute such
+    as the plot coordinates .x and .y.
+    """
+    return feature not in NODE_FEATURES and not hasattr(TreeNode, feature)
+
+
+
+def as_column(values):
+    """
+    Returns an array of a list of values, which is typed (bool, int64,
+    float64 or str) if all values are of one of these kinds, and is an
+    object array otherwise so that values are kept as they are.
+    """
+    kinds = {get_kind(i) for i in set(map(type, values))}
+    if len(kinds) == 1:
+        kind = kinds.pop()
+        if kind != "O":
+            try:
+                return np.array(values, dtype=COLUMN_DTYPES[kind])
+            except OverflowError:
+                pass
+    column = np.empty(len(values), dtype=object)
+    for idx, value in enumerate(values):
+        column[idx] = value
+    return column
+
+
+
+class FeatureColumns(object):
+    """
+    The added features of the nodes of a tree, stored as arrays of values
+    indexed by node idx. It is kept on the TreeData shared by the nodes,
+    and nodes return values from it as attributes (see TreeNode). A mask
+    of the nodes that have a value is kept for each feature, or None if
+    all nodes have one. The list of nodes by idx is used to check that a
+    node is in the columns, since nodes that were added to the tree or
+    renumbered since have an idx of another row.
+    """
+    __slots__ = ("nodes", "values", "present")
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.values = {}
+        self.present = {}
+
+
+    def get_row(self, node):
+        "returns the row of the node, or None if it is not in the columns"
+        try:
+            row = node.idx
+        except AttributeError:
+            return None
+        if row < len(self.nodes) and self.nodes[row] is node:
+            return row
+        return None
+
+
+    def get_names(self, node=None):
+        "returns the set of features with a value on node, or on any node"
+        if node is None:
+            return set(
+                name for name, present in self.present.items()
+                if present is None or present.any()
+            )
+        row = self.get_row(node)
+        if row is None:
+            return set()
+        return set(
+            name for name, present in self.present.items()
+            if present is None or present[row]
+        )
+
+
+    def has_feature(self, name):
+        "returns True if any node has a value of the feature"
+        if name not in self.values:
+            return False
+        present = self.present[name]
+        return present is None or bool(present.any())
+
+
+    def get_value(self, node, name, default=None):
+        "returns the value of a feature on node, or default if missing"
+        column = self.values.get(name)
+        if column is None:
+            return default
+        row = self.get_row(node)
+        if row is None:
+            return default
+        present = self.present[name]
+        if present is not None and not present[row]:
+            return default
+        if column.dtype.kind == "O":
+            return column[row]
+        return column[row].item()
+
+
+    def get_column(self, name):
+        "returns the array of values of a feature and its mask (or None)"
+        return self.values[name], self.present[name]
+
+
+    def set_value(self, node, name, value):
+        """
+        Sets the value of a feature on node if it has a column and the
+        node is in the columns, and returns whether it was set.
+        """
+        column = self.values.get(name)
+        if column is None:
+            return False
+        row = self.get_row(node)
+        if row is None:
+            return False
+
+        # values of another kind, or longer strings, convert the column
+        kind = get_kind(type(value))
+        if kind != column.dtype.kind or (
+            kind == "U" and len(value) > column.dtype.itemsize // 4):
+            self.set_rows(name, [row], [value])
+            return True
+        try:
+            column[row] = value
+        except OverflowError:
+            column = self.values[name] = column.astype(object)
+            column[row] = value
+        present = self.present[name]
+        if present is not None:
+            present[row] = True
+        return True
+
+
+    def set_column(self, name, column):
+        "sets a feature on all nodes from an array of values in idx order"
+        self.values[name] = column
+        self.present[name] = None
+
+
+    def set_rows(self, name, rows, values):
+        """
+        Sets a feature on the nodes at rows from a list of values. The
+        column is converted to an object array if the values are of
+        another kind.
+        """
+        new = as_column(values)
+        column = self.values.get(name)
+        if column is None:
+            if new.dtype.kind == "O":
+                column = np.full(len(self.nodes), None, dtype=object)
+            else:
+                column = np.zeros(len(self.nodes), dtype=new.dtype)
+            present = np.zeros(len(self.nodes), dtype=bool)
+        else:
+            present = self.present[name]
+            if new.dtype.kind != column.dtype.kind:
+                column = column.astype(object)
+                new = new.astype(object)
+            elif new.dtype.itemsize > column.dtype.itemsize:
+                column = column.astype(new.dtype)
+        column[rows] = new
+        if present is not None:
+            present[rows] = True
+            if present.all():
+                present = None
+        self.values[name] = column
+        self.present[name] = present
+
+
+    def remove_value(self, node, name):
+        "removes a feature from node and returns whether it had a value"
+        row = self.get_row(node)
+        if name not in self.values or row is None:
+            return False
+        present = self.present[name]
+        if present is None:
+            present = self.present[name] = np.ones(len(self.nodes), bool)
+        elif not present[row]:
+            return False
+        present[row] = False
+        return True
+
+
+    def remove_column(self, name):
+        "removes a feature from all nodes"
+        self.values.pop(name, None)
+        self.present.pop(name, None)
+
+
+    def pop_node(self, node):
+        "returns a dict of the features of node and removes them"
+        features = {}
+        for name in self.get_names(node):
+            features[name] = self.get_value(node, name)
+            self.remove_value(node, name)
+        return features
+
+
+    def copy(self, nodes):
+        "returns a copy of the columns for a list of nodes by row"
+        columns = FeatureColumns(nodes)
+        for name, column in self.values.items():
+            present = self.present[name]
+            if present is not None:
+                present = present.copy()
+            columns.values[name] = column.copy()
+            columns.present[name] = present
+        return columns
+
+
+    def renumber(self, nodes, rows):
+        """
+        Returns new columns for a list of nodes by new idx, where rows is
+        an int array of the old row of each node, or -1 for nodes that
+        were not in the columns.
+        """
+        columns = FeatureColumns(nodes)
+        missing = rows < 0
+        if not missing.any():
+            missing = None
+        for name, column in self.values.items():
+            present = self.present[name]
+            if present is not None:
+                present = present[rows]
+            if missing is not None:
+                if present is None:
+                    present = ~missing
+                else:
+                    present[missing] = False
+            columns.values[name] = column[rows]
+            columns.present[name] = present
+        return columns
+
+
+    def move_rows(self, nodes, old, new):
+        """
+        Moves the values of nodes from their old rows to new rows, where
+        new is a reordering of the old rows, for nodes that were
+        renumbered among themselves.
+        """
+        old = np.array(old, dtype=int)
+        new = np.array(new, dtype=int)
+        kept = np.array(
+            [self.nodes[i] is node for i, node in zip(old, nodes)],
+            dtype=bool)
+        for name, column in self.values.items():
+            column[new] = column[old]
+            present = self.present[name]
+            if present is not None or not kept.all():
+                if present is None:
+                    present = np.ones(len(self.nodes), dtype=bool)
+                present[new] = present[old] & kept
+                self.present[name] = present
+        for row, node in zip(new.tolist(), nodes):
+            self.nodes[row] = node
+
+
+
+class FeatureTable(Set):
+    """
+    Returned by ToyTree.features. It acts as the set of feature names of
+    the tree's nodes (e.g., "name", "dist", "support", "height", "idx" and
+    any added features), and as a table of features stored as columns.
+
+    Added features of a tree are stored in typed arrays indexed by node
+    idx (see FeatureColumns), which are read and written here directly.
+    Indexing by a feature name returns a new numpy array of the values of
+    all nodes in node plot order: the order of .get_node_values(), from
+    the root (highest idx) down to idx 0. Numeric features with missing
+    values are returned as floats with NaN, and other features missing on
+    a node are None. Assigning an array (or a single value) to a feature
+    sets it on all nodes of this tree in place; use .copy() first to keep
+    the original tree unchanged.
+
+    Example:
+    --------
+    tre.features["Ne"] = np.random.uniform(1e4, 1e5, tre.nnodes)
+    tre.draw(node_sizes=tre.features["Ne"] / 1e4)
+    """
+    def __init__(self, ttree):
+        self.ttree = ttree
+
+
+    # set of feature names
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+    def _get_names(self):
+        columns = self._get_columns()
+        names = set(NODE_FEATURES - {"idx"})
+        if hasattr(self.ttree._nodes.treenode, "idx"):
+            names.add("idx")
+
+        # features that are not stored in columns, e.g., .x
+        for node in columns.nodes:
+            if node._features:
+                names.update(node._features)
+        names.update(columns.get_names())
+        return names
+
+    def __iter__(self):
+        return iter(self._get_names())
+
+    def __len__(self):
+        return len(self._get_names())
+
+    def __contains__(self, feature):
+        if feature in NODE_FEATURES - {"idx"}:
+            return True
+        if is_column_feature(feature):
+            columns = self._get_columns()
+            return columns.has_feature(feature)
+        return feature in self._get_names()
+
+    def __repr__(self):
+        return repr(self._get_names())
+
+
+    # columns of feature values
+    def _get_nodes(self, shared=True):
+        "returns nodes in plot order (idx from nnodes - 1 down to 0)"
+        self.ttree._apply_pending_update()
+        if not shared:
+            self.ttree._own_nodes()
+        idx_dict = self.ttree._nodes.idx_dict
+        return [idx_dict[i] for i in range(self.ttree.nnodes - 1, -1, -1)]
+
+
+    def _get_columns(self, shared=True):
+        """
+        Returns the FeatureColumns of the tree. Features that were added to
+        nodes that were not in the columns (e.g., new nodes, or features
+        parsed from annotations) are moved to the columns first.
+        """
+        self.ttree._apply_pending_update()
+        if not shared:
+            self.ttree._own_nodes()
+        data = self.ttree._nodes.treenode._get_edit_token()[0]
+        if data.columns is not None and not data.loose:
+            return data.columns
+
+        # nodes by idx, the rows of the columns
+        nodes = self._get_nodes(shared)[::-1]
+        if data.columns is None:
+            data.columns = FeatureColumns(nodes)
+        columns = data.columns
+
+        # collect values of features stored on nodes by feature name
+        found = {}
+        for row, node in enumerate(nodes):
+            if node._annotations is not None:
+                node._decode_annotations()
+            if not node._features:
+                continue
+            for name in list(node._features):
+                if name not in found and not is_column_feature(name):
+                    continue
+                if name in node.__dict__:
+                    rows, values = found.setdefault(name, ([], []))
+                    rows.append(row)
+                    values.append(node.__dict__.pop(name))
+                    node._features.discard(name)
+            if not node._features:
+                node._features = None
+
+        for name, (rows, values) in found.items():
+            columns.set_rows(name, rows, values)
+        data.loose = False
+        return columns
+
+
+    def __getitem__(self, feature):
+        """
+        Returns a numpy array of the feature values of all nodes in plot
+        order.
+        """
+        if not is_column_feature(feature):
+            return self._get_node_column(feature)
+        columns = self._get_columns()
+        if feature not in columns.values:
+            raise KeyError(feature)
+        column, present = columns.get_column(feature)
+        if present is not None and not present.any():
+            raise KeyError(feature)
+
+        # typed columns without missing values, reversed to plot order
+        kind = column.dtype.kind
+        if kind != "O" and present is None:
+            return column[::-1].copy()
+
+        # numbers (but not bools) are float arrays with NaN if missing
+        if kind in "if":
+            values = column.astype(float)
+            values[~present] = np.nan
+            return values[::-1]
+
+        # others are object arrays with None if missing, or are typed if
+        # an object column has values of one type.
+        if kind != "O":
+            values = column.astype(object)
+            values[~present] = None
+            return values[::-1]
+        values = column.tolist()
+        if present is not None:
+            values = [
+                i if j else None for i, j in zip(values, present.tolist())]
+        return _get_typed_values(values[::-1])
+
+
+    def _get_values(self, feature, default=None):
+        "returns a list of values of an added feature in plot order"
+        columns = self._get_columns()
+        if feature not in columns.values:
+            return [default] * len(columns.nodes)
+        column, present = columns.get_column(feature)
+        values = column.tolist()
+        if present is not None:
+            values = [
+                i if j else default for i, j in zip(values, present.tolist())]
+        return values[::-1]
+
+
+    def _get_node_column(self, feature):
+        "returns values of a feature stored on nodes in plot order"
+        nodes = self._get_nodes()
+        if feature == "height":
+            heights = nodes[0]._get_heights()
+            return np.array([heights[node] for node in nodes])
+        values = [getattr(node, feature, None) for node in nodes]
+        return _get_typed_values(values, feature)
+
+
+    def __setitem__(self, feature, values):
+        """
+        Sets a feature on all nodes of the tree in place, from a single
+        value or a sequence of values in plot order.
+        """
+        if feature == "idx":
+            raise ToytreeError("cannot modify idx values.")
+        if feature == "height":
+            raise ToytreeError("modifying heights not supported, use dist.")
+
+        nnodes = self.ttree.nnodes
+        if isinstance(values, (str, bytes)) or np.ndim(values) == 0:
+            column = np.repeat(as_column([values]), nnodes)
+        else:
+            column = np.asarray(values)
+            if column.shape[0] != nnodes:
+                raise ToytreeError(
+                    "expected {} values (one per node) but got {}"
+                    .format(nnodes, column.shape[0]))
+            column = column[::-1]
+            if column.ndim == 1 and column.dtype.kind in "biufU":
+                column = column.astype(COLUMN_DTYPES[
+                    "i" if column.dtype.kind == "u" else column.dtype.kind])
+            else:
+                column = as_column(column.tolist())
+
+        # added features are stored as a column, features stored on nodes
+        # use the node setters.
+        if is_column_feature(feature):
+            self._get_columns(shared=False).set_column(feature, column)
+            return
+        nodes = self._get_nodes(shared=False)[::-1]
+        for node, value in zip(nodes, column.tolist()):
+            if feature in NODE_FEATURES:
+                setattr(node, feature, value)
+            else:
+                node.add_feature(feature, value)
+
+        # edge lengths change the plot coordinates
+        if feature == "dist":
+            self.ttree._update_after_edit()
+
+
+    def __delitem__(self, feature):
+        """
+        Removes an added feature from all nodes of the tree in place.
+        """
+        if feature in NODE_FEATURES:
+            raise ToytreeError("cannot remove the {} feature".format(feature))
+        if feature not in self:
+            raise KeyError(feature)
+        if is_column_feature(feature):
+            self._get_columns(shared=False).remove_column(feature)
+        else:
+            for node in self._get_nodes(shared=False):
+                node.del_feature(feature)
+
+
+
+def _get_typed_values(values, feature=None):
+    """
+    Returns an array of a list of values in which missing values are None:
+    numbers (but not bools) are int or float arrays with NaN if missing,
+    and others are typed if none are missing and they have one type.
+    """
+    present = [i for i in values if i is not None]
+    if not present:
+        raise KeyError(feature)
+    if all(
+        isinstance(i, Number) and not isinstance(i, (bool, np.bool_))
+        for i in present
+    ):
+        if len(present) < len(values):
+            return np.array(
+                [np.nan if i is None else i for i in values], dtype=float)
+        return np.array(values)
+    if len(present) == len(values):
+        column = np.array(values)
+        if column.dtype.kind in "USb":
+            return column
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""
+Index for constant time queries of the lowest common ancestor (mrca) of
+nodes, using an Euler tour of the tree and a sparse table for range
+minimum queries (RMQ) on node depths.
+"""
+
+from __future__ import print_function
+import numpy as np
+from .utils import TreeError
+
+
+
+class LCAIndex(object):
+    """
+    Built in O(n log n) from the root TreeNode of a tree. The Euler tour
+    visits every node on the way down and again after each of its children,
+    so the mrca of two nodes is the shallowest node visited between their
+    first visits. The sparse table stores the position of the shallowest
+    node for each range of length 2^k, such that any range is covered by
+    two (overlapping) ranges.
+
+    Use TreeNode._get_lca_index() to get an index that is cached on the
+    tree root until the tree is edited.
+    """
+    def __init__(self, root):
+
+        # euler tour of nodes, their depths, and the first visit of each
+        self.euler = []
+        self.depths = []
+        self.first = {}
+        self._euler_tour(root)
+
+        # table[k][i] is the position of the shallowest node in [i, i+2^k)
+        self.table = []
+        self._build_table()
+
+
+    def _euler_tour(self, root):
+        "iterative tour, revisits of a parent are pushed between children"
+        euler = self.euler
+        depths = self.depths
+        first = self.first
+        stack = [(root, 0, True)]
+        while stack:
+            node, depth, enter = stack.pop()
+            if enter:
+                first[node] = len(euler)
+                for child in reversed(node._children):
+                    stack.append((node, depth, False))
+                    stack.append((child, depth + 1, True))
+            euler.append(node)
+            depths.append(depth)
+
+
+    def _build_table(self):
+        "fill levels from the previous level as the min of its two halves"
+        depth = np.array(self.depths, dtype=np.int64)
+        size = depth.shape[0]
+        level = np.arange(size, dtype=np.int64)
+        self.table.append(level)
+        span = 1
+        while 2 * span <= size:
+            left = level[:level.shape[0] - span]
+            right = level[span:]
+            level = np.where(depth[left] <= depth[right], left, right)
+            self.table.append(level)
+            span *= 2
+
+
+    def _query(self, left, right):
+        "position of the shallowest node in the tour in [left, right]"
+        kidx = (right - left + 1).bit_length() - 1
+        level = self.table[kidx]
+        pos1 = int(level[left])
+        pos2 = int(level[right - (1 << kidx) + 1])
+        if self.depths[pos1] <= self.depths[pos2]:
+            return pos1
+        return pos2
+
+
+    def _get_first(self, node):
+        try:
+            return self.first[node]
+        except KeyError:
+            raise TreeError("Nodes are not connected!")
+
+
+    def get_mrca(self, node1, node2):
+        """
+        Returns the mrca of two nodes in O(1).
+        """
+        left = self._get_first(node1)
+        right = self._get_first(node2)
+        if left > right:
+            left, right = right, left
+        return self.euler[self._query(left, right)]
+
+
+    def get_mrca_of(self, nodes):
+        """
+        Returns the mrca of a collection of nodes in O(k). This is the mrca
+        of the nodes visited first and last in the tour, since the nodes
+        in between are in the subtree of their mrca.
+        """
+        positions = [self._get_first(node) for node in nodes]
+        if not positions:
+            raise TreeError("No nodes were entered")
+        return self.euler[self._query(min(positions), max(positions))]
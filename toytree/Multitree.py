@@ -12,8 +12,10 @@ import numpy as np
 
 # used in Consensus
 from .TreeNode import TreeNode
+from .CladeIndex import CladeIndex, get_positions
 from .Toytree import ToyTree
-from .TreeParser import TreeParser
+from .TreeParser import TreeParser, NewickStream, Newick2TreeNode
+from .TreeParser import parse_newicks, open_tree_file, PARSE_CACHE
 from .TreeStyle import TreeStyle
 
 from .StyleChecker import StyleChecker
@@ -36,6 +38,58 @@ TODO:
 
 
 
+def iter_trees(path, tree_format=0, burnin=0, thin=1, lazy_annotations=False):
+    """
+    Generator that parses and yields one ToyTree at a time from a newick
+    or NEXUS file containing many trees (e.g., a posterior sample from 
+    BEAST or MrBayes). Lines are read lazily so memory use does not grow
+    with the number of trees in the file, and NEXUS translate names are
+    applied to each tree as it is parsed.
+
+    Parameters:
+    -----------
+    path: (str or iterable)
+        A file path, or an iterable of lines such as an open file handle.
+        Files compressed with gzip, bzip2 or xz are decompressed as read.
+    tree_format: (int)
+        ete format for newick tree structure. Default is 0.
+    burnin: (int)
+        Number of trees to skip at the start of the file. These are not
+        parsed into trees.
+    thin: (int)
+        Yield only every thin-th tree after the burnin.
+    lazy_annotations: (bool)
+        Keep NHX or MrBayes node annotations as raw strings that are only
+        decoded to features when first accessed.
+    """
+    if thin < 1:
+        raise ToytreeError("thin must be an integer >= 1")
+
+    # a filepath is opened and closed by the generator
+    if isinstance(path, str):
+        with open_tree_file(path) as indata:
+            for tree in iter_trees(
+                indata, tree_format, burnin, thin, lazy_annotations):
+                yield tree
+        return
+
+    # skip burnin and thin newick strings before parsing them
+    stream = NewickStream(path, burnin, thin)
+    for newick in stream:
+        extractor = Newick2TreeNode(
+            newick, tree_format, stream.tdict, lazy_annotations)
+        yield ToyTree(extractor.newick_from_string())
+
+
+
+def build_toytrees(newicks, tree_format=0, names=None, lazy=False):
+    "parse a list of newick strings to ToyTrees, used by worker processes"
+    return [
+        ToyTree(i) for i in parse_newicks(newicks, tree_format, names, lazy)
+    ]
+
+
+
 class MultiTree(object):
     """
     Toytree MultiTree object for representing multiple trees. 
@@ -48,11 +102,29 @@ class MultiTree(object):
         ete format for newick tree structure. Default is 0. 
     fixed_order: (bool, list, None)    
         ...
+    workers: (int, None)
+        Number of processes used to parse newick strings and build the 
+        ToyTrees, in chunks that are returned in input order. Default None 
+        parses on a single core, -1 uses all cores.
+    translate: (bool)
+        NEXUS translate names are applied to nodes as trees are parsed. If 
+        False the translate codes are kept as node names, and the single
+        table of codes to names shared by all trees is stored in .tdict.
+    lazy_annotations: (bool)
+        Keep NHX or MrBayes node annotations as raw strings that are only
+        decoded to features when first accessed.
+    burnin: (int)
+        Number of trees to skip at the start of the input. These are only
+        counted while reading, not parsed.
+    thin: (int)
+        Keep only every thin-th tree after the burnin.
 
     Attributes:
     -----------
     treelist: list
         A list of toytree objects from the parsed newick file. 
+    tdict: dict
+        The NEXUS translate table of codes to names, empty if none.
 
     Functions():
     ------------
@@ -63,17 +135,21 @@ class MultiTree(object):
     draw
         Draws a plot with n x m trees in a grid.
     """
-    def __init__(self, newick, tree_format=0):  # , fixed_order=False):
+    def __init__(
+        self, newick, tree_format=0, workers=None, translate=True, 
+        lazy_annotations=False, burnin=0, thin=1):
 
         # setting attributes
         self.style = TreeStyle('m')
         self._i = 0
+        self.tdict = {}
 
         # parse the newick object into a list of Toytrees
         self.treelist = []
         if isinstance(newick, str):
-            tns = TreeParser(newick, tree_format, multitree=True).treenodes
-            self.treelist = [ToyTree(i) for i in tns]
+            self._parse_newicks(
+                newick, tree_format, workers, translate, lazy_annotations,
+                burnin, thin)
 
         # iterables (list, tuple, ndarray, Series)
         else:
@@ -83,8 +159,9 @@ class MultiTree(object):
 
             # load list whether it is newicks, toytrees or treenodes
             if isinstance(newick[0], str):
-                tns = TreeParser(newick, tree_format, multitree=True).treenodes
-                self.treelist = [ToyTree(i) for i in tns]
+                self._parse_newicks(
+                    newick, tree_format, workers, translate, lazy_annotations,
+                    burnin, thin)
             elif isinstance(newick[0], ToyTree):
                 self.treelist = newick
             elif isinstance(newick[0], TreeNode):
@@ -98,6 +175,49 @@ class MultiTree(object):
         # self._set_tip_order()
         # self._parse_treelist()
 
+
+    def _parse_newicks(
+        self, newick, tree_format, workers, translate, lazy, burnin, thin):
+        """
+        fill treelist from chunks of newick data, on a process pool if 
+        workers > 1, skipping burnin and thinned trees without parsing.
+        """
+        # copy trees parsed earlier if the parse cache is enabled
+        cachekey = PARSE_CACHE.get_key(
+            newick, "multitree", tree_format, translate, lazy, burnin, thin)
+        cached = PARSE_CACHE.get(cachekey)
+        if cached is not None:
+            treelist, self.tdict = cached
+            self.treelist = [i.copy() for i in treelist]
+            return
+
+        parser = TreeParser(
+            newick, tree_format, multitree=True, debug=True, workers=workers,
+            translate=translate, lazy_annotations=lazy, burnin=burnin, 
+            thin=thin)
+        self.treelist = parser.map_newick_chunks(build_toytrees)
+        self.tdict = parser.tdict
+        if cachekey is not None:
+            PARSE_CACHE.put(
+                cachekey, 
+                ([i.copy() for i in self.treelist], dict(self.tdict)))
+
+
+    # trees are pickled as concatenated arrays (e.g., to send to workers)
+    def __getstate__(self):
+        from .TreeArrays import pack_trees
+        state = self.__dict__.copy()
+        state["treelist"] = pack_trees(self.treelist, typed=False)
+        state["styles"] = [i.style for i in self.treelist]
+        return state
+
+    def __setstate__(self, state):
+        from .TreeArrays import unpack_trees
+        styles = state.pop("styles")
+        state["treelist"] = unpack_trees(state["treelist"], styles)
+        self.__dict__.update(state)
+
+
     # attributes of multitrees
     def __len__(self):  
         return len(self.treelist)
@@ -156,6 +276,15 @@ class MultiTree(object):
             # outtre.write(tre.newick + "\n")
 
 
+    def save(self, path):
+        """
+        Save all trees to a compact binary .npz file that can be reloaded
+        as a MultiTree with toytree.load(path).
+        """
+        from .TreeArrays import save
+        save(self, path)
+
+
     def reset_tree_styles(self):
         """
         Sets the .style toytree drawing styles to default for all ToyTrees
@@ -291,7 +420,7 @@ class MultiTree(object):
         axes = grid.axes
 
         # max height of trees in treelist for shared axes
-        maxh = max([t.treenode.height for t in treelist])
+        maxh = max([t._nodes.treenode.height for t in treelist])
 
         # default style 
         if "tip_labels_style" in kwargs:
@@ -647,35 +776,31 @@ class ConsensusTree:
         # dictionary of bits describing all clades in the best tree
         idict = {}
         bitdict = {}
+        index = CladeIndex(self.best_tree.treenode, ndict)
         for node in self.best_tree.treenode.traverse("preorder"):
 
-            # get byte string representing split
-            bits = np.zeros(self.best_tree.ntips, dtype=np.bool_)
-            for child in node.iter_leaf_names():
-                bits[ndict[child]] = True
-            bitstring = bits.tobytes()
+            # get bitset of names representing split
+            bits = index.bits[node]
 
             # record split (mirror image not relevant)
-            bitdict[bitstring] = 0
-            idict[bitstring] = node
+            bitdict[bits] = 0
+            idict[bits] = node
         # print(bitdict)
 
         # count occurrence of clades in best_tree among other trees
         for tidx, ncopies in self.treedict.items():
             tre = self.treelist[tidx].unroot()
+            index = CladeIndex(tre.treenode, ndict)
+            allbits = (1 << tre.ntips) - 1
             # print(tidx)
             for node in tre.treenode.traverse("preorder"):
-                bits = np.zeros(tre.ntips, dtype=np.bool_)
-                for child in node.iter_leaf_names():
-                    bits[ndict[child]] = True
-                bitstring = bits.tobytes()
-                # print(bits.astype(int))
-                if bitstring in bitdict:
-                    bitdict[bitstring] += ncopies
+                bits = index.bits[node]
+                if bits in bitdict:
+                    bitdict[bits] += ncopies
                 else:
-                    revstring = np.invert(bits).tobytes()
-                    if revstring in bitdict:
-                        bitdict[revstring] += ncopies
+                    revbits = allbits ^ bits
+                    if revbits in bitdict:
+                        bitdict[revbits] += ncopies
             # print("")
 
         # convert to frequencies
@@ -699,24 +824,25 @@ class ConsensusTree:
             # testing on unrooted trees is easiest but for some reason slow
             ttree = self.treelist[tidx].unroot()
 
+            # bitsets of names in the clade of every node
+            index = CladeIndex(ttree.treenode, ndict)
+            allbits = (1 << len(ttree)) - 1
+
             # traverse over tree
             for node in ttree.treenode.traverse('preorder'):
-                bits = np.zeros(len(ttree), dtype=np.bool_)
-                for child in node.iter_leaf_names():
-                    bits[ndict[child]] = True
 
-                # get bit string and its reverse
-                bitstring = bits.tobytes()
-                revstring = np.invert(bits).tobytes()
+                # get bitset and its reverse
+                bits = index.bits[node]
+                revbits = allbits ^ bits
 
                 # add to clades first time, then check for inverse next hits
-                if bitstring in clade_counts:
-                    clade_counts[bitstring] += ncopies
+                if bits in clade_counts:
+                    clade_counts[bits] += ncopies
                 else:
-                    if revstring not in clade_counts:
-                        clade_counts[bitstring] = ncopies
+                    if revbits not in clade_counts:
+                        clade_counts[bits] = ncopies
                     else:
-                        clade_counts[revstring] += ncopies
+                        clade_counts[revbits] += ncopies
 
         # convert to freq
         for key, val in clade_counts.items():
@@ -733,30 +859,26 @@ class ConsensusTree:
     def filter_clades(self):
         "Remove conflicting clades and those < cutoff to get majority rule"
         passed = []
-        carrs = np.array([list(i[0]) for i in self.clade_counts], dtype=int)
-        freqs = np.array([i[1] for i in self.clade_counts])
-
-        for idx in range(carrs.shape[0]):
+        rclades = []
+        for clade, freq in self.clade_counts:
             conflict = False
-            if freqs[idx] < self.cutoff:
+            if freq < self.cutoff:
                 continue
 
-            for pidx in passed:
-                intersect = np.max(carrs[idx] + carrs[pidx]) > 1
+            for pclade in passed:
+                intersect = clade & pclade
 
                 # is either one a subset of the other?
-                subset_test0 = np.all(carrs[idx] - carrs[pidx] >= 0)
-                subset_test1 = np.all(carrs[pidx] - carrs[idx] >= 0)
+                subset_test0 = not (pclade & ~clade)
+                subset_test1 = not (clade & ~pclade)
                 if intersect:
                     if (not subset_test0) and (not subset_test1):
                         conflict = True
+                        break
 
             if not conflict:
-                passed.append(idx)
-
-        rclades = []
-        for idx in passed:
-            rclades.append((carrs[idx], freqs[idx]))
+                passed.append(clade)
+                rclades.append((clade, freq))
         self.fclade_counts = rclades
 
 
@@ -765,14 +887,12 @@ class ConsensusTree:
 
         # storage
         nodes = {}
-        idxarr = np.arange(len(self.fclade_counts[0][0]))
         queue = []
 
         # create dict of clade counts and set keys
         countdict = defaultdict(int)
         for clade, count in self.fclade_counts:
-            mask = np.int_(list(clade)).astype(np.bool)
-            ccx = idxarr[mask]
+            ccx = get_positions(clade)
             queue.append((len(ccx), frozenset(ccx)))
             countdict[frozenset(ccx)] = count
 
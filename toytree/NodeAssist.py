@@ -50,24 +50,37 @@ class NodeAssist:
             if isinstance(self.names, (str, int)):
                 self.names = [self.names]
 
-            # report any names entered that seem like typos
-            bad = [i for i in self.names if i not in self.ttree.get_tip_labels()]
+            # select *nodes* that match these names from the name index, 
+            # and report any names entered that seem like typos
+            index = self.ttree._nodes.treenode._get_name_index()
+            tips = []
+            bad = []
+            for name in set(self.names):
+                matched = [i for i in index.get(name, ()) if i.is_leaf()]
+                if matched:
+                    tips.extend(matched)
+                else:
+                    bad.append(name)
             if any(bad):
+                bad = [i for i in self.names if i in bad]
                 raise ToytreeError(
                     "Sample {} is not in the tree".format(bad))
 
-            # select *nodes* that match these names
-            tips = [
-                i for i in self.ttree.treenode.get_leaves() 
-                if i.name in self.names
-            ]
+            # in tip order (get_leaves), unless idxs are not yet updated
+            if self.ttree._pending_update:
+                tips = set(tips)
+                tips = [
+                    i for i in self.ttree._nodes.treenode.get_leaves() if i in tips
+                ]
+            else:
+                tips.sort(key=lambda x: x.idx, reverse=True)
 
         # use regex to match tipnames
         elif self.regex:
 
             # select *nodes* that regex match. Raise error if None.
             tips = [
-                i for i in self.ttree.treenode.get_leaves() 
+                i for i in self.ttree._nodes.treenode.get_leaves() 
                 if re.match(self.regex, i.name)
             ]               
             if not any(tips):
@@ -78,7 +91,7 @@ class NodeAssist:
 
             # select *nodes* that match the wildcard search
             tips = [
-                i for i in self.ttree.treenode.get_leaves()
+                i for i in self.ttree._nodes.treenode.get_leaves()
                 if self.wildcard in i.name
             ]
             if not any(tips):
@@ -95,7 +108,7 @@ class NodeAssist:
 
     def match_reciprocal(self):
         # get new query names list
-        alltips = set(self.ttree.get_tip_labels())
+        alltips = set(self.ttree._nodes.treenode.get_leaf_names())
         query_tips = set(self.tipnames)
         other_tips = list(alltips - query_tips)
 
@@ -114,7 +127,7 @@ class NodeAssist:
 
     def get_mrca(self):
         if len(self.nodes) > 1:
-            return self.ttree.treenode.get_common_ancestor(self.nodes)
+            return self.ttree._nodes.treenode.get_common_ancestor(self.nodes)
         return self.nodes[0]
 
     def get_mrca_leaves(self):
@@ -129,7 +142,7 @@ class NodeAssist:
             return True
 
         mbool, mtype, mnames = (
-            self.ttree.treenode.check_monophyly(
+            self.ttree._nodes.treenode.check_monophyly(
                 self.tipnames, "name", ignore_missing=True)
         )
         return mbool
@@ -8,6 +8,7 @@ import os
 import time
 import numpy as np
 import toytree
+from .utils import ToytreeError
 
 
 
@@ -62,12 +63,23 @@ def VCV(tree):
     Return the variance co-variance metrix representing the tree topology.
     """
     vcv_ = np.zeros((tree.ntips,tree.ntips))
-    labs = tree.get_tip_labels()
-    for lab1 in range(tree.ntips):
-        for lab2 in range(tree.ntips):
-            mrca_idx = tree.get_mrca_idx_from_tip_labels([labs[lab1],labs[lab2]])
-            mrca_height = tree.treenode.search_nodes(idx=mrca_idx)[0].height
-            vcv_[lab1, lab2] = tree.treenode.height - mrca_height
+
+    # rows are in tip label order, which is tip idx order. Each pair of
+    # tips shares the distance from the root to their mrca; every pair 
+    # is set once at the node where tips from two child clades meet.
+    treenode = tree._nodes.treenode
+    heights = treenode._get_heights()
+    treeheight = heights[treenode]
+    clades = treenode.get_cached_content("idx", list)
+    for node, tips in clades.items():
+        shared = treeheight - heights[node]
+        if not node.children:
+            vcv_[tips[0], tips[0]] = shared
+        for cidx, child1 in enumerate(node.children):
+            for child2 in node.children[cidx + 1:]:
+                pairs = np.ix_(clades[child1], clades[child2])
+                vcv_[pairs] = shared
+                vcv_.T[pairs] = shared
     return(vcv_)
 
 
@@ -87,95 +99,81 @@ def PIC(tree, feature):
 
     Returns
     -------
-    toytree (Toytree.ToyTree)
-        A modified copy of the input tree is returned with the mean ancestral
-        value for the selected feature inferred for all nodes of the tree. 
+    dict
+        Mapping of internal nodes to tuples containing ancestral state, 
+        its variance (error), the contrast, and the contrasts's variance.
     """
-    # get current node features at the tips
-    fdict = tree.get_feature_dict(key_attr="name", values_attr=feature)
-    data = {i: j for (i, j) in fdict.items() if i in tree.get_tip_labels()}
-
-    # apply dynamic function from ivy to return dict results
-    results = dynamicPIC(tree.treenode, data, results={})
+    # current node features at the tips and edge lengths, by idx
+    idx_dict = tree.idx_dict
+    nnodes = tree.nnodes
+    dists = np.array([idx_dict[i].dist for i in range(nnodes)], dtype=float)
+    states = np.zeros(nnodes, dtype=float)
+    states[:tree.ntips] = [
+        getattr(idx_dict[i], feature) for i in range(tree.ntips)]
+
+    # the variance of tips is their dist, and of internal nodes is added
+    variances = dists.copy()
+    contrasts = np.zeros(nnodes, dtype=float)
+    cvariances = np.zeros(nnodes, dtype=float)
+
+    # calculate independent contrasts of all bifurcating nodes at each
+    # depth, children are done before their parents.
+    levels = tree._coords.get_levels()
+    for children, starts, sizes, parents in levels.iter_groups_up():
+        if np.any(sizes != 2):
+            raise ToytreeError(
+                "independent contrasts require a bifurcating tree")
+
+        # Xi - Xj is the contrast value, vi + vj is the contrast variance
+        Xi = states[children[starts]]
+        Xj = states[children[starts + 1]]
+        vi = variances[children[starts]]
+        vj = variances[children[starts + 1]]
+        contrasts[parents] = Xi - Xj
+        cvariances[parents] = vi + vj
+
+        # Xk is the reconstructed state at the node, vk is the variance
+        states[parents] = (
+            ((1.0 / vi) * Xi + (1 / vj) * Xj) / (1.0 / vi + 1.0 / vj))
+        variances[parents] = dists[parents] + (vi * vj) / (vi + vj)
 
     # return dictionary mapping nodes to (mean, var, contrast, cvar)
-    return results
-
-
-
-def dynamicPIC(node, data, results):
-    """
-    Phylogenetic independent contrasts. Recursively calculate 
-    independent contrasts of a bifurcating node given a dictionary
-    of trait values.
-
-    Modified from IVY interactive (https://github.com/rhr/ivy/)
-
-    Args:
-        node (Node): A node object
-        data (dict): Mapping of leaf names to character values
-    Returns:
-        dict: Mapping of internal nodes to tuples containing ancestral
-              state, its variance (error), the contrast, and the
-              contrasts's variance.
-    TODO: modify to accommodate polytomies.
-    """    
-    X = []
-    v = []
-
-    # recursively does children until X and v are full
-    for child in node.children:
-
-        # child has children, do those first
-        if child.children:
-
-            # update results dict with children values
-            dynamicPIC(child, data, results)
-            child_results = results[child]
-
-            # store childrens values
-            X.append(child_results[0])
-            v.append(child_results[1])
+    results = zip(
+        states.tolist(), variances.tolist(), 
+        contrasts.tolist(), cvariances.tolist())
+    return {
+        idx_dict[idx]: res for (idx, res) in enumerate(results)
+        if idx >= tree.ntips
+    }
 
-        # no child of child, so just do child
-        else:
-            X.append(data[child.name])
-            v.append(child.dist)
 
-    # Xi - Xj is the contrast value
-    Xi, Xj = X  
 
-    # vi + vj is the contrast variance
-    vi, vj = v
-
-    # Xk is the reconstructed state at the node
-    Xk = ((1.0 / vi) * Xi + (1 / vj) * Xj) / (1.0 / vi + 1.0 / vj)
-
-    # vk is the variance
-    vk = node.dist + (vi * vj) / (vi + vj)
+def calculate_ES(tree):
+    "Return DataFrame with equal splits measure sensu Redding and Mooers 2006"
+    # not yet adding pandas as a global dependency
+    import pandas as pd
 
-    # store in dictionary and 
-    results[node] = (Xk, vk, Xi - Xj, vi + vj)
-    return results
+    # dataframe for storing results
+    return pd.DataFrame(
+        {"DR": get_equal_splits(tree)[:tree.ntips]},
+        index=tree.get_tip_labels(),
+    )
 
 
 
-def calculate_ES(tree):
-    "Return DataFrame with equal splits measure sensu Redding and Mooers 2006"
-    # dataframe for storing results
-    df = pd.DataFrame(columns=["DR"], index=tree.get_tip_labels())
-
-    # traverse up to root from each tip
-    for idx in range(tree.ntips):
-        node = tree.idx_dict[idx]
-        DR = 0
-        j = 1
-        while node.up:
-            DR += node.up.dist / (2 ** j)
-            node = node.up
-            j += 1
-        df.iloc[idx, 0] = DR
-    return df
+def get_equal_splits(tree):
+    """
+    Returns an array with the equal splits measure of every node in idx
+    order: the sum of the dists of its ancestors each divided by 2 to the
+    number of edges to the ancestor. It is filled from the root to the 
+    tips as the mean of the measure and the dist of the parent.
+    """
+    idx_dict = tree._nodes.idx_dict
+    dists = np.array(
+        [idx_dict[i].dist for i in range(tree.nnodes)], dtype=float)
+    updists = np.zeros(tree.nnodes, dtype=float)
+    updists[:-1] = dists[tree.get_edges()[:, 0]]
+    return tree.propagate_down(updists, lambda up, dist: (up + dist) / 2)
 
 
 
@@ -206,9 +206,10 @@ class RandomTree(object):
                 node.dist /= (2. * ne)
 
         # ensure tips are at zero (they sometime vary just slightly)
+        heights = self.treenode._get_heights()
         for node in self.treenode.traverse():
             if node.is_leaf():
-                node.dist += node.height
+                node.dist += heights[node]
 
         # set tipnames to r{idx}
         nidx = list(range(self.ntips))
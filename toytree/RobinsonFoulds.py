@@ -6,6 +6,7 @@ Robinson-Foulds Distance Calculations modified from ete3 TreeNode subfunction.
 
 from __future__ import print_function
 from .utils import TreeError
+from .CladeIndex import CladeIndex, get_positions
 # from .TreeParser import TreeParser
 
 
@@ -43,6 +44,7 @@ class RobinsonFoulds(object):
         # to be updated
         self.polytomy_correction = 0
         self.common_attrs = set()
+        self.common_order = {}
         self.t1s = []
         self.t2s = []
         self.min_comparison = None
@@ -83,6 +85,11 @@ class RobinsonFoulds(object):
         )
         self.common_attrs = set(attrs_t1) & set(attrs_t2)
 
+        # bit positions of common attrs for the bitsets of clades
+        self.common_order = {
+            j: i for i, j in enumerate(sorted(self.common_attrs))
+        }
+
         # Check for duplicated items (is this necessary?)
         size1 = sum((
             1 for i in self.t1.iter_leaves() if 
@@ -149,64 +156,56 @@ class RobinsonFoulds(object):
                 self.polytomy_correction = max((corr1, corr2))
 
 
-    def get_edges(self, tx_content, tx_leaves, attr):
-
+    def get_edges(self, tx_index, tx_leaves):
+        """
+        Returns the set of edges of a tree as bitsets of the common attrs
+        (see common_order) of tips in each clade, or as sorted pairs of 
+        bitsets for the two sides of each split for unrooted trees.
+        """
         if self.unrooted_trees:
             edges = set()
-            for content in tx_content.values():  
-                    
-                # get name from nodes if they have a name and its in common
-                names1 = tuple(sorted(
-                    getattr(node, attr) for node in content if 
-                    (
-                        hasattr(node, attr) and \
-                        (getattr(node, attr) in self.common_attrs)
-                    )
-                ))
-
-                # get names of all leaves minus this node's descendants
-                names2 = tuple(sorted(
-                    getattr(node, attr) for node in tx_leaves - content if 
-                    (
-                        hasattr(node, attr) and \
-                        (getattr(node, attr) in self.common_attrs)
-                    )
-                ))
+            for content in tx_index.bits.values():
+                # names of this node's descendants and of all other leaves
+                names1 = content
+                names2 = tx_leaves & ~content
 
                 # add the split to the edges set
                 edges.add(tuple(sorted(set([names1, names2]))))
-            edges.discard(((), ()))
+            edges.discard((0, 0))
 
-        # get edges of a rooted tree: just tuples of tips descended
+        # get edges of a rooted tree: just bitsets of tips descended
         else:
-            edges = set()
-            for content in tx_content.values():
-                names1 = tuple(sorted(
-                    getattr(node, attr) for node in content if 
-                    (
-                        hasattr(node, attr) and \
-                        (getattr(node, attr) in self.common_attrs)
-                    )
-                ))
-                edges.add(tuple(sorted(set(names1))))
-            edges.discard(())
+            edges = set(tx_index.bits.values())
+            edges.discard(0)
         return edges
 
 
-    def get_support_dict(self, tx_content, attr):
+    def get_support_dict(self, tx, tx_index):
         cdict = {}
-        for branch, content in tx_content.items():
-            key = tuple(sorted(
-                getattr(node, attr) for node in content if 
-                (
-                    hasattr(node, attr) and \
-                    (getattr(node, attr) in self.common_attrs)
-                )
-            ))
-            cdict[key] = branch.support
+        for branch in tx.traverse("postorder"):
+            cdict[tx_index.bits[branch]] = branch.support
         return cdict
 
 
+    def get_names(self, edges):
+        """
+        Returns edges (or discarded edges) as sorted tuples of the names
+        of tips (common attrs) instead of bitsets.
+        """
+        names = sorted(self.common_attrs)
+        if self.unrooted_trees:
+            return set(
+                tuple(sorted(set(
+                    tuple(names[i] for i in get_positions(bits)) 
+                    for bits in split
+                )))
+                for split in edges
+            )
+        return set(
+            tuple(names[i] for i in get_positions(bits)) for bits in edges
+        )
+
+
     def get_discards(self, t1_edges, t1_sdict, t2_edges, t2_sdict):
 
         # initial empty
@@ -253,35 +252,35 @@ class RobinsonFoulds(object):
         Iterate over trees in t1 and t2 to count splits present in both
         """
         for t1 in self.t1s:
-            # a dictionary of {node: node.get_leaves()}
-            t1_content = t1.get_cached_content()
+            # bitsets of the common attrs of tips in each clade
+            t1_index = CladeIndex(t1, self.common_order, self.attr_t1)
 
-            # a list of nodes descended from this one: [node0, node1, node2]
-            t1_leaves = t1_content[t1]
+            # bitset of all tips
+            t1_leaves = t1_index.bits[t1]
             
-            # get edges of the tree: set of tuples on either side of splits
-            t1_edges = self.get_edges(t1_content, t1_leaves, self.attr_t1)
+            # get edges of the tree: set of bitsets on either side of splits
+            t1_edges = self.get_edges(t1_index, t1_leaves)
 
             # get support on tree ...
             t1_sdict = None
             if self.min_support_t1:
-                t1_sdict = self.get_support_dict(t1_content, self.attr_t1)
+                t1_sdict = self.get_support_dict(t1, t1_index)
 
             # iterate over target trees
             for t2 in self.t2s:
-                # a dictionary of {node: node.get_leaves()}
-                t2_content = t2.get_cached_content()
+                # bitsets of the common attrs of tips in each clade
+                t2_index = CladeIndex(t2, self.common_order, self.attr_t2)
                 
-                # nodes descended from this one: [node0, node1, node2, ...]
-                t2_leaves = t2_content[t2]
+                # bitset of all tips
+                t2_leaves = t2_index.bits[t2]
 
-                # get edges of the tree: set of tuples on either side of splits
-                t2_edges = self.get_edges(t2_content, t2_leaves, self.attr_t2)
+                # get edges of the tree: set of bitsets on either side of splits
+                t2_edges = self.get_edges(t2_index, t2_leaves)
 
                 # get support dict
                 t2_sdict = None
                 if self.min_support_t2:
-                    t2_sdict = self.get_support_dict(t2_content, self.attr_t2)
+                    t2_sdict = self.get_support_dict(t2, t2_index)
 
                 # if support constraint, discard lowly supported splits
                 discard_t1, discard_t2 = self.get_discards(
@@ -316,10 +315,10 @@ class RobinsonFoulds(object):
                         rf, 
                         max_parts, 
                         self.common_attrs, 
-                        t1_edges, 
-                        t2_edges, 
-                        discard_t1, 
-                        discard_t2,
+                        self.get_names(t1_edges), 
+                        self.get_names(t2_edges), 
+                        self.get_names(discard_t1), 
+                        self.get_names(discard_t2),
                     ]
 
         return min_comparison
\ No newline at end of file
@@ -27,7 +27,7 @@ class Rooter:
         self.nnode = None
 
         # make a copy and ensure supports are either all int or float
-        self.maxsup = max([int(i.support) for i in self.tree.treenode.traverse()])
+        self.maxsup = max([int(i.support) for i in self.tree._nodes.treenode.traverse()])
         self.maxsup = (1.0 if self.maxsup <= 1.0 else 100)
         self.get_features()
 
@@ -73,14 +73,14 @@ class Rooter:
             node.up = self.tdict[node][0]
             node.children = self.tdict[node][1]
             for key, val in self.tdict[node][2].items():
-                setattr(node, key, val)
+                node.add_feature(key, val)
 
 
     def update(self):
         # update coordinates which updates idx and adds it to any new nodes.
-        self.tree.treenode = self.nnode
-        self.tree.treenode.ladderize()
-        self.tree._coords.update()
+        self.tree._set_nodes(self.nnode)
+        self.tree._nodes.treenode.ladderize()
+        self.tree._update_after_edit()
 
 
 
@@ -230,9 +230,9 @@ class Rooter:
 
         """
         # the new root node to be placed on the split
-        self.nnode = self.tree.treenode.__class__()
+        self.nnode = self.tree._nodes.treenode.__class__()
         self.nnode.name = "root"
-        self.nnode.add_feature("idx", self.tree.treenode.idx)
+        self.nnode.add_feature("idx", self.tree._nodes.treenode.idx)
         self.nnode.support = self.maxsup
 
         # remove node1 lineage leaving just node2 branch to be made into child
@@ -261,7 +261,7 @@ class Rooter:
     def get_features(self):
         # define which features to use/keep on nodes and which are "edge" 
         # features which must be redirected on rooting.
-        testnode = self.tree.treenode.get_leaves()[0]
+        testnode = self.tree._nodes.treenode.get_leaves()[0]
         extrafeat = {i for i in testnode.features if i not in self.features}
         self.features.update(extrafeat)
 
@@ -319,9 +319,10 @@ class StyleChecker:
 
             # build list of hoverstrings in order of idxs
             self.style.node_hover = [" "] * self.ttree.nnodes
-            for idx in self.ttree.idx_dict:
+            idx_dict = self.ttree._nodes.idx_dict
+            for idx in idx_dict:
                 feats = []
-                node = self.ttree.idx_dict[idx]
+                node = idx_dict[idx]
                 for feature in ordered_features:
                     val = getattr(node, feature)
                     if isinstance(val, float):
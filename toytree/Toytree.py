@@ -2,22 +2,24 @@
 
 from __future__ import print_function, absolute_import
 
-import itertools
 from decimal import Decimal
 from copy import copy
+from contextlib import contextmanager
+from weakref import WeakSet
 import numpy as np
 
 from .TreeNode import TreeNode
 from .TreeStyle import TreeStyle, COLORS2
 from .StyleChecker import StyleChecker
 from .Coords import Coords
-from .TreeParser import TreeParser, FastTreeParser
+from .TreeParser import TreeParser, FastTreeParser, PARSE_CACHE
 from .TreeWriter import NewickWriter
 from .Treemod import TreeMod
 from .PCM import PCM
 from .Rooter import Rooter
 from .NodeAssist import NodeAssist
-from .utils import ToytreeError, fuzzy_match_tipnames, normalize_values
+from .FeatureTable import FeatureTable, is_column_feature
+from .utils import ToytreeError, fuzzy_match_tipnodes, normalize_values
 from .Render import ToytreeMark
 from .CanvasSetup import CanvasSetup
 
@@ -43,6 +45,11 @@ class ToyTree(object):
     tree_format: int
         Format of the newick tree structure to be parsed. 
 
+    lazy_annotations: bool
+        Keep NHX or MrBayes node annotations as raw strings on nodes that
+        are only decoded to features when first accessed (e.g., by 
+        get_node_values or node attribute access). Default is False.
+
     Attributes:
     -----------
     ...
@@ -51,11 +58,16 @@ class ToyTree(object):
     ----------
     ...
     """
-    def __init__(self, newick=None, tree_format=0, **kwargs):
+    def __init__(
+        self, newick=None, tree_format=0, lazy_annotations=False, **kwargs):
 
         # if loading from a Toytree then inherit that trees draw style
         inherit_style = False
 
+        # edits are applied in place and updates deferred in a batch_edit
+        self._batch = False
+        self._pending_update = False
+
         # load from a TreeNode and detach. Must have .idx attributes on nodes.
         if isinstance(newick, TreeNode):
             self.treenode = newick.detach()
@@ -65,13 +77,21 @@ class ToyTree(object):
             self.treenode = newick.treenode
             inherit_style = True
 
-        # parse a str, URL, or file
+        # parse a str, URL, or file, or copy it from the parse cache
         elif isinstance(newick, (str, bytes)):
-            self.treenode = TreeParser(newick, tree_format).treenodes[0]
+            cachekey = PARSE_CACHE.get_key(
+                newick, "tree", tree_format, lazy_annotations)
+            cached = PARSE_CACHE.get(cachekey)
+            if cached is not None:
+                self._set_from_copy(cached)
+                return
+            self._set_nodes(TreeParser(
+                newick, tree_format, lazy_annotations=lazy_annotations,
+            ).treenodes[0])
 
         # make an empty tree
         else:
-            self.treenode = TreeNode()
+            self._set_nodes(TreeNode())
 
         # init dimensions and cache to be filled during coords update
         self.nnodes = 0
@@ -88,7 +108,7 @@ class ToyTree(object):
 
         # ladderize the tree unless user fixed order and wants it not.
         # if not self._fixed_order:
-        self.treenode.ladderize()
+        self._nodes.treenode.ladderize()
 
         # Object for storing default plot settings or saved styles.
         # Calls several update functions when self.draw() to fit canvas.
@@ -102,9 +122,118 @@ class ToyTree(object):
         self._coords.update()
         # if not kwargs.get("copy"):
 
-        # Object for modifying trees beyond root, prune, drop
-        self.mod = TreeMod(self)
-        self.pcm = PCM(self)
+        # store a private copy if parse caching is enabled
+        if isinstance(newick, (str, bytes)) and cachekey is not None:
+            PARSE_CACHE.put(cachekey, self.copy())
+
+
+    def _set_from_copy(self, tree):
+        "become a copy of a ToyTree, sharing its nodes until they are used"
+        self._share_nodes(tree)
+        self.nnodes = tree.nnodes
+        self.ntips = tree.ntips
+        self.style = tree.style.copy()
+        self._coords = Coords(self)
+        self._coords.update_from_copy(tree._coords)
+
+
+    def __getstate__(self):
+        """
+        Pickles the tree as arrays of node data in idx order and its style
+        instead of the graph of TreeNodes, which is compact, fast, and 
+        does not recurse through nodes so that deep trees are safe. Lazy
+        annotations are kept raw.
+        """
+        from .TreeArrays import tree_to_arrays
+        return {
+            "arrays": tree_to_arrays(self, decode=False), 
+            "style": self.style,
+        }
+
+
+    def __setstate__(self, state):
+        "rebuild nodes and coords from the arrays"
+        from .TreeArrays import set_tree_from_arrays
+        set_tree_from_arrays(self, state["arrays"], state["style"])
+
+
+    # Objects for modifying trees beyond root, prune, drop, and for 
+    # comparative methods. These are made on access instead of stored on
+    # the tree so that the tree is not part of a reference cycle.
+    @property
+    def mod(self):
+        return TreeMod(self)
+
+    @property
+    def pcm(self):
+        return PCM(self)
+
+
+    # --------------------------------------------------------------------
+    # Copies of a tree share its nodes until the nodes are exposed by 
+    # .treenode or .idx_dict, which return nodes that can be modified (or
+    # kept and modified later). These first clone the nodes if they are
+    # shared with another copy (copy-on-write) and mark them as exposed. 
+    # A tree with exposed nodes is copied by cloning them, so that nodes
+    # referenced before a copy never reach the copy. Functions in toytree
+    # that only read nodes, or edit nodes of a tree they own, use 
+    # ._nodes.treenode and ._nodes.idx_dict instead.
+    # --------------------------------------------------------------------
+    @property
+    def treenode(self):
+        self._apply_pending_update()
+        self._own_nodes()
+        self._nodes.exposed = True
+        return self._nodes.treenode
+    @treenode.setter
+    def treenode(self, value):
+        self._set_nodes(value)
+        self._nodes.exposed = True
+
+    @property
+    def idx_dict(self):
+        self._apply_pending_update()
+        self._own_nodes()
+        self._nodes.exposed = True
+        return self._nodes.idx_dict
+    @idx_dict.setter
+    def idx_dict(self, value):
+        self._own_nodes()
+        self._nodes.idx_dict = value
+
+
+    def _set_nodes(self, treenode, idx_dict=None):
+        "use new nodes that are not referenced outside of toytree"
+        self._nodes = SharedNodes(
+            treenode, {} if idx_dict is None else idx_dict)
+        self._nodes.trees.add(self)
+
+
+    def _share_nodes(self, tree):
+        """
+        use the nodes of another tree until either tree exposes them, or a
+        clone of them if they were already exposed.
+        """
+        if tree._nodes.exposed:
+            self._nodes = tree._nodes.clone()
+            self._nodes.trees.add(self)
+        else:
+            self._nodes = tree._nodes
+            self._nodes.trees.add(tree)
+            self._nodes.trees.add(self)
+
+
+    def _own_nodes(self):
+        """
+        Clones the nodes (and idx_dict) if they are shared with any other
+        existing copy of this tree, so that they can be modified.
+        """
+        shared = self._nodes
+        shared.trees.add(self)
+        if len(shared.trees) > 1:
+            shared.trees.discard(self)
+            self._nodes = shared.clone()
+            self._nodes.trees.add(self)
 
     # --------------------------------------------------------------------
     # Class definitions 
@@ -112,11 +241,11 @@ class ToyTree(object):
     # ... could add __repr__, __iter__, __next__, but .tree has most already
     def __str__(self):
         """ return ascii tree ... (not sure whether to keep this) """
-        return self.treenode.__str__()
+        return self._nodes.treenode.__str__()
 
     def __len__(self):
         """ return len of Tree (ntips) """
-        return len(self.treenode)
+        return len(self._nodes.treenode)
 
 
     # def _set_fixed_order(self, fixed_order):
@@ -137,33 +266,43 @@ class ToyTree(object):
     # --------------------------------------------------------------------    
     @property
     def features(self):
-        feats = set()
-        for node in self.treenode.traverse():
-            feats.update(node.features)    
-        return feats
-
-    # @property
-    # def nnodes(self):
-    #     "The total number of nodes in the tree including tips and root."
-    #     return self._nnodes
-    #     # return sum(1 for i in self.treenode.traverse())
-
-    # @property
-    # def ntips(self):
-    #     "The number of tip nodes in the tree."
-    #     return self._ntips
-    #     # return sum(1 for i in self.treenode.get_leaves())
+        """
+        The set of node feature names, which can also be indexed by name
+        to get or set feature values of all nodes as arrays (see 
+        FeatureTable).
+        """
+        return FeatureTable(self)
+
+    # nnodes and ntips are set by Coords updates, and first apply an
+    # update deferred in a batch_edit so that they are never out of date.
+    @property
+    def nnodes(self):
+        "The total number of nodes in the tree including tips and root."
+        self._apply_pending_update()
+        return self._nnodes
+    @nnodes.setter
+    def nnodes(self, value):
+        self._nnodes = value
+
+    @property
+    def ntips(self):
+        "The number of tip nodes in the tree."
+        self._apply_pending_update()
+        return self._ntips
+    @ntips.setter
+    def ntips(self, value):
+        self._ntips = value
 
     @property
     def newick(self, tree_format=0):
         "Returns newick represenation of the tree in its current state."
         # checks one of root's children for features and extra feats.
-        if self.treenode.children:
+        if self._nodes.treenode.children:
             features = {"name", "dist", "support", "height", "idx"}
-            testnode = self.treenode.children[0]
+            testnode = self._nodes.treenode.children[0]
             extrafeat = {i for i in testnode.features if i not in features}
             features.update(extrafeat)
-            return self.treenode.write(format=tree_format)
+            return self._nodes.treenode.write(format=tree_format)
 
     # --------------------------------------------------------------------
     # functions to return values from the ete3 .treenode object ----------
@@ -185,7 +324,8 @@ class ToyTree(object):
             you may have saved to treenodes. 
 
         """
-        if self.treenode.children:
+        self._apply_pending_update()
+        if self._nodes.treenode.children:
             # features = {"name", "dist", "support", "height", "idx"}
             # testnode = self.treenode.children[0]
             # extrafeat = {i for i in testnode.features if i not in features}
@@ -193,7 +333,7 @@ class ToyTree(object):
 
             # get newick string
             writer = NewickWriter(
-                treenode=self.treenode,
+                treenode=self._nodes.treenode,
                 tree_format=tree_format,
                 features=features,
                 dist_formatter=dist_formatter,
@@ -212,9 +352,77 @@ class ToyTree(object):
         """
         Returns an array with paired edges (parent, child).
         """
+        self._apply_pending_update()
         return self._coords.edges
 
 
+    def get_traversal_idxs(self, strategy="levelorder"):
+        """
+        Returns an array of node idxs in the order of a 'preorder', 
+        'postorder' or 'levelorder' traversal of the tree, the same order
+        as .treenode.traverse(strategy). The arrays are cached until the
+        tree is modified and are read-only. They can be used with arrays
+        ordered by idx (e.g., .get_node_coordinates()) to write vectorized
+        functions, e.g., a postorder visits children before parents.
+        """
+        if strategy not in ("preorder", "postorder", "levelorder"):
+            raise ToytreeError(
+                "strategy must be 'preorder', 'postorder' or 'levelorder'")
+        self._apply_pending_update()
+        return self._coords.get_orders()[strategy]
+
+
+    def get_node_depths(self):
+        """
+        Returns a read-only array of the number of edges from the root to
+        each node, ordered by node idx. The root depth is 0.
+        """
+        self._apply_pending_update()
+        return self._coords.get_orders()["depths"]
+
+
+    def reduce_up(self, values, op=np.add, weights=None):
+        """
+        Returns an array of values filled from the tips to the root in one
+        vectorized pass over the nodes at each depth of the tree. The tip
+        values are kept and each internal node gets op applied over the
+        values of its children (plus their weights, if entered). op is a
+        numpy ufunc, e.g., np.add, np.maximum or np.logical_or, or np.mean.
+        Arrays have one value per node ordered by idx, and the values of
+        internal nodes are not used.
+
+        Examples:
+        ---------
+        # number of tips descended from each node
+        ntips = tre.reduce_up(np.ones(tre.nnodes, dtype=int))
+
+        # number of edges to the farthest tip
+        nedges = tre.reduce_up(
+            np.zeros(tre.nnodes, dtype=int), np.maximum, np.ones(tre.nnodes))
+        """
+        self._apply_pending_update()
+        return self._coords.get_levels().reduce_up(values, op, weights)
+
+
+    def propagate_down(self, values, op=np.add):
+        """
+        Returns an array of values filled from the root to the tips in one
+        vectorized pass over the nodes at each depth of the tree. The root
+        value is kept and each other node gets op(parent value, its value).
+        op is a numpy ufunc or any elementwise function of two arrays.
+        Arrays have one value per node ordered by idx.
+
+        Examples:
+        ---------
+        # distance from the root to each node, excluding the root dist
+        dists = tre.features["dist"][::-1]
+        dists[-1] = 0
+        toroot = tre.propagate_down(dists)
+        """
+        self._apply_pending_update()
+        return self._coords.get_levels().propagate_down(values, op)
+
+
     # def get_edge_lengths(self):
     #     """
     #     Returns edge length values from tree object in node plot order. To
@@ -237,12 +445,11 @@ class ToyTree(object):
             makes it easier to visualize when plotted as node sizes or edge
             widths. In the range(2, 12) typically.
         """
+        self._apply_pending_update()
         elist = []
-        for eidx in self._coords.edges[:, 1]:
-            node = self.idx_dict[eidx]
-            elist.append(
-                (getattr(node, feature) if hasattr(node, feature) else "")
-            )
+        idx_dict = self._nodes.idx_dict
+        for eidx in self._coords.edges[:, 1].tolist():
+            elist.append(getattr(idx_dict[eidx], feature, ""))
         elist = np.array(elist)
         if normalize:
             elist = normalize_values(elist)
@@ -284,6 +491,7 @@ class ToyTree(object):
           # ['green', 'green', 'green', 'red', 'red', 'red']
 
         """
+        self._apply_pending_update()
         values = [None] * self._coords.edges.shape[0]
         if node_mapping is None:
             return values
@@ -305,8 +513,8 @@ class ToyTree(object):
                 rmap[kidx] = node_mapping[key]
 
         # ....
-        for idx in self.idx_dict:
-            node = self.idx_dict[idx]
+        for idx in self._nodes.idx_dict:
+            node = self._nodes.idx_dict[idx]
             if idx in rmap:
 
                 # add value to stem edge
@@ -337,6 +545,7 @@ class ToyTree(object):
         for the clade that includes the selected tips. Arguments can use fuzzy
         name matching: a list of tip names, wildcard selector, or regex string.
         """
+        self._apply_pending_update()
         ns = NodeAssist(self, names, wildcard, regex)
         return ns.get_mrca().idx
         # if not any([names, wildcard, regex]):
@@ -350,8 +559,8 @@ class ToyTree(object):
         """
         Returns a list of idx labels descendant from a selected node. 
         """
-        ndict = self.get_feature_dict("idx", None)
-        node = ndict[idx]
+        self._apply_pending_update()
+        node = self._nodes.idx_dict[idx]
         return [idx] + [i.idx for i in node.get_descendants()]
 
 
@@ -363,6 +572,7 @@ class ToyTree(object):
         returned using .get_tip_coordinates().
         """
         # if layout argument then set style and update coords.
+        self._apply_pending_update()
         if layout is None:
             layout = self.style.layout
         if layout == 'c':
@@ -397,30 +607,28 @@ class ToyTree(object):
         # else:
         #     feature = str(feature)
 
-        # access nodes in the order they will be plotted
-        ndict = self.get_node_dict(return_internal=True, return_nodes=True)
-        nodes = [ndict[i] for i in range(self.nnodes)[::-1]]
-
-        # get features
-        if feature:
-            vals = [getattr(i, feature) if hasattr(i, feature)
-                    else "" for i in nodes]
+        # get features in the order they will be plotted, added features
+        # from the columns of the tree.
+        self._apply_pending_update()
+        if feature and is_column_feature(feature):
+            vals = self.features._get_values(feature, "")
+        elif feature:
+            ndict = self._nodes.idx_dict
+            nodes = [ndict[i] for i in range(self.nnodes)[::-1]]
+            vals = [getattr(i, feature, "") for i in nodes]
         else:
-            vals = [" " for i in nodes]
+            vals = [" "] * self.nnodes
 
-        # apply hiding rules
+        # apply hiding rules, the root is first and tips are last
         if not show_root:
-            vals = [i if not j.is_root() else "" for i, j in zip(vals, nodes)]
+            vals[0] = ""
         if not show_tips:
-            vals = [i if not j.is_leaf() else "" for i, j in zip(vals, nodes)]
+            vals[self.nnodes - self.ntips:] = [""] * self.ntips
 
         # convert float to ints for prettier printing unless all floats
         # raise exception and skip if there are true strings (names)
-        try:
-            if all([Decimal(str(i)) % 1 == 0 for i in vals if i]):
-                vals = [int(i) if isinstance(i, float) else i for i in vals]
-        except Exception:
-            pass
+        if _all_whole_numbers([i for i in vals if i]):
+            vals = [int(i) if isinstance(i, float) else i for i in vals]
         return np.array(vals)
 
 
@@ -432,8 +640,14 @@ class ToyTree(object):
         enter key_attr="name" values_attr="idx" it returns a dict with
         {node.name: node.idx}. 
         """
+        # nodes are only shared if not returned (see copy)
+        self._apply_pending_update()
+        if key_attr and values_attr:
+            treenode = self._nodes.treenode
+        else:
+            treenode = self.treenode
         ndict = {}
-        for node in self.treenode.traverse():
+        for node in treenode.traverse():
             if key_attr:
                 key = getattr(node, key_attr)
             else:
@@ -462,8 +676,12 @@ class ToyTree(object):
         keys_as_names: (bool)
             If True keys are names, if False keys are node idx labels.
         """
+        # nodes are only shared if not returned (see copy)
+        self._apply_pending_update()
+        idx_dict = (self.idx_dict if return_nodes else self._nodes.idx_dict)
+        preorder = self.get_traversal_idxs("preorder").tolist()
         if return_internal:
-            nodes = [i for i in self.treenode.traverse("preorder")]
+            nodes = [idx_dict[i] for i in preorder]
 
             # names must be unique
             if keys_as_names:                  
@@ -482,7 +700,7 @@ class ToyTree(object):
             else:
                 return {i.idx: i.name for i in nodes}
         else:
-            nodes = [i for i in self.treenode.traverse("preorder") if i.is_leaf()]
+            nodes = [idx_dict[i] for i in preorder if i < self.ntips]
             if return_nodes:
                 return {i.idx: i for i in nodes}
             else:
@@ -502,6 +720,7 @@ class ToyTree(object):
         # return np.arange(self.ntips) + self.style.xbaseline + ybase...
 
         # if no layout provided then use current style
+        self._apply_pending_update()
         if layout is None:
             layout = self.style.layout
 
@@ -524,8 +743,9 @@ class ToyTree(object):
         Parameters:
             idx (int): index label of a node.
         """
+        self._apply_pending_update()
         if idx is not None:
-            treenode = self.idx_dict[idx]
+            treenode = self._nodes.idx_dict[idx]
             # if self._fixed_order:
                 # return [str(i) for i in self._fixed_order if i in 
                         # treenode.get_leaf_names()]
@@ -536,7 +756,7 @@ class ToyTree(object):
             # if self._fixed_order:
                 # return [str(i) for i in self._fixed_order]
             # else:
-            return [str(i) for i in self.treenode.get_leaf_names()[::-1]]
+            return [str(i) for i in self._nodes.treenode.get_leaf_names()[::-1]]
 
 
     def set_node_values(self, feature, values=None, default=None):
@@ -575,11 +795,12 @@ class ToyTree(object):
         ----------
         A ToyTree object is returned with the node values modified.
         """
-        # make a copy
-        nself = self.copy()
+        # make a copy, with idxs updated if edits are pending in a batch
+        nself = self._get_edit_tree()
+        nself._apply_pending_update()
 
         # make default ndict using idxs, regardless of values
-        ndict = nself.idx_dict
+        ndict = nself._nodes.idx_dict
 
         # if first value is a string then use name_dict instead of idx_dict
         if values:
@@ -596,6 +817,40 @@ class ToyTree(object):
             raise ToytreeError("cannot modify idx values.")
         if feature == "height":
             raise ToytreeError("modifying heights not supported, use dist.")
+        if values and not isinstance(values, dict):
+            print(
+                "Values should be a dictionary. Use default to set"
+                " a single value.")
+            values = None
+
+        # check that all keys are valid
+        if values:
+            for nidx in values:
+                if nidx not in ndict:
+                    raise ToytreeError(
+                        "node idx or name {} not in tree".format(nidx))
+
+        # added features are set on the columns of the tree
+        if is_column_feature(feature):
+            columns = nself.features._get_columns(shared=False)
+            rows = list(range(nself.nnodes))
+            if default is not None:
+                columns.set_rows(feature, rows, [default] * nself.nnodes)
+            if values:
+                # set everyone else to a null value, then selected nodes
+                if not columns.has_feature(feature):
+                    columns.set_rows(feature, rows, [""] * nself.nnodes)
+                else:
+                    present = columns.get_column(feature)[1]
+                    if present is not None:
+                        missing = np.flatnonzero(~present).tolist()
+                        columns.set_rows(feature, missing, [""] * len(missing))
+                columns.set_rows(
+                    feature, 
+                    [ndict[key].idx for key in values], 
+                    list(values.values()),
+                )
+            return nself
 
         # set everyone to a default value for this attribute
         if default is not None:
@@ -605,47 +860,37 @@ class ToyTree(object):
 
         # set specific values
         if values:
-            if not isinstance(values, dict):
-                print(
-                    "Values should be a dictionary. Use default to set"
-                    " a single value.")
-            else:
-                # check that all keys are valid
-                for nidx in values:
-                    if nidx not in ndict:
-                        raise ToytreeError(
-                            "node idx or name {} not in tree".format(nidx))
-
-                # or, set everyone to a null value
-                for key in ndict:
-                    if not hasattr(ndict[key], feature):
-                        node = ndict[key]
-                        node.add_feature(feature, "")
-
-                # then set selected nodes to new values
-                for key, val in values.items():
+            # set everyone to a null value
+            for key in ndict:
+                if not hasattr(ndict[key], feature):
                     node = ndict[key]
-                    node.add_feature(feature, val)
+                    node.add_feature(feature, "")
+
+            # then set selected nodes to new values
+            for key, val in values.items():
+                node = ndict[key]
+                node.add_feature(feature, val)
         return nself
 
 
 
     def copy(self):
-        """ Returns a new ToyTree equivalent to a deepcopy (but faster) """
-
-        # copy treenodes w/ topology, node attrs, nnodes, ntips, and idx_dict
-        nself = ToyTree(
-            self.treenode._clone(), 
-            # fixed_order=self._fixed_order,
-            copy=True,
-        )
-
-        # update style dicts
-        nself.style = self.style.copy()
-
-        # update coords by copying instead of coords.update
-        # nself._coords.edges = nself._coords.get_edges()
-        # nself._coords.verts = self._coords.verts.copy()
+        """ 
+        Returns a new ToyTree equivalent to a deepcopy (but faster). The
+        copy shares TreeNodes with this tree until either tree exposes its
+        nodes through .treenode or .idx_dict, which first clones them 
+        (copy-on-write). If nodes of this tree were already exposed they
+        are cloned for the copy right away, so that changes to nodes taken
+        from this tree never change the copy. The style is copied, and 
+        read-only arrays of traversal orders are shared.
+        """
+        # share treenodes w/ topology and node attrs (incl. idx) without
+        # re-ladderizing, which would undo any custom node order.
+        self._apply_pending_update()
+        nself = ToyTree.__new__(ToyTree)
+        nself._batch = False
+        nself._pending_update = False
+        nself._set_from_copy(self)
         return nself
 
 
@@ -654,11 +899,84 @@ class ToyTree(object):
     #     return deepcopy(self)
 
 
+    @contextmanager
+    def batch_edit(self):
+        """
+        Context manager that yields one working copy of the tree to which
+        the tree editing functions (e.g., root, drop_tips, prune, ladderize,
+        collapse_nodes, rotate_node, set_node_values, and .mod functions)
+        are applied in place instead of each returning a new copy. Updating 
+        node idxs and plot coordinates runs once when the context exits. 
+        Reading idxs, counts or coordinates inside the context (e.g., 
+        .ntips, .idx_dict, .get_tip_coordinates() or .draw()) runs the 
+        deferred update first, so values are never stale. The original 
+        tree is not modified.
+
+        Example:
+        --------
+        with tre.batch_edit() as etre:
+            etre.root("r0").drop_tips(["r1", "r2"]).ladderize()
+        etre.draw()
+        """
+        nself = self.copy()
+        nself._batch = True
+        try:
+            yield nself
+        finally:
+            nself._batch = False
+            nself._apply_pending_update()
+
+
+    def _get_edit_tree(self):
+        """
+        Returns a copy of the tree to be edited, or the tree itself when 
+        inside a batch_edit context.
+        """
+        if self._batch:
+            self._own_nodes()
+            return self
+        nself = self.copy()
+        nself._own_nodes()
+        return nself
+
+
+    def _update_after_edit(self):
+        """
+        Updates node idxs and coordinates after the tree was edited, or 
+        defers the update until exiting a batch_edit context.
+        """
+        if self._batch:
+            self._pending_update = True
+        else:
+            self._pending_update = False
+            self._coords.update()
+
+
+    def _apply_pending_update(self):
+        """
+        Runs a deferred update of node idxs and coordinates, if any.
+        """
+        if self._pending_update:
+            self._pending_update = False
+            self._coords.update()
+
+
+    def save(self, path):
+        """
+        Save the tree to a compact binary .npz file storing the topology, 
+        dists, supports, names and features as arrays. Reload it with 
+        toytree.load(path), which is much faster than parsing newick since
+        the node order and coordinates are also stored.
+        """
+        from .TreeArrays import save
+        save(self, path)
+
+
     def is_rooted(self):
         """
         Returns False if the tree is unrooted.
         """
-        if len(self.treenode.children) > 2:
+        if len(self._nodes.treenode.children) > 2:
             return False
         return True
 
@@ -671,14 +989,15 @@ class ToyTree(object):
         """
         ctn1 = -1 + (2 * len(self))
         ctn2 = -2 + (2 * len(self))
+        nnodes = sum(1 for i in self._nodes.treenode.traverse())
         if self.is_rooted():
-            return bool(ctn1 == sum(1 for i in self.treenode.traverse()))
+            return bool(ctn1 == nnodes)
         if include_root:
-            return bool(ctn2 == -1 + sum(1 for i in self.treenode.traverse()))
-        return bool(ctn2 == sum(1 for i in self.treenode.traverse()))
+            return bool(ctn2 == -1 + nnodes)
+        return bool(ctn2 == nnodes)
 
     # --------------------------------------------------------------------
-    # functions to modify the ete3 tree - MUST CALL ._coords.update()
+    # functions to modify the ete3 tree - MUST CALL ._update_after_edit()
     # --------------------------------------------------------------------
     def ladderize(self, direction=0):
         """
@@ -686,10 +1005,22 @@ class ToyTree(object):
         descendants than the bottom child in a left to right tree plot. 
         To reverse this pattern use direction=1.
         """
-        nself = self.copy()
-        nself.treenode.ladderize(direction=direction)
+        nself = self._get_edit_tree()
+
+        # sort children by their number of tips, counted from the idx 
+        # arrays unless they are out of date during a batch_edit.
+        if nself._pending_update:
+            nself._nodes.treenode.ladderize(direction=direction)
+        else:
+            sizes = nself.reduce_up(np.ones(nself.nnodes, dtype=int)).tolist()
+            idx_dict = nself._nodes.idx_dict
+            for idx in range(nself.ntips, nself.nnodes):
+                children = idx_dict[idx].children
+                children.sort(key=lambda x: sizes[x.idx])
+                if direction == 1:
+                    children.reverse()
         # nself._fixed_order = None
-        nself._coords.update()
+        nself._update_after_edit()
         return nself
 
 
@@ -701,12 +1032,12 @@ class ToyTree(object):
         newtre = tre.collapse_nodes(min_dist=0.001)
         newtre = tre.collapse_nodes(min_support=50)
         """
-        nself = self.copy()
-        for node in nself.treenode.traverse():
+        nself = self._get_edit_tree()
+        for node in nself._nodes.treenode.traverse():
             if not node.is_leaf():
                 if (node.dist <= min_dist) | (node.support < min_support):
                     node.delete()
-        nself._coords.update()
+        nself._update_after_edit()
         return nself
 
 
@@ -733,7 +1064,7 @@ class ToyTree(object):
         toytree.Toytree.ToyTree
         """
         # make a deepcopy of the tree
-        nself = self.copy()
+        nself = self._get_edit_tree()
 
         # return if nothing to drop
         if not any([names, wildcard, regex]):
@@ -749,8 +1080,8 @@ class ToyTree(object):
         if not tipnames:
             raise ToytreeError("No tips selected.")
 
-        nself.treenode.prune(tipnames, preserve_branch_length=True)
-        nself._coords.update()
+        nself._nodes.treenode.prune(tipnames, preserve_branch_length=True)
+        nself._update_after_edit()
         return nself
 
 
@@ -778,7 +1109,7 @@ class ToyTree(object):
         toytree.Toytree.ToyTree
         """
         # make a deepcopy of the tree
-        nself = self.copy()
+        nself = self._get_edit_tree()
 
         # return if nothing to drop
         if not any([names, wildcard, regex]):
@@ -794,13 +1125,16 @@ class ToyTree(object):
         if not tipnames:
             raise ToytreeError("No tips selected.")
 
-        keeptips = [i for i in nself.get_tip_labels() if i not in tipnames]
-        nself.treenode.prune(keeptips, preserve_branch_length=True)
-        nself._coords.update()
+        dropped = set(tipnames)
+        keeptips = [
+            i for i in nself._nodes.treenode.get_leaf_names() 
+            if i not in dropped
+        ]
+        nself._nodes.treenode.prune(keeptips, preserve_branch_length=True)
+        nself._update_after_edit()
         return nself
 
 
-    # TODO: could swap or reverse .children node attr to swap_children & update
     def rotate_node(
         self, 
         names=None, 
@@ -809,46 +1143,30 @@ class ToyTree(object):
         idx=None):
         # modify_tree=False,
         """
-        Returns a ToyTree with the selected node rotated for plotting.
-        tip colors do not align correct currently if nodes are rotated...
+        Returns a ToyTree with the selected node rotated for plotting, by
+        swapping the selected node (the mrca of the selected tips, or the
+        node with idx) with its sister.
         """
-        # make a copy
-        revd = {j: i for (i, j) in enumerate(self.get_tip_labels())}
-        neworder = {}
+        # make a copy, with idxs updated if edits are pending in a batch
+        nself = self._get_edit_tree()
+        nself._apply_pending_update()
 
         # get node to rotate
-        treenode = fuzzy_match_tipnames(
-            self, names, wildcard, regex, True, True)
-        children = treenode.up.children
-        names = [[j.name for j in i.get_leaves()] for i in children]
-        nidxs = [[revd[i] for i in j] for j in names]
-
-        # get size of the big clade
-        move = max((len(i) for i in nidxs))
-        if len(nidxs[0]) > len(nidxs[1]):
-            move = min((len(i) for i in nidxs))
-
-        # newdict
-        cnames = list(itertools.chain(*names))
-        tdict = {i: None for i in cnames}
-        cycle = itertools.cycle(itertools.chain(*nidxs))
-        for m in range(move):
-            next(cycle)
-        for t in cnames:
-            tdict[t] = next(cycle)
-
-        for key in revd:
-            if key in tdict:
-                neworder[key] = tdict[key]
-            else:
-                neworder[key] = revd[key]
-
-        revd = {j: i for (i, j) in neworder.items()}
-        neworder = [revd[i] for i in range(self.ntips)]
-
-        # returns a new tree (i.e., copy) modified w/ a fixed order
-        nself = ToyTree(self.newick)  #, fixed_order=neworder)
-        nself._coords.update()
+        if idx is not None:
+            if idx not in nself._nodes.idx_dict:
+                raise ToytreeError("node idx {} not in tree".format(idx))
+            treenode = nself._nodes.idx_dict[idx]
+        else:
+            treenode = fuzzy_match_tipnodes(
+                nself._nodes.treenode, names, wildcard, regex, True)[1]
+        if treenode.up is None:
+            raise ToytreeError("the root node cannot be rotated")
+
+        # reverse the order of the parent's children and update locally,
+        # which leaves no update pending even inside a batch_edit.
+        parent = treenode.up
+        parent.children = parent.children[::-1]
+        nself._coords.update_subtree(parent)
         return nself
 
 
@@ -861,12 +1179,12 @@ class ToyTree(object):
         Returns a copy of the tree with all polytomies randomly resolved.
         Does not transform tree in-place.
         """
-        nself = self.copy()
-        nself.treenode.resolve_polytomy(
+        nself = self._get_edit_tree()
+        nself._nodes.treenode.resolve_polytomy(
             default_dist=dist,
             default_support=support,
             recursive=recursive)
-        nself._coords.update()
+        nself._update_after_edit()
         return nself
 
 
@@ -920,11 +1238,11 @@ class ToyTree(object):
         """
         Returns a copy of the tree unrooted. Does not transform tree in-place.
         """
-        nself = self.copy()
+        nself = self._get_edit_tree()
         # updated unroot function to preserve support values to root node
-        nself.treenode.unroot()       
-        nself.treenode.ladderize()
-        nself._coords.update()
+        nself._nodes.treenode.unroot()       
+        nself._nodes.treenode.ladderize()
+        nself._update_after_edit()
         return nself
 
 
@@ -987,7 +1305,7 @@ class ToyTree(object):
             edge_features = [edge_features]
 
         # make a deepcopy of the tree and pass to Rooter class
-        nself = self.copy()
+        nself = self._get_edit_tree()
         rooter = Rooter(
             nself, 
             (names, wildcard, regex), 
@@ -1114,6 +1432,9 @@ class ToyTree(object):
             height, width, color). Example: [(4, 3, 50000, 3, 'red')]
 
         """
+        # apply an update deferred in a batch_edit before reading coords
+        self._apply_pending_update()
+
         # update kwargs to merge it with user-entered arguments:
         userargs = {
             "height": height,
@@ -1209,6 +1530,57 @@ class ToyTree(object):
 
 
 
+def _all_whole_numbers(values):
+    """
+    Returns True if all values are whole numbers, tested on an array for
+    ordinary ints and floats, and else as decimals, which accepts numeric
+    strings and is False for other strings, nan and inf.
+    """
+    if all(type(i) in (int, float) for i in values):
+        arr = np.array(values, dtype=float)
+        if np.all(np.abs(arr) < 1e27):
+            return bool(np.all(arr % 1 == 0))
+    try:
+        return all(Decimal(str(i)) % 1 == 0 for i in values)
+    except Exception:
+        return False
+
+
+
+class SharedNodes:
+    """
+    The root TreeNode and idx_dict of a ToyTree, a weak set of the 
+    ToyTrees that currently share them (see ToyTree.copy), and whether
+    the nodes were exposed outside of toytree.
+    """
+    __slots__ = ("treenode", "idx_dict", "trees", "exposed")
+
+    def __init__(self, treenode, idx_dict):
+        self.treenode = treenode
+        self.idx_dict = idx_dict
+        self.trees = WeakSet()
+        self.exposed = False
+
+    def __getstate__(self):
+        return (self.treenode, self.idx_dict)
+
+    def __setstate__(self, state):
+        self.treenode, self.idx_dict = state
+        self.trees = WeakSet()
+        self.exposed = False
+
+    def clone(self):
+        "returns new SharedNodes with a clone of the nodes and idx_dict"
+        treenode = self.treenode._clone()
+        idx_dict = {}
+        if self.idx_dict:
+            for node in treenode.traverse():
+                if hasattr(node, "idx"):
+                    idx_dict[node.idx] = node
+        return SharedNodes(treenode, idx_dict)
+
+
+
 class RawTree():
     """
     Barebones tree object that parses newick strings faster, assigns idx 
@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+
+"""
+Conversion of ToyTrees to and from flat numpy arrays, and a compact binary
+file format (.npz) based on them. Nodes are stored in order of their idx
+labels: topology as an array of parent idxs, dist and support as float
+arrays, names as codes into a table of unique names, and other features
+as typed columns. Trees are restored with their tip order and coordinates,
+without ladderizing or running a Coords.update. The same arrays are used
+to pickle ToyTrees and MultiTrees, e.g., to send them to other processes.
+"""
+
+from __future__ import print_function, absolute_import
+
+import numpy as np
+
+from .TreeNode import TreeNode
+from .TreeStyle import TreeStyle
+from .Coords import Coords
+from .TreeParser import FastTreeParser
+from .Toytree import ToyTree
+from .Multitree import MultiTree
+from .utils import ToytreeError, paused_gc
+
+
+# node features that are stored in their own arrays or are not saved
+BASE_FEATURES = {"dist", "support", "name", "height", "idx"}
+
+# version of the file layout
+FORMAT_VERSION = 1
+
+# dtype and fill value for missing values of feature columns by type code
+COLUMN_TYPES = {
+    1: (bool, False),
+    2: (np.int64, 0),
+    3: (np.float64, np.nan),
+    4: (str, ""),
+}
+
+
+
+def parse_arrays(newick, tree_format=0):
+    """
+    Parse a newick string directly to arrays without building TreeNodes, 
+    a ToyTree, or coordinates. This is a fast path for tasks that only 
+    need topology, dists and supports, such as counting clades. 
+
+    Returns a dict with:
+    parent: int array of parent idxs, -1 for the root.
+    children, child_offsets: int arrays of child idxs in CSR format, the
+        children of node i are children[child_offsets[i]:child_offsets[i+1]].
+    tip_names: list of names of tips 0-ntips.
+    names: list of names of all nodes, '' for unnamed nodes.
+    dist, support: float arrays.
+
+    Tips are numbered 0-ntips in the order they appear in the newick, and
+    internal nodes after them in postorder, so the root is the last node.
+    Node idxs differ from a ToyTree, which numbers nodes after ladderizing.
+    """
+    return FastTreeParser(newick, tree_format, arrays=True).arrays
+
+
+
+def tree_to_arrays(ttree, decode=True):
+    """
+    Returns a dict of arrays representing a ToyTree. Nodes are in idx
+    order, where tips are 0-ntips and the root is nnodes - 1. The preorder
+    array of node idxs records the order of children. If decode=False
+    annotations that a lazy parser kept raw are returned undecoded in
+    'annotations' (None if there are none) instead of as features.
+    """
+    ttree._apply_pending_update()
+    nnodes = ttree.nnodes
+    nodes = [ttree._nodes.idx_dict[idx] for idx in range(nnodes)]
+
+    parent = np.full(nnodes, -1, dtype=np.int64)
+    dist = np.zeros(nnodes, dtype=np.float64)
+    support = np.zeros(nnodes, dtype=np.float64)
+    names = []
+    for idx, node in enumerate(nodes):
+        if node.up is not None:
+            parent[idx] = node.up.idx
+        dist[idx] = node.dist
+        support[idx] = node.support
+        names.append(node.name)
+
+    preorder = ttree.get_traversal_idxs("preorder").astype(np.int64)
+
+    # raw annotations, which are otherwise decoded by node.features
+    annotations = None
+    if not decode:
+        annotations = [node._annotations for node in nodes]
+        if all(i is None for i in annotations):
+            annotations = None
+
+    # extra features of any node
+    nfeatures = [
+        node.features if decode else node._get_added_features()
+        for node in nodes
+    ]
+    feature_names = set()
+    for nfeats in nfeatures:
+        feature_names.update(nfeats)
+    features = {}
+    for feature in sorted(feature_names - BASE_FEATURES):
+        features[feature] = [
+            getattr(node, feature) if feature in nfeats else None
+            for node, nfeats in zip(nodes, nfeatures)
+        ]
+
+    return {
+        "parent": parent,
+        "preorder": preorder,
+        "dist": dist,
+        "support": support,
+        "names": names,
+        "features": features,
+        "annotations": annotations,
+        "ntips": ttree.ntips,
+        "layout": ttree.style.layout,
+        "verts": ttree._coords.verts,
+    }
+
+
+
+def arrays_to_tree(arrays, style=None):
+    """
+    Returns a ToyTree built from the dict of arrays from tree_to_arrays.
+    Node order and coordinates are restored from the arrays, so the tree
+    is not ladderized and Coords.update() is not called. The tree gets 
+    the default style unless a TreeStyle is entered.
+    """
+    ttree = ToyTree.__new__(ToyTree)
+    set_tree_from_arrays(ttree, arrays, style)
+    return ttree
+
+
+
+def set_tree_from_arrays(ttree, arrays, style=None):
+    """
+    Fills the attributes of a new (e.g., unpickled) ToyTree from a dict 
+    of arrays from tree_to_arrays, as in arrays_to_tree.
+    """
+    parent = arrays["parent"]
+    nnodes = parent.shape[0]
+
+    with paused_gc():
+        nodes, toroot = _build_nodes(arrays)
+
+    # the ToyTree with coords filled from arrays
+    ttree._batch = False
+    ttree._pending_update = False
+    ttree.style = (TreeStyle(tree_style='n') if style is None else style)
+    ttree._coords = Coords(ttree)
+    ttree._set_nodes(nodes[-1] if nnodes else TreeNode())
+    verts = arrays.get("verts")
+    if arrays.get("layout") != ttree.style.layout:
+        verts = None
+    ttree._coords.update_from_arrays(
+        nodes, parent, arrays["ntips"], verts, max(toroot) if nnodes else 0.)
+
+
+
+def _build_nodes(arrays):
+    "returns list of connected TreeNodes in idx order and root distances"
+    plist = arrays["parent"].tolist()
+    dist = arrays["dist"].tolist()
+    support = arrays["support"].tolist()
+    names = arrays["names"]
+    nnodes = len(plist)
+
+    # create nodes with attributes set directly to skip setter checks
+    nodes = []
+    for idx in range(nnodes):
+        node = TreeNode()
+        node._dist = dist[idx]
+        node._support = support[idx]
+        node._name = names[idx]
+        node.idx = idx
+        nodes.append(node)
+
+    # connect nodes in preorder so that children are added in order, and
+    # sum distances from the root (excluding its dist) for tree height.
+    toroot = [0.] * nnodes
+    for idx in arrays["preorder"].tolist():
+        pidx = plist[idx]
+        if pidx >= 0:
+            node = nodes[idx]
+            node._up = nodes[pidx]
+            nodes[pidx]._children.append(node)
+            toroot[idx] = toroot[pidx] + dist[idx]
+
+    # set extra features on nodes that have them, and raw annotations
+    for feature, values in arrays["features"].items():
+        for node, value in zip(nodes, values):
+            if value is not None:
+                node.add_feature(feature, value)
+    if arrays.get("annotations") is not None:
+        for node, raw in zip(nodes, arrays["annotations"]):
+            node._annotations = raw
+    return nodes, toroot
+
+
+
+def save(tree, path):
+    """
+    Save a ToyTree or MultiTree to a compact binary .npz file that can
+    be reloaded with toytree.load(path). Extra node features are stored
+    as typed columns and must have bool, int, float or str values.
+    """
+    if isinstance(tree, MultiTree):
+        kind = "multitree"
+        treelist = tree.treelist
+    elif isinstance(tree, ToyTree):
+        kind = "tree"
+        treelist = [tree]
+    else:
+        raise ToytreeError("save requires a ToyTree or MultiTree object")
+
+    arrs = pack_trees(treelist)
+    with open(path, 'wb') as out:
+        np.savez(out, version=FORMAT_VERSION, kind=kind, **arrs)
+
+
+
+def load(path):
+    """
+    Load a ToyTree or MultiTree from a binary file written by .save().
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) > FORMAT_VERSION:
+            raise ToytreeError(
+                "file was written by a newer version of toytree: {}"
+                .format(path))
+        arrs = {key: data[key] for key in data.files}
+
+    treelist = unpack_trees(arrs)
+    if str(arrs["kind"]) == "tree":
+        return treelist[0]
+    return MultiTree(treelist)
+
+
+
+def pack_trees(treelist, typed=True):
+    """
+    Returns a dict of the arrays of a list of ToyTrees concatenated, with
+    the node offsets of each tree and names stored as codes into a table
+    of unique names. If typed=True (for .save) extra features are stored
+    as typed columns, which requires bool, int, float or str values. 
+    Otherwise (for pickling) features are lists of values of any type and
+    lazy annotations are kept raw.
+    """
+    tarrays = [tree_to_arrays(i, decode=typed) for i in treelist]
+
+    # node offsets of each tree in the concatenated arrays
+    sizes = [i["parent"].shape[0] for i in tarrays]
+    offsets = np.zeros(len(tarrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(sizes)
+
+    # names as a table of unique names and codes into it
+    allnames = [name for i in tarrays for name in i["names"]]
+    table, name_codes = np.unique(
+        np.array(allnames, dtype=str), return_inverse=True)
+
+    # feature columns, typed with type codes that mark missing values
+    fnames = sorted(set(j for i in tarrays for j in i["features"]))
+    columns = {}
+    for feature in fnames:
+        values = []
+        for tarr, size in zip(tarrays, sizes):
+            values.extend(tarr["features"].get(feature, [None] * size))
+        if typed:
+            column, tcodes = _get_typed_column(feature, values)
+            columns["feature:" + feature] = column
+            columns["codes:" + feature] = tcodes
+        else:
+            columns["feature:" + feature] = values
+
+    # raw annotations of all trees, if any tree has them
+    if any(i["annotations"] is not None for i in tarrays):
+        columns["annotations"] = [
+            raw for tarr, size in zip(tarrays, sizes)
+            for raw in (tarr["annotations"] or [None] * size)
+        ]
+
+    # coordinates are stored for a shared layout with no missing verts
+    layouts = [i["layout"] for i in tarrays]
+    verts = [i["verts"] for i in tarrays]
+    if all(v is not None and v.shape[0] == n for v, n in zip(verts, sizes)):
+        verts = np.concatenate(verts) if verts else np.zeros((0, 2))
+    else:
+        verts = np.zeros((0, 2))
+
+    return dict(
+        offsets=offsets,
+        ntips=np.array([i["ntips"] for i in tarrays], dtype=np.int64),
+        layouts=np.array(layouts, dtype=str),
+        parent=_concat([i["parent"] for i in tarrays], np.int64),
+        preorder=_concat([i["preorder"] for i in tarrays], np.int64),
+        dist=_concat([i["dist"] for i in tarrays], np.float64),
+        support=_concat([i["support"] for i in tarrays], np.float64),
+        names=table,
+        name_codes=name_codes.astype(np.int64),
+        verts=verts,
+        features=np.array(fnames, dtype=str),
+        **columns
+    )
+
+
+
+def unpack_trees(arrs, styles=None):
+    """
+    Returns a list of ToyTrees from a dict of arrays from pack_trees, with
+    the default style or the TreeStyles in a list of styles.
+    """
+    offsets = arrs["offsets"].tolist()
+    table = arrs["names"].tolist()
+    codes = arrs["name_codes"]
+    fnames = arrs["features"].tolist()
+    hasverts = arrs["verts"].shape[0] == offsets[-1]
+    annotations = arrs.get("annotations")
+
+    treelist = []
+    for tidx in range(len(offsets) - 1):
+        start, end = offsets[tidx], offsets[tidx + 1]
+        features = {}
+        for feature in fnames:
+            if "codes:" + feature in arrs:
+                features[feature] = _get_column_values(
+                    arrs["feature:" + feature][start:end],
+                    arrs["codes:" + feature][start:end],
+                )
+            else:
+                features[feature] = arrs["feature:" + feature][start:end]
+        treelist.append(arrays_to_tree({
+            "parent": arrs["parent"][start:end],
+            "preorder": arrs["preorder"][start:end],
+            "dist": arrs["dist"][start:end],
+            "support": arrs["support"][start:end],
+            "names": [table[i] for i in codes[start:end].tolist()],
+            "features": features,
+            "annotations": (
+                None if annotations is None else annotations[start:end]),
+            "ntips": int(arrs["ntips"][tidx]),
+            "layout": str(arrs["layouts"][tidx]),
+            "verts": arrs["verts"][start:end] if hasverts else None,
+        }, None if styles is None else styles[tidx]))
+    return treelist
+
+
+
+def _concat(arrays, dtype):
+    "concatenate a list of arrays allowing for an empty list"
+    if not arrays:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(arrays).astype(dtype)
+
+
+
+def _get_value_code(value):
+    "type code of a feature value, 0 is missing"
+    if value is None:
+        return 0
+    if isinstance(value, (bool, np.bool_)):
+        return 1
+    if isinstance(value, (int, np.integer)):
+        return 2
+    if isinstance(value, (float, np.floating)):
+        return 3
+    if isinstance(value, str):
+        return 4
+    return -1
+
+
+
+def _get_typed_column(feature, values):
+    """
+    Returns an array of values and an array of type codes (0=missing, 
+    1=bool, 2=int, 3=float, 4=str) for a list of feature values where None 
+    is missing. If all present values share a type the array has that 
+    dtype, otherwise (e.g., numbers with "" for empty nodes) values are 
+    stored as str and restored by their type codes.
+    """
+    codes = np.array([_get_value_code(i) for i in values], dtype=np.int8)
+    if (codes < 0).any():
+        raise ToytreeError(
+            "feature '{}' has values that are not bool, int, float or str "
+            "and cannot be saved".format(feature))
+
+    kinds = set(codes[codes > 0].tolist())
+    if len(kinds) == 1:
+        dtype, fill = COLUMN_TYPES[kinds.pop()]
+        column = [i if i is not None else fill for i in values]
+    else:
+        dtype = str
+        column = [repr(i) if isinstance(i, float) else str(i) for i in values]
+        column = [i if j else "" for i, j in zip(column, codes)]
+    return np.array(column, dtype=dtype), codes
+
+
+
+def _get_column_values(column, codes):
+    "returns a list of feature values from _get_typed_column arrays"
+    values = column.tolist()
+    if column.dtype.kind != "U":
+        return [val if code else None for val, code in zip(values, codes)]
+    decode = {
+        1: lambda x: x == "True", 2: int, 3: float, 4: str,
+    }
+    return [
+        decode[code](val) if code else None 
+        for val, code in zip(values, codes.tolist())
+    ]
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+
+"""
+Random access into large newick or NEXUS files containing many trees. The
+file is scanned once to record the byte offsets of every tree statement,
+and the offsets are saved to a sidecar file so that later sessions can
+skip the scan. Trees are parsed only when they are requested, by slicing
+the bytes of the tree statement from a memory-mapped view of the file.
+
+trees = toytree.TreeFileIndex("posterior.nex")
+tre = trees[41234]
+mtre = trees[1000:2000:10]
+"""
+
+from __future__ import print_function, absolute_import
+
+import os
+import re
+import mmap
+import numpy as np
+
+from .Toytree import ToyTree
+from .Multitree import MultiTree
+from .TreeParser import Newick2TreeNode, MB_BRLEN_RE
+from .TreeParser import get_compression
+from .utils import ToytreeError
+
+
+SIDECAR_SUFFIX = ".tidx.npz"
+
+
+
+class TreeFileIndex(object):
+    """
+    Index of the byte offsets of each tree in a newick or NEXUS file.
+    Indexing returns a ToyTree, and slicing returns a MultiTree, parsing
+    only the selected trees.
+
+    Parameters:
+    -----------
+    path: (str)
+        Path to a newick file (one tree per line) or NEXUS file with a
+        trees block.
+    tree_format: (int)
+        ete format for newick tree structure. Default is 0.
+    sidecar: (bool or str)
+        If True (default) the index is stored next to the file as
+        path + '.tidx.npz' and loaded from there when the file size and
+        modification time still match. A str is used as the sidecar path.
+        If False the file is always scanned and nothing is written.
+    lazy_annotations: (bool)
+        Keep NHX or MrBayes node annotations as raw strings that are only
+        decoded to features when first accessed.
+
+    Attributes:
+    -----------
+    offsets: ndarray
+        (ntrees, 2) int64 array with start and end byte of each tree line.
+    tdict: dict
+        NEXUS translate table applied to names of parsed trees.
+    """
+    def __init__(self, path, tree_format=0, sidecar=True, lazy_annotations=False):
+        self.path = os.path.abspath(path)
+        self.fmt = tree_format
+        self.lazy = lazy_annotations
+        self.offsets = np.zeros((0, 2), dtype=np.int64)
+        self.tdict = {}
+        self.nexus = False
+        self._matcher = re.compile(MB_BRLEN_RE)
+
+        # byte offsets are only meaningful in uncompressed files
+        if get_compression(self.path) is not None:
+            raise ToytreeError(
+                "Cannot index a compressed tree file, decompress it first "
+                "or read it sequentially with toytree.iter_trees: {}"
+                .format(self.path))
+
+        # where to store the index
+        if sidecar is True:
+            self.sidecar = self.path + SIDECAR_SUFFIX
+        elif sidecar:
+            self.sidecar = sidecar
+        else:
+            self.sidecar = None
+
+        # load offsets from sidecar or scan the file and save them
+        if not self._load_sidecar():
+            self._scan()
+            self._save_sidecar()
+
+        # memory-mapped read-only view of the file
+        self._handle = open(self.path, 'rb')
+        if os.path.getsize(self.path):
+            self._mmap = mmap.mmap(
+                self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mmap = b""
+
+
+    def __len__(self):
+        return self.offsets.shape[0]
+
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            idxs = range(*idx.indices(len(self)))
+            if not idxs:
+                raise ToytreeError("slice selects no trees from index")
+            return MultiTree([self._get_toytree(i) for i in idxs])
+
+        # support negative and numpy integer indices
+        idx = int(idx)
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("tree index out of range")
+        return self._get_toytree(idx)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    @property
+    def ntrees(self):
+        return len(self)
+
+
+    def close(self):
+        "close the memory-mapped view and file handle"
+        if not isinstance(self._mmap, bytes):
+            self._mmap.close()
+        self._handle.close()
+
+
+    def get_newick(self, idx):
+        "returns the newick string for tree idx without parsing it"
+        start, end = self.offsets[idx]
+        line = self._mmap[start:end].decode().strip()
+        if self.nexus:
+            line = self._matcher.sub("", line.replace(" TK02Brlens ", "="))
+            line = line.split()[-1]
+        return line
+
+
+    def _get_toytree(self, idx):
+        "parse tree idx to a ToyTree"
+        newick = self.get_newick(idx)
+        extractor = Newick2TreeNode(newick, self.fmt, self.tdict, self.lazy)
+        return ToyTree(extractor.newick_from_string())
+
+
+    def _scan(self):
+        """
+        Read the file once by lines to record offsets of tree statements.
+        For newick files every non-empty line is a tree. For NEXUS files
+        the 'tree' lines of the trees block are recorded and the translate
+        block is parsed to tdict.
+        """
+        offsets = []
+        intrees = False
+        intranslate = False
+        first = True
+        pos = 0
+        with open(self.path, 'rb') as indata:
+            for line in indata:
+                start = pos
+                pos += len(line)
+                sline = line.strip()
+                if not sline:
+                    continue
+
+                # the first non-empty line tells whether data is NEXUS
+                if first:
+                    first = False
+                    if sline.upper() == b"#NEXUS":
+                        self.nexus = True
+                        continue
+
+                # newick: record every non-empty line
+                if not self.nexus:
+                    offsets.append((start, pos))
+                    continue
+
+                # NEXUS: only lines in the trees block
+                lower = sline.lower()
+                if not intrees:
+                    intrees = (lower == b"begin trees;")
+
+                elif intranslate:
+                    sub = sline.decode().split()
+                    if sub[0] != ";":
+                        self.tdict[sub[0]] = sub[-1].strip(",").strip(";")
+                    intranslate = not sline.endswith(b";")
+
+                elif lower.startswith(b"translate"):
+                    intranslate = not sline.endswith(b";")
+
+                elif lower.startswith(b"tree"):
+                    offsets.append((start, pos))
+
+                elif lower == b"end;":
+                    intrees = False
+
+        if offsets:
+            self.offsets = np.array(offsets, dtype=np.int64)
+
+
+    def _load_sidecar(self):
+        "load index if sidecar exists and matches the file size and mtime"
+        if not (self.sidecar and os.path.exists(self.sidecar)):
+            return False
+        stat = os.stat(self.path)
+        try:
+            with np.load(self.sidecar, allow_pickle=False) as data:
+                if int(data["size"]) != stat.st_size:
+                    return False
+                if int(data["mtime"]) != stat.st_mtime_ns:
+                    return False
+                self.offsets = data["offsets"].astype(np.int64)
+                self.nexus = bool(data["nexus"])
+                self.tdict = dict(zip(
+                    data["tkeys"].tolist(), data["tvalues"].tolist()))
+        except (OSError, KeyError, ValueError):
+            return False
+        return True
+
+
+    def _save_sidecar(self):
+        "write index to sidecar, skipped silently if location is read-only"
+        if not self.sidecar:
+            return
+        stat = os.stat(self.path)
+        try:
+            with open(self.sidecar, 'wb') as out:
+                np.savez(
+                    out,
+                    offsets=self.offsets,
+                    size=stat.st_size,
+                    mtime=stat.st_mtime_ns,
+                    nexus=self.nexus,
+                    tkeys=np.array(list(self.tdict.keys()), dtype=str),
+                    tvalues=np.array(list(self.tdict.values()), dtype=str),
+                )
+        except OSError:
+            pass
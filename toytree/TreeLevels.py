@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+"""
+Vectorized dynamic programming over the nodes of a tree grouped by depth
+(levels). Values of all nodes at one level are computed at once with
+numpy ufuncs, from the level below in reduce_up (children before their
+parents) or from the level above in propagate_down (parents before their
+children), so a pass takes one step per level instead of one per node.
+"""
+
+from __future__ import print_function
+import numpy as np
+from .utils import ToytreeError
+
+
+
+class TreeLevels(object):
+    """
+    Built from the 'levelorder' and 'depths' arrays of Coords.orders and
+    an array of the parent idx of each node (e.g., the first column of
+    the edges array). Levelorder visits the children of a node together,
+    so the sisters in each level are contiguous and are reduced with
+    ufunc.reduceat.
+
+    Use Coords.get_levels() to get the levels of a tree that are cached
+    with its traversal orders until the tree is modified.
+
+    Attributes:
+    -----------
+    order: array of node idxs in levelorder.
+    bounds: list of the start of each level in order, and its end.
+    parents: parent idx of the nodes in order (-1 for the root).
+    gstarts: start of each group of sisters relative to its level.
+    gparents: parent idx of each group of sisters.
+    gsizes: number of sisters in each group.
+    gbounds: list of the start of the groups of each level, and the end.
+    """
+    def __init__(self, levelorder, depths, parent):
+
+        # levels are ranges of the levelorder array of the same depth
+        self.nnodes = levelorder.shape[0]
+        self.order = levelorder
+        ldepths = depths[levelorder]
+        self.bounds = (
+            [0] + (np.flatnonzero(np.diff(ldepths)) + 1).tolist() +
+            [self.nnodes])
+
+        # parent of each node, and groups of sisters where it changes
+        self.parents = np.full(self.nnodes, -1, dtype=int)
+        self.parents[1:] = parent[levelorder[1:]]
+        new = np.ones(self.nnodes, dtype=bool)
+        new[1:] = self.parents[1:] != self.parents[:-1]
+        gpos = np.flatnonzero(new)
+        self.gparents = self.parents[gpos]
+        self.gsizes = np.diff(np.append(gpos, self.nnodes))
+        self.gbounds = np.searchsorted(gpos, self.bounds).tolist()
+        lstart = np.array(self.bounds[:-1], dtype=int)
+        self.gstarts = gpos - lstart[ldepths[gpos]]
+
+
+    def _check(self, values):
+        values = np.asarray(values)
+        if values.shape[0] != self.nnodes:
+            raise ToytreeError(
+                "expected {} values (one per node, ordered by idx) but got {}"
+                .format(self.nnodes, values.shape[0]))
+        return values
+
+
+    def reduce_up(self, values, op=np.add, weights=None):
+        """
+        Returns an array of values filled from the tips to the root. The
+        values of tips are kept and the value of each internal node is
+        op applied over the values of its children, after adding their
+        weights (e.g., dists) if entered. op is a numpy ufunc with a
+        reduceat method (e.g., np.add, np.maximum, np.logical_or), or
+        np.mean for the mean of the children. The values entered for
+        internal nodes are not used. Arrays are ordered by node idx.
+        """
+        values = self._check(values)
+        if weights is None:
+            dtype = values.dtype
+        else:
+            weights = self._check(weights)
+            dtype = np.result_type(values, weights)
+        if op is np.mean:
+            dtype = np.result_type(dtype, float)
+        out = values.astype(dtype)
+
+        # levels from the deepest, each reduces its sisters into parents
+        for lidx in range(len(self.bounds) - 2, 0, -1):
+            nodes = self.order[self.bounds[lidx]:self.bounds[lidx + 1]]
+            vals = out[nodes]
+            if weights is not None:
+                vals = vals + weights[nodes]
+            glo, ghi = self.gbounds[lidx], self.gbounds[lidx + 1]
+            starts = self.gstarts[glo:ghi]
+            if op is np.mean:
+                sums = np.add.reduceat(vals, starts)
+                out[self.gparents[glo:ghi]] = sums / self.gsizes[glo:ghi]
+            else:
+                out[self.gparents[glo:ghi]] = op.reduceat(vals, starts)
+        return out
+
+
+    def propagate_down(self, values, op=np.add):
+        """
+        Returns an array of values filled from the root to the tips. The
+        value of the root is kept and the value of every other node is
+        op(value of its parent, its own value). op is a numpy ufunc or
+        any function of two arrays that works elementwise. Arrays are
+        ordered by node idx.
+        """
+        out = self._check(values).copy()
+        for lidx in range(1, len(self.bounds) - 1):
+            lo, hi = self.bounds[lidx], self.bounds[lidx + 1]
+            nodes = self.order[lo:hi]
+            out[nodes] = op(out[self.parents[lo:hi]], out[nodes])
+        return out
+
+
+    def iter_groups_up(self):
+        """
+        Yields (children, starts, sizes, parents) for each level from the
+        deepest to the level below the root, where children is an array of
+        the node idxs of the level, starts the position of the first child
+        of each parent in it, sizes the number of children of each parent,
+        and parents the parent idxs. For writing passes from the tips to 
+        the root that are not a single reduce_up.
+        """
+        for lidx in range(len(self.bounds) - 2, 0, -1):
+            nodes = self.order[self.bounds[lidx]:self.bounds[lidx + 1]]
+            glo, ghi = self.gbounds[lidx], self.gbounds[lidx + 1]
+            yield (
+                nodes, self.gstarts[glo:ghi], self.gsizes[glo:ghi], 
+                self.gparents[glo:ghi])
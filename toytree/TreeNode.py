@@ -16,11 +16,119 @@ from functools import cmp_to_key
 # from .newick import write_newick  # , read_newick
 from .TreeWriter import NewickWriter
 from .RobinsonFoulds import RobinsonFoulds
-from .utils import TreeError
+from .LCAIndex import LCAIndex
+from .CladeIndex import CladeIndex, get_positions, count_bits
+from .utils import TreeError, paused_gc
 
 DEFAULT_EDGE_LENGTH = 1.
 DEFAULT_SUPPORT = 0.
 
+# features that every node has, returned with any added features
+BASE_FEATURES = frozenset(["dist", "support", "name", "height"])
+
+# mrca queries between edits to a tree that walk up to the root before 
+# an LCAIndex is built to answer the rest
+LCA_INDEX_QUERIES = 4
+
+# returned for features that are missing from the columns of a tree
+_MISSING = object()
+
+
+
+class TreeData(object):
+    """
+    Data shared by all nodes of a tree: counts of edits to its edge 
+    lengths or topology, and of changes to node names, and the columns of
+    added features of its nodes (a FeatureColumns, or None). Caches of 
+    the tree stored on its root node are valid until these counts change.
+    Nodes get a TreeData the first time their tree is indexed or cached,
+    and nodes attached to a tree join its TreeData. 'loose' is True if 
+    nodes may have features that are not in the columns.
+    """
+    __slots__ = ("edits", "renames", "columns", "loose")
+
+    def __init__(self):
+        self.edits = 0
+        self.renames = 0
+        self.columns = None
+        self.loose = True
+
+
+
+class ChildList(list):
+    """
+    The list of children of a node. Changes to the list count as edits to
+    the tree of the node, and nodes added to it join its TreeData.
+    """
+    __slots__ = ("node",)
+
+    def __init__(self, node, children=()):
+        list.__init__(self, children)
+        self.node = node
+
+    def __reduce__(self):
+        return (ChildList, (self.node, list(self)))
+
+    def _edited(self, added=()):
+        "count an edit to the tree and set its TreeData on added nodes"
+        data = self.node._data
+        if data is not None:
+            data.edits += 1
+            for child in added:
+                if child._data is not data:
+                    child._set_tree_data(data)
+
+    def append(self, child):
+        list.append(self, child)
+        self._edited((child,))
+
+    def extend(self, children):
+        children = list(children)
+        list.extend(self, children)
+        self._edited(children)
+
+    def __iadd__(self, children):
+        self.extend(children)
+        return self
+
+    def insert(self, index, child):
+        list.insert(self, index, child)
+        self._edited((child,))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            list.__setitem__(self, index, value)
+            self._edited(value)
+        else:
+            list.__setitem__(self, index, value)
+            self._edited((value,))
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._edited()
+
+    def remove(self, child):
+        list.remove(self, child)
+        self._edited()
+
+    def pop(self, index=-1):
+        child = list.pop(self, index)
+        self._edited()
+        return child
+
+    def clear(self):
+        list.clear(self)
+        self._edited()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._edited()
+
+    def reverse(self):
+        list.reverse(self)
+        self._edited()
+
 
 
 
@@ -60,6 +168,24 @@ class TreeNode(object):
     --------
     a tree node object which represents the base of the tree.
     """
+    # Core node data and plot coordinates are stored in fixed slots. Added
+    # features of a tree are stored in columns on its TreeData (see 
+    # FeatureColumns) and are returned by __getattr__. Features added with
+    # add_feature() to nodes not in the columns are kept in the instance
+    # __dict__, which is only allocated when a feature or other attribute 
+    # is set on a node, with their names in _features (None if there are
+    # none), until the feature table of the tree moves them to columns.
+    # _annotations holds a raw annotation string from a lazy parser until
+    # it is decoded to features. _hcache, _lcache, _ncache and _ccache 
+    # hold the cached node heights, mrca, name and clade indexes of a tree
+    # on its root, which are valid until the edit counts of the TreeData
+    # of the tree (_data) change. Setters and the children list count 
+    # edits to the tree of the node.
+    __slots__ = (
+        "_children", "_up", "_dist", "_support", "_height", "_features",
+        "_annotations", "_hcache", "_lcache", "_ncache", "_ccache", "_name", 
+        "_data", "idx", "x", "y", "radius", "radians", "__dict__",
+    )
 
     def __init__(
         self, 
@@ -70,22 +196,25 @@ class TreeNode(object):
         name=None):
 
         """doc-string"""
-        self._children = []
+        self._children = ChildList(self)
         self._up = None
         self._dist = DEFAULT_EDGE_LENGTH
         self._support = DEFAULT_SUPPORT
         self._height = 0
-        self.features = set([])
-
-        # Add basic features
-        self.features.update(["dist", "support", "name", "height"])
+        self._features = None
+        self._annotations = None
+        self._hcache = None
+        self._lcache = None
+        self._ncache = None
+        self._ccache = None
+        self._data = None
         if dist is not None:
             self.dist = dist
         if support is not None:
             self.support = support
 
         # default root name is empty
-        self.name = (name if name is not None else "")
+        self._name = (name if name is not None else "")
 
         # Initialize tree
         if newick is not None:
@@ -105,23 +234,29 @@ class TreeNode(object):
             self._dist = float(value)
         except ValueError:
             raise TreeError('node dist must be a float number')
+        if self._data is not None:
+            self._data.edits += 1
+
+
+    @property
+    def name(self):
+        return self._name
+    @name.setter
+    def name(self, value):
+        self._name = value
+        if self._data is not None:
+            self._data.renames += 1
 
 
     # TODO: setting height should change the .dist values...
     @property
     def height(self):
-        # i = 0
-        # while self.up:
-            # i += self.dist
-            # self = self.up
-        # return i
-        # return sum([
-            # self.dist, 
-            # sum(i.dist for i in self.iter_ancestors() if not i.is_root()),
-        # ])
-        _root = self.get_tree_root()
-        _treeheight = _root.get_distance(_root.get_farthest_leaf()[0])
-        return _treeheight - _root.get_distance(self)
+        """
+        Returns the distance from the root to its farthest tip minus the 
+        distance from the root to this node. Heights of all nodes in the 
+        tree are computed together and cached until the tree is edited.
+        """
+        return self._get_heights()[self]
 
 
     @height.setter
@@ -141,6 +276,24 @@ class TreeNode(object):
         except ValueError:
             raise TreeError('node support must be a float number')
 
+    @property
+    def features(self):
+        """
+        Returns a new set of the feature names of this node: the basic
+        features, idx if set, and features added with add_feature().
+        """
+        if self._annotations is not None:
+            self._decode_annotations()
+        feats = set(BASE_FEATURES)
+        feats.update(self._get_added_features())
+        if hasattr(self, "idx"):
+            feats.add("idx")
+        return feats
+    @features.setter
+    def features(self, value):
+        value = set(value) - BASE_FEATURES - {"idx"}
+        self._features = value if value else None
+
     @property
     def up(self):
         return self._up
@@ -148,6 +301,11 @@ class TreeNode(object):
     def up(self, value):
         if type(value) == type(self) or value is None:
             self._up = value
+            if value is not None and value._data is not self._data:
+                if value._data is not None:
+                    self._set_tree_data(value._data)
+            if self._data is not None:
+                self._data.edits += 1
         else:
             raise TreeError("bad node_up type")
 
@@ -156,9 +314,10 @@ class TreeNode(object):
         return self._children
     @children.setter
     def children(self, value):
-        if type(value) == list and \
+        if isinstance(value, list) and \
            len(set([type(n) == type(self) for n in value])) < 2:
-            self._children = value
+            self._children = ChildList(self, value)
+            self._children._edited(value)
         else:
             raise TreeError("Incorrect children type")
 
@@ -173,6 +332,26 @@ class TreeNode(object):
     def __bool__(self):
         return True
 
+    def __getattr__(self, name):
+        """
+        Only called when normal attribute lookup fails. Decodes annotations
+        kept raw by a lazy parser in case they contain the feature, and 
+        returns features stored in the columns of the tree.
+        """
+        # unset slots (e.g., while unpickling) and special names are missing
+        if name.startswith("__") or name in TreeNode.__slots__:
+            raise AttributeError(
+                "'TreeNode' object has no attribute '{}'".format(name))
+        if self._annotations is not None:
+            self._decode_annotations()
+            return getattr(self, name)
+        if self._data is not None and self._data.columns is not None:
+            value = self._data.columns.get_value(self, name, _MISSING)
+            if value is not _MISSING:
+                return value
+        raise AttributeError(
+            "'TreeNode' object has no attribute '{}'".format(name))
+
     #def __repr__(self):
     #    return "TreeNode '%s' (%s)" % (self.name, hex(self.__hash__()))
 
@@ -223,56 +402,111 @@ class TreeNode(object):
         of the original. This is much faster than using deepcopy, and makes
         it much faster to copy toytrees.
         """
-        # copies the TreeNode object
-        ndict = {}
-
-        # traverse root to tips
-        for node in self.traverse("levelorder"):
-
-            # create root node and copy attrs
-            if node.is_root():
-                cnode = TreeNode()
-                cnode.__dict__.update(node.__dict__)
-                cnode._children = []
-                ndict[node.idx] = cnode
-
-            # every other node is someones' child
-            else:
-                cnode = ndict[node.idx]
-
-            # attach children and copy attrs
-            for child in node.children:
-                tmp = TreeNode()
-                tmp.__dict__.update(child.__dict__)
-                tmp.up = cnode
-                tmp._children = []
-                cnode.add_child(tmp)
-                ndict[child.idx] = tmp
-        return ndict[self.idx]
+        # create root node and copy attrs
+        root = TreeNode()
+        _copy_node_data(self, root)
+
+        # traverse root to tips pairing each node with its copy. The many
+        # new nodes would otherwise trigger repeated garbage collections.
+        columns = (self._data.columns if self._data is not None else None)
+        pairs = ([(self, root)] if columns is not None else None)
+        stack = [(self, root)]
+        with paused_gc():
+            while stack:
+                node, cnode = stack.pop()
+
+                # attach children and copy attrs. The new tree has no 
+                # TreeData yet so there are no edits to count.
+                for child in node._children:
+                    tmp = TreeNode()
+                    _copy_node_data(child, tmp)
+                    tmp._up = cnode
+                    list.append(cnode._children, tmp)
+                    stack.append((child, tmp))
+                    if pairs is not None:
+                        pairs.append((child, tmp))
+
+        # the new tree gets a copy of the feature columns for its nodes
+        if columns is not None:
+            data = TreeData()
+            data.loose = self._data.loose
+            nodes = [None] * len(columns.nodes)
+            for node, cnode in pairs:
+                cnode._data = data
+                row = columns.get_row(node)
+                if row is not None:
+                    nodes[row] = cnode
+            data.columns = columns.copy(nodes)
+        return root
 
 
 
     #################################################################
     ## functions
     #################################################################
+    def _decode_annotations(self):
+        "parse raw NHX or MrBayes annotations from a lazy parser to features"
+        from .TreeParser import parse_annotations
+        raw = self._annotations
+        self._annotations = None
+        for fname, fvalue in parse_annotations(raw).items():
+            self.add_feature(fname, fvalue)
+
+
     def add_feature(self, pr_name, pr_value):
         """ Add or update a node's feature. """
+        columns = (self._data.columns if self._data is not None else None)
+        if columns is not None and columns.set_value(self, pr_name, pr_value):
+            return
         setattr(self, pr_name, pr_value)
-        self.features.add(pr_name)
+        self._add_feature_name(pr_name)
 
 
     def add_features(self, **features):
         """ Add or update several features. """
+        for fname, fvalue in features.items():
+            self.add_feature(fname, fvalue)
+
+
+    def _add_feature_name(self, pr_name):
+        "record name of an added feature unless it is a basic feature"
+        if pr_name in BASE_FEATURES or pr_name == "idx":
+            return
+        if self._features is None:
+            self._features = set()
+        self._features.add(pr_name)
+        if self._data is not None:
+            self._data.loose = True
+
+
+    def _get_added_features(self):
+        "returns names of added features without decoding annotations"
+        feats = set(self._features) if self._features else set()
+        if self._data is not None and self._data.columns is not None:
+            feats.update(self._data.columns.get_names(self))
+        return feats
+
+
+    def _store_features(self):
+        """
+        Moves features of this node from the columns of its tree to the 
+        node, before it leaves the tree (i.e., joins another TreeData).
+        """
+        features = self._data.columns.pop_node(self)
         for fname, fvalue in features.items():
             setattr(self, fname, fvalue)
-            self.features.add(fname)
+            self._add_feature_name(fname)
 
 
     def del_feature(self, pr_name):
         """ Permanently deletes a node's feature."""
+        columns = (self._data.columns if self._data is not None else None)
+        if columns is not None and columns.remove_value(self, pr_name):
+            return
         if hasattr(self, pr_name):
             delattr(self, pr_name)
-            self.features.remove(pr_name)
+            if self._features:
+                self._features.discard(pr_name)
 
 
     #####################################################################
@@ -850,6 +1084,162 @@ class TreeNode(object):
         return root
 
 
+    def _set_tree_data(self, data):
+        """
+        Sets a TreeData on all nodes in the subtree of this node. Features
+        of nodes in the columns of another tree are moved to the nodes.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._data is not None and node._data.columns is not None:
+                if node._data is not data:
+                    node._store_features()
+            node._data = data
+            if node._features:
+                data.loose = True
+            stack.extend(node._children)
+
+
+    def _get_edit_token(self, renames=False):
+        """
+        Returns a token of the edits (and renames) to the tree of this root
+        node, which is equal to a token stored with a cache only if the tree
+        was not edited since. A TreeData is set on all nodes if missing.
+        """
+        data = self._data
+        if data is None:
+            data = TreeData()
+            self._set_tree_data(data)
+        if renames:
+            return (data, data.edits, data.renames)
+        return (data, data.edits)
+
+
+    def _get_heights(self):
+        """
+        Returns a dict mapping every node in the tree to its height. The 
+        heights are computed in one pass from the root and cached on the
+        root node until the tree is edited.
+        """
+        root = self.get_tree_root()
+        cache = getattr(root, "_hcache", None)
+        token = root._get_edit_token()
+        if cache is not None and cache[0] == token:
+            return cache[1]
+
+        # sum distances from the root (excluding its dist) in preorder
+        toroot = {root: 0.}
+        treeheight = 0.
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node._children:
+                for child in node._children:
+                    toroot[child] = toroot[node] + child._dist
+                    stack.append(child)
+            elif toroot[node] > treeheight:
+                treeheight = toroot[node]
+
+        # convert to heights in place and store with the edit count
+        for node in toroot:
+            toroot[node] = treeheight - toroot[node]
+        root._hcache = (token, toroot)
+        return toroot
+
+
+    def _get_lca_index(self, build=True):
+        """
+        Returns an LCAIndex for constant time mrca queries between nodes
+        of the tree. It is cached on the root node until the tree is 
+        edited. If build is False it returns None instead of building the
+        index until the tree has been queried LCA_INDEX_QUERIES times 
+        since it was last edited, since a few queries between edits are 
+        faster to answer by walking up to the root.
+        """
+        root = self.get_tree_root()
+        cache = getattr(root, "_lcache", None)
+        token = root._get_edit_token()
+        nqueries = 0
+        if cache is not None and cache[0] == token:
+            if cache[1] is not None:
+                return cache[1]
+            nqueries = cache[2]
+        if not build and nqueries < LCA_INDEX_QUERIES:
+            root._lcache = (token, None, nqueries + 1)
+            return None
+        index = LCAIndex(root)
+        root._lcache = (token, index, nqueries)
+        return index
+
+
+    def _get_clade_index(self):
+        """
+        Returns a CladeIndex with the bitset of tips (in get_leaves order)
+        in the clade of every node of the tree. It is built on first use 
+        and cached on the root node until the tree is edited.
+        """
+        root = self.get_tree_root()
+        cache = getattr(root, "_ccache", None)
+        token = root._get_edit_token()
+        if cache is not None and cache[0] == token:
+            return cache[1]
+        index = CladeIndex(root)
+        root._ccache = (token, index)
+        return index
+
+
+    def _get_name_index(self):
+        """
+        Returns a dict mapping names to lists of the nodes with that name
+        in levelorder. It is stored by Coords.update_idxs, or built on first
+        use, and cached on the root node until the tree is edited or a
+        node renamed.
+        """
+        root = self.get_tree_root()
+        cache = getattr(root, "_ncache", None)
+        token = root._get_edit_token(renames=True)
+        if cache is not None and cache[0] == token:
+            return cache[1]
+
+        # nodes in levelorder, the order of traverse()
+        nodes = [root]
+        for node in nodes:
+            nodes.extend(node._children)
+        return root._set_name_index(nodes)
+
+
+    def _set_name_index(self, nodes):
+        "stores the name index of nodes in levelorder on this root node"
+        index = {}
+        with paused_gc():
+            for node in nodes:
+                if node._name in index:
+                    index[node._name].append(node)
+                else:
+                    index[node._name] = [node]
+        self._ncache = (self._get_edit_token(renames=True), index)
+        return index
+
+
+    def _search_name(self, name):
+        """
+        Returns the list of nodes with name in the subtree of this node in 
+        levelorder, from the name index of the tree.
+        """
+        nodes = self._get_name_index().get(name, [])
+        if self._up is None:
+            return list(nodes)
+        matches = []
+        for node in nodes:
+            anc = node
+            while anc is not None and anc is not self:
+                anc = anc._up
+            if anc is self:
+                matches.append(node)
+        return matches
+
+
     def get_common_ancestor(self, *target_nodes, **kargs):
         """
         Returns the first common ancestor between this node and a given
@@ -875,6 +1265,13 @@ class TreeNode(object):
         if type(target_nodes) != list:
             target_nodes = [target_nodes, self]
 
+        # toytree: query the cached mrca index unless paths are requested,
+        # or the index is out of date and the tree rarely queried.
+        if not get_path:
+            index = self._get_lca_index(build=False)
+            if index is not None:
+                return index.get_mrca_of(target_nodes)
+
         n2path = {}
         reference = []
         ref_node = None
@@ -915,7 +1312,15 @@ class TreeNode(object):
         topology before returning the first matches. Useful when
         dealing with huge trees.
         """
-        for n in self.traverse():
+        # toytree: nodes with a name are found from the name index
+        nodes = self.traverse()
+        if "name" in conditions:
+            try:
+                nodes = self._search_name(conditions["name"])
+            except TypeError:
+                pass
+
+        for n in nodes:
             conditions_passed = 0
             for key, value in conditions.items():
                 if hasattr(n, key) and getattr(n, key) == value:
@@ -1350,50 +1755,79 @@ class TreeNode(object):
     def _asciiArt(self, char1='-', show_internal=True, compact=False, attributes=None):
         """
         Returns the ASCII representation of the tree.
-        Code based on the PyCogent GPL project.
+        Code based on the PyCogent GPL project. Nodes are drawn in 
+        postorder from the (lines, mid) results of their children, instead
+        of recursively, so that very deep trees can be drawn. Lines are
+        kept as lists of segments in reverse order while drawing, so that
+        adding a prefix to each line is not a copy of the whole line.
         """
         if not attributes:
             attributes = ["name"]
 
-        # toytree edit:
-        # removed six dependency for map with comprehension
-        # node_name = ', '.join(map(str, [getattr(self, v) for v in attributes if hasattr(self, v)]))
-        _attrlist = [getattr(self, v) for v in attributes if hasattr(self, v)]
-        node_name = ", ".join([str(i) for i in _attrlist])
+        # (lines, mid) of each drawn node until its parent is drawn
+        drawn = {}
+        for node in self.traverse("postorder"):
+
+            # edge char is set by the position of node among its sisters
+            if node is self:
+                char = char1
+            else:
+                sisters = node.up.children
+                if len(sisters) == 1:
+                    char = '/'
+                elif node is sisters[0]:
+                    char = '/'
+                elif node is sisters[-1]:
+                    char = '\\'
+                else:
+                    char = '-'
+
+            # toytree edit:
+            # removed six dependency for map with comprehension
+            _attrlist = [getattr(node, v) for v in attributes if hasattr(node, v)]
+            node_name = ", ".join([str(i) for i in _attrlist])
+
+            if node.is_leaf():
+                drawn[node] = ([[char + '-' + node_name]], 0)
+                continue
 
-        LEN = max(3, len(node_name) if not self.children or show_internal else 3)
-        PAD = ' ' * LEN
-        PA = ' ' * (LEN-1)
-        if not self.is_leaf():
+            LEN = max(3, len(node_name) if show_internal else 3)
+            PAD = ' ' * LEN
+            PA = ' ' * (LEN-1)
             mids = []
             result = []
-            for c in self.children:
-                if len(self.children) == 1:
-                    char2 = '/'
-                elif c is self.children[0]:
-                    char2 = '/'
-                elif c is self.children[-1]:
-                    char2 = '\\'
-                else:
-                    char2 = '-'
-                (clines, mid) = c._asciiArt(char2, show_internal, compact, attributes)
+            for c in node.children:
+                (clines, mid) = drawn.pop(c)
                 mids.append(mid+len(result))
                 result.extend(clines)
                 if not compact:
-                    result.append('')
+                    result.append([])
             if not compact:
                 result.pop()
             (lo, hi, end) = (mids[0], mids[-1], len(result))
             prefixes = [PAD] * (lo+1) + [PA+'|'] * (hi-lo-1) + [PAD] * (end-hi)
             mid = int((lo + hi) / 2)
-            prefixes[mid] = char1 + '-'*(LEN-2) + prefixes[mid][-1]
-            result = [p+l for (p,l) in zip(prefixes, result)]
+            prefixes[mid] = char + '-'*(LEN-2) + prefixes[mid][-1]
+            for (p, l) in zip(prefixes, result):
+                l.append(p)
+
+            # write the name over the stem, which can overwrite the first
+            # char of the line after the prefix if the name fills it.
             if show_internal:
                 stem = result[mid]
-                result[mid] = stem[0] + node_name + stem[len(node_name)+1:]
-            return (result, mid)
-        else:
-            return ([char1 + '-' + node_name], 0)
+                prefix = stem.pop()
+                cut = len(node_name) + 1
+                drop = cut - len(prefix)
+                while drop > 0 and stem:
+                    seg = stem.pop()
+                    if len(seg) > drop:
+                        stem.append(seg[drop:])
+                    drop -= len(seg)
+                stem.append(prefix[0] + node_name + prefix[cut:])
+            drawn[node] = (result, mid)
+
+        (result, mid) = drawn[self]
+        return (["".join(reversed(l)) for l in result], mid)
 
 
     def get_ascii(self, show_internal=True, compact=False, attributes=None):
@@ -1418,35 +1852,24 @@ class TreeNode(object):
     def ladderize(self, direction=0):
         """
         Sort the branches of a given tree (swapping children nodes)
-        according to the size of each partition.
-        """
-        if not self.is_leaf():
-
-            # record nodes and their sizes
-            n2s = {}
-
-            # apply dynamic func to children until we get to the tips
-            for n in self.get_children():
-                s = n.ladderize(direction=direction)
-                n2s[n] = s
-
-            # option to also sort tipnames alphanumerically
-            # if all([i.is_leaf() for i in self.children]):
-            # self.children.sort(key=lambda x: x.name)
-            # else:
-
-            # sort nodes by size
-            self.children.sort(key=lambda x: n2s[x])
+        according to the size of each partition. Nodes are visited in 
+        postorder without recursion so that very deep trees can be sorted.
+        """
+        # record number of tips under each node
+        n2s = {}
+        for node in self.traverse("postorder"):
+            if node.is_leaf():
+                n2s[node] = 1
+                continue
 
-            # flip order for direction arg
+            # sort children by size, and flip order for direction arg
+            node.children.sort(key=n2s.__getitem__)
             if direction == 1:
-                self.children.reverse()
+                node.children.reverse()
 
             # get new size
-            size = sum(n2s.values())
-        else:
-            size = 1
-        return size
+            n2s[node] = sum(n2s[i] for i in node.children)
+        return n2s[self]
 
 
     def sort_descendants(self, attr="name"):
@@ -1484,28 +1907,22 @@ class TreeNode(object):
         if _store is None:
             _store = {}
 
-        # add each node info to the dict
-        for ch in self.children:
-            ch.get_cached_content(
-                store_attr=store_attr,
-                container_type=container_type,
-                _store=_store,
-            )
-
-        if self.children:
-            val = container_type()
-            for ch in self.children:
-                if type(val) == list:
-                    val.extend(_store[ch])
-                if type(val) == set:
-                    val.update(_store[ch])
-            _store[self] = val
-        else:
-            if store_attr is None:
-                val = self
+        # add each node info to the dict, children before parents
+        for node in self.traverse("postorder"):
+            if node.children:
+                val = container_type()
+                for ch in node.children:
+                    if type(val) == list:
+                        val.extend(_store[ch])
+                    if type(val) == set:
+                        val.update(_store[ch])
+                _store[node] = val
             else:
-                val = getattr(self, store_attr)
-            _store[self] = container_type([val])
+                if store_attr is None:
+                    val = node
+                else:
+                    val = getattr(node, store_attr)
+                _store[node] = container_type([val])
 
         return _store
 
@@ -1794,6 +2211,22 @@ class TreeNode(object):
         The id is, by default, calculated based on the terminal node's names. 
         Any other node attribute could be used instead.
         """
+        # toytree: splits are read from bitsets over tips sorted by attr 
+        # value, so the set bits of each side give its sorted values. 
+        # Repeated values cannot be told apart as bits and are compared 
+        # from the edges instead.
+        values = sorted(getattr(i, attr) for i in self.iter_leaves())
+        order = {j: i for i, j in enumerate(values)}
+        if len(order) == len(values):
+            index = CladeIndex(self, order, attr)
+            allbits = index.bits[self]
+            edge_keys = []
+            for bits in index.bits.values():
+                k1 = [values[i] for i in get_positions(bits)]
+                k2 = [values[i] for i in get_positions(allbits & ~bits)]
+                edge_keys.append(sorted([k1, k2]))
+            return md5(str(sorted(edge_keys)).encode('utf-8')).hexdigest()
+
         edge_keys = []
         for s1, s2 in self.get_edges():
             k1 = sorted([getattr(e, attr) for e in s1])
@@ -1879,44 +2312,47 @@ class TreeNode(object):
 
             values = set(values)
 
-        # This is the only time I traverse the tree, then I use cached
-        # leaf content
-        n2leaves = self.get_cached_content()
+        # toytree: clades are bitsets of tips from the cached clade index
+        index = self._get_clade_index()
+        allbits = index.bits[self]
+        leaves = index.get_tips(allbits)
 
         # Raise an error if requested attribute values are not even present
         if ignore_missing:
-            found_values = set([getattr(n, target_attr) for n in n2leaves[self]])
+            found_values = set([getattr(n, target_attr) for n in leaves])
             missing_values = values - found_values
             values = values & found_values
 
         # Locate leaves matching requested attribute values
-        targets = set([leaf for leaf in n2leaves[self]
+        targets = set([leaf for leaf in leaves
                    if getattr(leaf, target_attr) in values])
         if not ignore_missing:
             if values - set([getattr(leaf, target_attr) for leaf in targets]):
                 raise ValueError('The monophyly of the provided values could never be reached, as not all of them exist in the tree.'
                                  ' Please check your target attribute and values, or set the ignore_missing flag to True')
+        tbits = index.get_bits(targets)
 
         if unrooted:
+            # smallest side of an edge (clade or its complement) with all
+            # targets, a target set is a subset if no target is outside.
             smallest = None
-            for side1, side2 in self.iter_edges(cached_content=n2leaves):
-                if targets.issubset(side1) and (not smallest or len(side1) < len(smallest)):
-                    smallest = side1
-                elif targets.issubset(side2) and (not smallest or len(side2) < len(smallest)):
-                        smallest = side2
-                if smallest is not None and len(smallest) == len(targets):
+            nsmallest = None
+            for node in self.traverse("postorder"):
+                side1 = index.bits[node]
+                side2 = allbits & ~side1
+                if not tbits & ~side1 and (
+                    not smallest or count_bits(side1) < nsmallest):
+                    smallest, nsmallest = side1, count_bits(side1)
+                elif not tbits & ~side2 and (
+                    not smallest or count_bits(side2) < nsmallest):
+                    smallest, nsmallest = side2, count_bits(side2)
+                if smallest is not None and nsmallest == len(targets):
                     break
-            foreign_leaves = smallest - targets
+            foreign_leaves = set(index.get_tips(smallest & ~tbits))
         else:
-            # Check monophyly with get_common_ancestor. Note that this
-            # step does not require traversing the tree again because
-            # targets are node instances instead of node names, and
-            # get_common_ancestor function is smart enough to detect it
-            # and avoid unnecessary traversing.
+            # Check monophyly with the mrca of the targets.
             common = self.get_common_ancestor(targets)
-            observed = n2leaves[common]
-            foreign_leaves = set([leaf for leaf in observed
-                              if getattr(leaf, target_attr) not in values])
+            foreign_leaves = set(index.get_tips(index.bits[common] & ~tbits))
 
         if not foreign_leaves:
             return True, "monophyletic", foreign_leaves
@@ -1926,8 +2362,7 @@ class TreeNode(object):
             poly_common = self.get_common_ancestor(foreign_leaves)
             # if the common ancestor of all foreign leaves is self
             # contained, we have a paraphyly. Otherwise, polyphyly.
-            polyphyletic = [leaf for leaf in poly_common if
-                            getattr(leaf, target_attr) in values]
+            polyphyletic = index.bits[poly_common] & tbits
             if polyphyletic:
                 return False, "polyphyletic", foreign_leaves
             else:
@@ -2101,12 +2536,12 @@ def _translate_nodes(root, *nodes):
 
     #name2node = {[n, None] for n in nodes if type(n) is str}
     name2node = dict([[n, None] for n in nodes if type(n) is str])
-    for n in root.traverse():
-        if n.name in name2node:
-            if name2node[n.name] is not None:
-                raise TreeError("Ambiguous node name: {}".format(str(n.name)))
-            else:
-                name2node[n.name] = n
+    for name in name2node:
+        matches = root._search_name(name)
+        if len(matches) > 1:
+            raise TreeError("Ambiguous node name: {}".format(str(name)))
+        if matches:
+            name2node[name] = matches[0]
 
     if None in list(name2node.values()):
         notfound = [key for key, value in name2node.items() if value is None]
@@ -2125,3 +2560,28 @@ def _translate_nodes(root, *nodes):
         return valid_nodes[0]
     else:
         return valid_nodes
+
+
+
+def _copy_node_data(node, cnode):
+    """
+    Copy the data of node to the new node cnode, excluding its parent and
+    children. Plot coordinates are copied if set, and added features are
+    copied with a new set of feature names.
+    """
+    cnode._dist = node._dist
+    cnode._support = node._support
+    cnode._height = node._height
+    cnode._annotations = node._annotations
+    cnode._name = node._name
+    try:
+        cnode.idx = node.idx
+        cnode.x = node.x
+        cnode.y = node.y
+        cnode.radius = node.radius
+        cnode.radians = node.radians
+    except AttributeError:
+        pass
+    if node._features:
+        cnode._features = set(node._features)
+        cnode.__dict__.update(node.__dict__)
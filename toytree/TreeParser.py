@@ -10,9 +10,18 @@ are parsed.
 
 import os
 import re
+import bz2
+import gzip
+import lzma
 import requests
-from .TreeNode import TreeNode
-from .utils import NW_FORMAT
+import threading
+import itertools
+import numpy as np
+from hashlib import md5
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from .TreeNode import TreeNode, DEFAULT_EDGE_LENGTH, DEFAULT_SUPPORT
+from .utils import NW_FORMAT, paused_gc
 
 # Regular expressions used for reading newick format
 FLOAT_RE = r"\s*[+-]?\d+\.?\d*(?:[eE][-+]\d+)?\s*"
@@ -20,6 +29,28 @@ NAME_RE = r"[^():,;]+?"
 NHX_RE = r"\[&&NHX:[^\]]*\]"
 MB_BRLEN_RE = r"\[&B (\w+) [0-9.e-]+\]"
 
+# node data in the single pass parser: label (name or support), annotation
+# before dist (beast/mrbayes), dist, and annotation after dist (NHX/mrbayes)
+NODE_RE = re.compile(
+    r"\s*([^(),:;\[\]]*)"
+    r"(\[[^\]]*\])?"
+    r"\s*(?::([^(),:;\[\]]*))?"
+    r"(\[[^\]]*\])?\s*"
+)
+CURLY_RE = re.compile(r"\{[^{}]*\}")
+ANNOTATION_RE = re.compile(r"\[[^\]]*\]")
+WHITESPACE = " \t\r\n"
+
+# number of newick strings read and parsed together in multitree mode
+CHUNKSIZE = 1000
+
+# magic bytes at the start of compressed files and modules to stream them
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", gzip),
+    (b"BZh", bz2),
+    (b"\xfd7zXZ\x00", lzma),
+]
+
 
 class NewickError(Exception):
     """Exception class designed for NewickIO errors."""
@@ -37,24 +68,47 @@ class NexusError(Exception):
 class FastTreeParser():
     """
     A less flexible but faster newick parser for performance sensitive apps.
-    Only supports newick string input in format 0.
+    Only supports newick string input in format 0. With arrays=True no 
+    TreeNodes are built and .arrays stores a dict of topology arrays 
+    (see Newick2Arrays) instead of .treenode.
     """
-    def __init__(self, newick, tree_format):
+    def __init__(self, newick, tree_format, arrays=False):
         self.data = newick
-        extractor = FastNewick2TreeNode(self.data, tree_format)
-        self.treenode = extractor.newick_from_string()
+        self.treenode = None
+        self.arrays = None
+        if arrays:
+            extractor = Newick2Arrays(self.data.strip(), tree_format)
+            self.arrays = extractor.arrays_from_string()
+        else:
+            extractor = FastNewick2TreeNode(self.data, tree_format)
+            self.treenode = extractor.newick_from_string()
 
 
 
 class TreeParser(object):
-    def __init__(self, intree, tree_format=0, multitree=False, debug=False):
+    def __init__(
+        self, intree, tree_format=0, multitree=False, debug=False, workers=None,
+        translate=True, lazy_annotations=False, burnin=0, thin=1, 
+        chunksize=CHUNKSIZE):
         """
         Reads input as a string or file, figures out format and parses it.
         Formats 0-10 are newick formats supported by ete3. 
         Format 11 is nexus format from mrbayes.
 
         Returns either a Toytree or MultiTree object, depending if input has
-        one or more trees. 
+        one or more trees. In multitree mode the newick strings are parsed 
+        in chunks on a pool of 'workers' processes if workers > 1 (-1 uses
+        all cores). NEXUS translate names are applied as nodes are created,
+        or if translate=False the codes are kept as names and the shared 
+        table of codes to names is left in .tdict. With lazy_annotations 
+        NHX and MrBayes annotations are kept as raw strings on nodes and 
+        only decoded to features when first accessed.
+
+        In multitree mode the first 'burnin' tree statements are skipped
+        and then only every 'thin'-th is kept, without parsing the skipped
+        statements. Kept statements are read from the input and passed to
+        the parser (or pool) in chunks of 'chunksize' newick strings, so 
+        the full list of newick strings is never stored.
         """
         # the input file/stream and the loaded data
         self.intree = intree
@@ -64,6 +118,10 @@ class TreeParser(object):
         # the tree_format and parsed tree string from data
         self.fmt = tree_format
         self.multitree = multitree
+        self.workers = workers
+        self.burnin = burnin
+        self.thin = thin
+        self.chunksize = chunksize
         self.newick = ""
 
         # returned result: 1 tree for Toytree multiple trees for MultiTrees
@@ -71,6 +129,8 @@ class TreeParser(object):
 
         # newick translation dictionary
         self.tdict = {}
+        self.translate = translate
+        self.lazy = lazy_annotations
 
         # compiled re matchers for this tree format type
         self.matcher = MATCHER[self.fmt]
@@ -83,30 +143,41 @@ class TreeParser(object):
     def _run(self):
         # get newick from data and test newick structure
         if self.intree:
-            # read data input by lines to .data
-            self.get_data_from_intree()
+            # multiple trees are read and parsed in chunks
+            if self.multitree:
+                self.get_treenodes()
+                return
 
-            # check for NEXUS wrappings and update .data for newick strings
-            self.parse_nexus()
+            # read newick strings to .data and translation to .tdict
+            self.load_newicks()
 
-            # raise warnings if tree_format doesn't seem right for data
-            self.warn_about_format()
-
-            # parse newick strings to treenodes list
+            # parse newick strings to treenodes list, applying tdict names
             self.get_treenodes()
 
-            # apply names from tdict
-            self.apply_name_translation()
-
         # no input data
         else:
             self.treenodes = [TreeNode()]
 
 
-    def warn_about_format(self):
+    def load_newicks(self):
+        "read data, unwrap NEXUS, and return the list of newick strings"
+        # read data input by lines to .data
+        self.get_data_from_intree()
+
+        # check for NEXUS wrappings and update .data for newick strings
+        self.parse_nexus()
+
+        # raise warnings if tree_format doesn't seem right for data
+        self.warn_about_format()
+        return self.data
+
+
+    def warn_about_format(self, newick=None):
         # warning about formats
-        if "[&&NHX" not in self.data[0]:
-            if ("[&" in self.data[0]) & (self.fmt != 10):
+        if newick is None:
+            newick = self.data[0]
+        if "[&&NHX" not in newick:
+            if ("[&" in newick) & (self.fmt != 10):
                 print("Warning: data looks like tree_format=10 (mrbayes-like)")          
 
 
@@ -131,9 +202,9 @@ class TreeParser(object):
                 response.raise_for_status()
                 self.data = response.text.strip().split("\n")
 
-            # is a file: read by lines to a list
+            # is a file: read by lines to a list, decompressing if needed
             elif os.path.exists(self.intree):
-                with open(self.intree, 'rU') as indata:
+                with open_tree_file(self.intree) as indata:
                     self.data = indata.readlines()
 
             # is a string: make into a list by splitting
@@ -155,34 +226,525 @@ class TreeParser(object):
 
     def get_treenodes(self):
         "test format of intree nex/nwk, extra features"
+        names = self.get_name_map()
 
         if not self.multitree:
             # get TreeNodes from Newick
-            extractor = Newick2TreeNode(self.data[0].strip(), fmt=self.fmt)
+            extractor = Newick2TreeNode(
+                self.data[0].strip(), self.fmt, names, self.lazy)
 
             # extract one tree
             self.treenodes.append(extractor.newick_from_string())
 
+        # parse chunks of newick strings as they are read from data, on a
+        # process pool if workers > 1, returned in input order
         else:
-            for tre in self.data:
-                # get TreeNodes from Newick
-                extractor = Newick2TreeNode(tre.strip(), fmt=self.fmt)
+            self.treenodes = self.map_newick_chunks(parse_newicks)
+
+
+    def iter_newick_chunks(self):
+        """
+        Generator over lists of up to chunksize newick strings from intree,
+        after skipping burnin statements and thinning. Files are read by 
+        lines from an open handle, and the NEXUS translate table is filled
+        in .tdict before the first chunk is returned.
+        """
+        if self.thin < 1:
+            raise NewickError("thin must be an integer >= 1")
+
+        # stream lines of a file, or split other input to lines
+        path = self.intree
+        if isinstance(path, bytes):
+            path = path.decode()
+        if isinstance(path, str) and os.path.exists(path.strip()):
+            with open_tree_file(path.strip()) as indata:
+                for chunk in self._iter_stream_chunks(indata):
+                    yield chunk
+        else:
+            self.get_data_from_intree()
+            for chunk in self._iter_stream_chunks(self.data):
+                yield chunk
+
+
+    def _iter_stream_chunks(self, lines):
+        "yields chunks of newick strings from NewickStream over lines"
+        stream = NewickStream(lines, self.burnin, self.thin)
+        stream.tdict = self.tdict
+        for chunk in iter_chunks(stream, self.chunksize):
+            yield chunk
+
+
+    def map_newick_chunks(self, func):
+        """
+        Returns the concatenated results of func(chunk, fmt, names, lazy)
+        for each chunk of newick strings, run on a pool if workers > 1. 
+        The first chunk is read before names are set so that the NEXUS 
+        translate table is available.
+        """
+        chunks = self.iter_newick_chunks()
+        first = next(chunks, None)
+        if first is None:
+            raise NewickError("no trees found in input")
+        self.warn_about_format(first[0])
+        chunks = itertools.chain([first], chunks)
+        return map_chunks(
+            func, chunks, self.workers, 
+            self.fmt, self.get_name_map(), self.lazy)
+
+
+    def get_name_map(self):
+        """
+        Returns dict of labels to the name objects set on nodes. This is 
+        the NEXUS translate table, or if translate=False a map of each code
+        to the shared code string so trees do not hold duplicate strings.
+        """
+        if self.translate:
+            return self.tdict
+        return {i: i for i in self.tdict}
+
+
+
+class ParseCache(object):
+    """
+    Opt-in process-wide LRU cache of parsed trees used when toytree.tree
+    and toytree.mtree parse newick, NEXUS, or file input. It is disabled
+    (maxsize=0) by default, enable it with 
+    toytree.parse_cache.enable(maxsize=128). 
+
+    Keys are the md5 hash of newick string input, or the path, size and
+    modification time of file input, plus tree_format and parser options.
+    URLs are not cached. Stored trees are private copies, and every hit 
+    returns new copies (ToyTree.copy) so that modifying a returned tree 
+    does not alter the cache.
+
+    Attributes:
+    -----------
+    maxsize: int
+        Max number of parsed inputs to store, oldest used are evicted.
+    hits: int
+        Number of inputs returned from the cache.
+    misses: int
+        Number of cacheable inputs that had to be parsed.
+    """
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def __len__(self):
+        return len(self._cache)
+
+
+    def enable(self, maxsize=128):
+        "turn on caching of up to maxsize parsed inputs"
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+
+    def disable(self):
+        "turn off caching and drop all stored trees"
+        with self._lock:
+            self.maxsize = 0
+            self._cache.clear()
+
+
+    def clear(self):
+        "drop all stored trees and reset the hit and miss counters"
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def info(self):
+        "returns a dict with hits, misses, maxsize and current size"
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "maxsize": self.maxsize,
+            "size": len(self._cache),
+        }
+
+
+    def get_key(self, intree, *options):
+        """
+        Returns a cache key for parser input and options (e.g., tree_format)
+        or None if the cache is disabled or the input is not cacheable.
+        """
+        if not self.maxsize:
+            return None
+        if isinstance(intree, bytes):
+            intree = intree.decode()
+
+        if isinstance(intree, str):
+            intree = intree.strip()
+            if any(i in intree for i in ("http://", "https://")):
+                return None
+            if os.path.exists(intree):
+                stat = os.stat(intree)
+                return (
+                    "path", os.path.abspath(intree), 
+                    stat.st_size, stat.st_mtime_ns) + options
+            content = intree
+
+        elif isinstance(intree, (list, tuple)):
+            if not all(isinstance(i, str) for i in intree):
+                return None
+            content = "\n".join(intree)
+        else:
+            return None
+        return ("md5", md5(content.encode()).hexdigest()) + options
+
+
+    def get(self, key):
+        "returns the stored object for key or None, counting hits/misses"
+        if key is None:
+            return None
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return value
 
-                # extract one tree
-                self.treenodes.append(extractor.newick_from_string())
 
+    def put(self, key, value):
+        "store value (a private copy) for key, evicting the oldest used"
+        if key is None:
+            return
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            self._evict()
 
-    def apply_name_translation(self):
-        if self.tdict:
-            for tree in self.treenodes:
-                for node in tree.traverse():
-                    if node.name in self.tdict:
-                        node.name = self.tdict[node.name]
+
+    def _evict(self):
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
 
 
 
 class Newick2TreeNode:
-    "Parse newick str to a TreeNode object"    
+    """
+    Parse newick str to a TreeNode object. The string is tokenized in a 
+    single pass: structural characters are consumed one at a time and the
+    data of each node (label, dist and bracketed annotations) is matched 
+    at its position with NODE_RE, so no intermediate chunk lists are built.
+    Node names found in the names dict (e.g., NEXUS translate codes) are
+    replaced by their value as nodes are created. If lazy the bracketed
+    annotations are stored raw on nodes and decoded on first access.
+    """
+    def __init__(self, data, fmt=0, names=None, lazy=False):
+        self.data = data
+        self.root = TreeNode()
+        self.fmt = fmt
+        self.spec = MATCHER[self.fmt].spec
+        self.names = names
+        self.lazy = lazy
+
+
+    def newick_from_string(self):
+        "Reads a newick string in the New Hampshire format."
+        with paused_gc():
+            return self.parse_newick()
+
+
+    def parse_newick(self):
+        "single pass over newick string building TreeNodes"
+        data = self.data
+        ndata = len(data)
+        parent = None
+        pos = 0
+
+        # descend into nested parentheses until a leaf is found
+        while pos < ndata:
+            char = data[pos]
+
+            # open a new internal node (the first one is the root)
+            if char == "(":
+                parent = self.root if parent is None else parent.add_child()
+                pos += 1
+                continue
+
+            # skip whitespace between tokens
+            if char in WHITESPACE:
+                pos += 1
+                continue
+
+            # a tree without parentheses is a single node
+            if parent is None:
+                pos = self.apply_node_data(self.root, pos, "leaf")
+                self.check_end(pos)
+                return self.root
+
+            # add a leaf and parse its data
+            pos = self.apply_node_data(parent.add_child(), pos, "leaf")
+
+            # every closing parenthesis closes a node and goes up one level
+            while 1:
+                if pos >= ndata:
+                    raise NewickError(
+                        'Parentheses do not match. Broken tree data.')
+                char = data[pos]
+
+                # a sister node follows
+                if char == ",":
+                    pos += 1
+                    break
+
+                # read internal node data and go up one level
+                if char == ")":
+                    pos = self.apply_node_data(parent, pos + 1, "internal")
+                    parent = parent.up
+                    if parent is None:
+                        self.check_end(pos)
+                        return self.root
+                    continue
+
+                raise NewickError(
+                    'Broken newick structure at: {}'.format(data[pos:pos + 50]))
+        return self.root
+
+
+    def check_end(self, pos):
+        "only a semicolon and whitespace may follow the root node"
+        if self.data[pos:].strip() not in ("", ";"):
+            raise NewickError('Parentheses do not match. Broken tree data.')
+
+
+    def apply_node_data(self, node, pos, node_type):
+        """
+        Match node data starting at pos, store it on node, and return the 
+        position after it. Converters and required fields follow NW_FORMAT.
+        """
+        end, first, second, annotations = self.read_node_data(pos, node_type)
+        c1, c2 = self.spec[node_type][:2]
+        if first is not None:
+            if self.names and c1 == "name":
+                first = self.names.get(first, first)
+            setattr(node, c1, first)
+        if second is not None:
+            setattr(node, c2, second)
+
+        # NHX or mrbayes annotations, the edge annotation is applied last
+        if self.lazy:
+            raw = "".join(
+                i for i in annotations if i and (
+                    self.fmt == 10 or 
+                    "".join(i.split()).startswith("[&&NHX:"))
+            )
+            if raw:
+                node._annotations = raw
+            return end
+        for annotation in annotations:
+            if annotation:
+                for fname, fvalue in parse_annotation(annotation, self.fmt).items():
+                    node.add_feature(fname, fvalue)
+        return end
+
+
+    def read_node_data(self, pos, node_type):
+        """
+        Match node data starting at pos and return the position after it, 
+        the converted first (name or support) and second (dist) fields, or
+        None if absent, and the raw bracketed annotations.
+        """
+        match = NODE_RE.match(self.data, pos)
+        label, ann1, dist, ann2 = match.groups()
+        first = second = None
+
+        # if no feature data
+        if not (label or ann1 or ann2) and dist is None:
+            return match.end(), first, second, ()
+
+        # load converters for this node type
+        c1, c2, cv1, cv2, req1, req2 = self.spec[node_type]
+
+        # the first field (name or support)
+        if label:
+            label = label.strip()
+            if " " in label:
+                label = "".join(label.split())
+        if label:
+            if cv1 is None:
+                self.raise_format_error(pos, match.end())
+            try:
+                first = cv1(label)
+            except ValueError:
+                self.raise_format_error(pos, match.end())
+        elif req1 and cv1 is not None:
+            self.raise_format_error(pos, match.end())
+
+        # mrbayes node annotations without a dist set dist to 0.0
+        if (self.fmt == 10) and ann1 and (dist is None):
+            dist = "0.0"
+
+        # the second field (dist) 
+        if dist is not None:
+            dist = dist.strip()
+            if (cv2 is None) or (not dist):
+                self.raise_format_error(pos, match.end())
+            try:
+                second = cv2(dist)
+            except ValueError:
+                self.raise_format_error(pos, match.end())
+        elif req2 and cv2 is not None:
+            self.raise_format_error(pos, match.end())
+        return match.end(), first, second, (ann1, ann2)
+
+
+    def raise_format_error(self, start, end):
+        raise NewickError(
+            "Unexpected newick format {}".format(self.data[start:end]))
+
+
+class Newick2Arrays(Newick2TreeNode):
+    """
+    Parse newick str directly to arrays without creating TreeNode objects.
+    Tips are numbered 0-ntips in the order they appear in the newick and 
+    internal nodes are numbered after them in postorder, so the root is 
+    the last node. Bracketed annotations are skipped.
+    """
+    def __init__(self, data, fmt=0):
+        self.data = data
+        self.fmt = fmt
+        self.spec = MATCHER[self.fmt].spec
+        self.names = None
+
+
+    def arrays_from_string(self):
+        """
+        Returns a dict with 'parent' idxs (-1 for the root), children of 
+        each node in CSR format as 'children' and 'child_offsets' (children
+        of node i are children[child_offsets[i]:child_offsets[i + 1]]),
+        'tip_names', 'names' of all nodes, and 'dist' and 'support' arrays.
+        """
+        data = self.data
+        ndata = len(data)
+
+        # columns indexed by the order in which nodes are created
+        self.parent = []
+        self.dist = []
+        self.support = []
+        self.name = []
+        tips = []
+        internals = []
+        stack = []
+        pos = 0
+
+        while pos < ndata:
+            char = data[pos]
+
+            # open a new internal node (the first one is the root)
+            if char == "(":
+                stack.append(self.add_node(stack))
+                pos += 1
+                continue
+
+            # skip whitespace between tokens
+            if char in WHITESPACE:
+                pos += 1
+                continue
+
+            # add a leaf and parse its data (or a single node tree)
+            tips.append(self.add_node(stack))
+            pos = self.apply_node_data(tips[-1], pos, "leaf")
+
+            # every closing parenthesis closes a node and goes up one level
+            while stack:
+                if pos >= ndata:
+                    raise NewickError(
+                        'Parentheses do not match. Broken tree data.')
+                char = data[pos]
+
+                # a sister node follows
+                if char == ",":
+                    pos += 1
+                    break
+
+                # read internal node data and go up one level
+                if char == ")":
+                    internals.append(stack.pop())
+                    pos = self.apply_node_data(
+                        internals[-1], pos + 1, "internal")
+                    continue
+
+                raise NewickError(
+                    'Broken newick structure at: {}'.format(data[pos:pos + 50]))
+
+            # the root node was closed
+            if not stack:
+                self.check_end(pos)
+                break
+
+        if stack or not tips:
+            raise NewickError('Parentheses do not match. Broken tree data.')
+        return self.get_arrays(tips, internals)
+
+
+    def add_node(self, stack):
+        "append a node with default values and return its creation index"
+        self.parent.append(stack[-1] if stack else -1)
+        self.dist.append(DEFAULT_EDGE_LENGTH)
+        self.support.append(DEFAULT_SUPPORT)
+        self.name.append("")
+        return len(self.parent) - 1
+
+
+    def apply_node_data(self, nidx, pos, node_type):
+        "store name, support and dist of node nidx and return end position"
+        end, first, second, _ = self.read_node_data(pos, node_type)
+        c1, c2 = self.spec[node_type][:2]
+        if first is not None:
+            getattr(self, c1)[nidx] = first
+        if second is not None:
+            getattr(self, c2)[nidx] = second
+        return end
+
+
+    def get_arrays(self, tips, internals):
+        "renumber nodes so tips come first and internal nodes in postorder"
+        nnodes = len(self.parent)
+        order = np.array(tips + internals, dtype=np.int64)
+        newidx = np.zeros(nnodes, dtype=np.int64)
+        newidx[order] = np.arange(nnodes)
+
+        # children grouped by parent, in order of creation for each parent
+        created = np.array(self.parent, dtype=np.int64)
+        nonroot = np.flatnonzero(created >= 0)
+        pidxs = newidx[created[nonroot]]
+        children = newidx[nonroot][np.argsort(pidxs, kind="stable")]
+        child_offsets = np.zeros(nnodes + 1, dtype=np.int64)
+        child_offsets[1:] = np.cumsum(np.bincount(pidxs, minlength=nnodes))
+
+        # parent idxs in new numbering
+        parent = np.full(nnodes, -1, dtype=np.int64)
+        parent[newidx[nonroot]] = pidxs
+
+        return {
+            "parent": parent,
+            "children": children,
+            "child_offsets": child_offsets,
+            "tip_names": [self.name[i] for i in tips],
+            "names": [self.name[i] for i in order.tolist()],
+            "dist": np.array(self.dist, dtype=np.float64)[order],
+            "support": np.array(self.support, dtype=np.float64)[order],
+        }
+
+
+
+class RegexNewick2TreeNode:
+    """
+    Previous newick parser that splits the string on parentheses and commas
+    and matches each node with a regex from MATCHER. Kept for comparison in
+    toytree.Benchmark, Newick2TreeNode is used by the TreeParser.
+    """
     def __init__(self, data, fmt=0):
         self.data = data
         self.root = TreeNode()
@@ -236,19 +798,27 @@ class Newick2TreeNode:
     def newick_from_string(self):
         "Reads a newick string in the New Hampshire format."
 
+        # a tree without parentheses is a single node
+        if "(" not in self.data:
+            self.apply_node_data(self.data.rstrip(";"), "single", self.root)
+            return self.root
+
         # split on parentheses to traverse hierarchical tree structure
-        for chunk in self.data.split("(")[1:]:
+        chunks = self.data.split("(")[1:]
+        for cidx, chunk in enumerate(chunks):
             # add child to make this node a parent.
             self.current_parent = (
                 self.root if self.current_parent is None else
                 self.current_parent.add_child()
             )
 
-            # get all parenth endings from this parenth start
+            # get all parenth endings from this parenth start, only the
+            # last one can close the root (the semicolon is optional)
             subchunks = [ch.strip() for ch in chunk.split(",")]
             if subchunks[-1] != '' and not subchunks[-1].endswith(';'):
-                raise NewickError(
-                    'Broken newick structure at: {}'.format(chunk))
+                if cidx < len(chunks) - 1:
+                    raise NewickError(
+                        'Broken newick structure at: {}'.format(chunk))
 
             # Every closing parenthesis will close a node and go up one level.
             for idx, leaf in enumerate(subchunks):
@@ -269,9 +839,11 @@ class Newick2TreeNode:
         return self.root
 
 
-    def apply_node_data(self, subnw, node_type):
+    def apply_node_data(self, subnw, node_type, node=None):
 
-        if node_type in ("leaf", "single"):
+        if node is not None:
+            self.current_node = node
+        elif node_type in ("leaf", "single"):
             self.current_node = self.current_parent.add_child()
         else:
             self.current_node = self.current_parent
@@ -284,23 +856,27 @@ class Newick2TreeNode:
         # load matcher junk
         c1, c2, cv1, cv2, match = MATCHER[self.fmt].type[node_type]
 
-        # if beast or mb then combine brackets
-        if self.fmt == 10:
-            if "]:" not in subnw:
-                node, edge = subnw.split("]", 1)
-                subnw = node + "]:0.0" + edge                       
-            node, edge = subnw.split("]:")
-            npre, npost = node.split("[")
-
-            # mrbayes mode: (a[&a:1,b:2]:0.1[&c:10])
-            try:
-                epre, epost = edge.split("[")
-                subnw = "{}:{}[&&NHX:{}".format(
-                    npre, epre, ":".join([npost[6:], epost[6:]]))
-
-            # BEAST mode: (a[&a:1,b:2,c:10]:0.1)
-            except ValueError:
-                subnw = "{}:{}[&&NHX:{}]".format(npre, edge, npost[6:])
+        # annotations before the dist (beast/mrbayes) or after it are 
+        # merged into one NHX comment after the dist, and other comments
+        # are dropped. Mrbayes node annotations without a dist set it 0.0.
+        if "[" in subnw:
+            parts = NODE_RE.match(subnw)
+            if parts.end() != len(subnw):
+                raise NewickError("Unexpected newick format {}".format(subnw))
+            label, ann1, dist, ann2 = parts.groups()
+            if (self.fmt == 10) and ann1 and (dist is None):
+                dist = "0.0"
+            feats = [
+                i[7:-1] for i in (ann1, ann2) 
+                if i and i.startswith("[&&NHX:")
+            ]
+            subnw = label
+            if dist is not None:
+                subnw += ":" + dist
+            if feats:
+                subnw += "[&&NHX:{}]".format(":".join(feats))
+            if not subnw:
+                return
 
         # look for node features
         data = re.match(match, subnw)
@@ -335,9 +911,11 @@ class NexusParser:
     Parse nexus file/str formatted data to extract tree data and features.
     Expects '#NEXUS', 'begin trees', 'tree', and 'end;'.
     """
-    def __init__(self, data, debug=False):
+    def __init__(self, data, debug=False, burnin=0, thin=1):
 
         self.data = data
+        self.burnin = burnin
+        self.thin = thin
         self.newicks = []
         self.tdict = {}
         self.matcher = re.compile(MB_BRLEN_RE)
@@ -347,14 +925,22 @@ class NexusParser:
 
     def extract_tree_block(self):
         "iterate through data file to extract trees"        
+        self.newicks = list(self.iter_tree_block())
+
 
-        # data SHOULD be a list of strings at this point
+    def iter_tree_block(self):
+        """
+        Generator over newick strings in the trees block. Lines are read 
+        from data one at a time, so data can be an open file handle, and
+        tdict is filled as the translate block is passed. The first burnin
+        tree statements are skipped, and then every thin-th is returned.
+        Skipped statements are only counted, not split or cleaned.
+        """
+        # data can be a list of strings or a file handle at this point
         lines = iter(self.data)
-        while 1:
-            try:
-                line = next(lines).strip()
-            except StopIteration:
-                break
+        ntrees = 0
+        for line in lines:
+            line = line.strip()
 
             # oh mrbayes, you seriously allow spaces within newick format!?
             # find "[&B TK02Brlens 8.123e-3]" and change to [&Brlen=8.123e-3]
@@ -363,9 +949,16 @@ class NexusParser:
 
             # enter trees block
             if line.lower() == "begin trees;":
-                while 1:
-                    # iter through trees block
-                    nextline = next(lines).strip()
+                for nextline in lines:
+                    nextline = nextline.strip()
+
+                    # count tree statements and skip burnin and thinned
+                    if nextline[:4].lower() == "tree":
+                        ntrees += 1
+                        if ntrees <= self.burnin:
+                            continue
+                        if (ntrees - self.burnin - 1) % self.thin:
+                            continue
 
                     # remove horrible brlen string with spaces from mb
                     nextline = self.matcher.sub("", nextline)
@@ -380,12 +973,17 @@ class NexusParser:
                     # look for translation
                     elif sub[0].lower() == "translate":
                         while not sub[-1].endswith(";"):
-                            sub = next(lines).strip().split()
-                            self.tdict[sub[0]] = sub[-1].strip(",").strip(";")
+                            try:
+                                sub = next(lines).strip().split()
+                            except StopIteration:
+                                return
+                            if sub[0] != ";":
+                                self.tdict[sub[0]] = (
+                                    sub[-1].strip(",").strip(";"))
 
                     # parse tree blocks
                     elif sub[0].lower().startswith("tree"):
-                        self.newicks.append(sub[-1])
+                        yield sub[-1]
 
                     # end of trees block
                     elif sub[0].lower() == "end;":
@@ -393,10 +991,136 @@ class NexusParser:
 
 
 
+class NewickStream:
+    """
+    Iterates over the newick strings in newick or NEXUS formatted lines 
+    (e.g., an open file handle) one line at a time without storing them.
+    For NEXUS input the translate table is stored in .tdict as soon as it
+    has been read, which is before the first tree is returned. The first
+    burnin trees are skipped, and then every thin-th tree is returned,
+    without cleaning or parsing the skipped lines.
+    """
+    def __init__(self, lines, burnin=0, thin=1):
+        self.lines = iter(lines)
+        self.burnin = burnin
+        self.thin = thin
+        self.tdict = {}
+
+
+    def __iter__(self):
+        # the first non-empty line tells whether data is NEXUS
+        for line in self.lines:
+            line = line.strip()
+            if line:
+                break
+        else:
+            return
+
+        # NEXUS: yield from the trees block while filling shared tdict
+        if line.upper() == "#NEXUS":
+            nex = NexusParser(
+                self.lines, debug=True, burnin=self.burnin, thin=self.thin)
+            nex.tdict = self.tdict
+            for newick in nex.iter_tree_block():
+                yield newick
+
+        # newick: every non-empty line is a tree
+        else:
+            lines = itertools.chain([line], self.lines)
+            ntrees = 0
+            for line in lines:
+                if line.isspace() or not line:
+                    continue
+                ntrees += 1
+                if ntrees <= self.burnin:
+                    continue
+                if (ntrees - self.burnin - 1) % self.thin:
+                    continue
+                yield line.strip()
+
+
+
+def get_compression(path):
+    "returns gzip, bz2 or lzma module if file starts with its magic bytes"
+    with open(path, 'rb') as indata:
+        head = indata.read(6)
+    for magic, module in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
+
+
+
+def open_tree_file(path):
+    """
+    Open a tree file for reading text by lines. Files compressed with gzip,
+    bzip2 or xz are detected by their magic bytes (not the suffix) and are
+    decompressed as a stream while reading.
+    """
+    module = get_compression(path)
+    if module is None:
+        return open(path, 'r')
+    return module.open(path, 'rt')
+
+
+
+def parse_newicks(newicks, tree_format=0, names=None, lazy=False):
+    "parse a list of newick strings to a list of TreeNodes"
+    return [
+        Newick2TreeNode(i.strip(), tree_format, names, lazy)
+        .newick_from_string()
+        for i in newicks
+    ]
+
+
+
+def get_nworkers(workers):
+    "number of processes to use for workers arg, where -1 means all cores"
+    if workers is None:
+        return 1
+    if workers < 0:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+
+def iter_chunks(items, chunksize):
+    "generator over lists of up to chunksize consecutive items of iterable"
+    items = iter(items)
+    while 1:
+        chunk = list(itertools.islice(items, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+
+def map_chunks(func, chunks, workers, *args):
+    """
+    Returns the concatenated results of func(chunk, *args) for an iterable
+    of chunks, run in order on this process, or on a process pool of 
+    workers where each chunk is submitted as soon as it is read. 
+    """
+    results = []
+    if get_nworkers(workers) < 2:
+        for chunk in chunks:
+            results.extend(func(chunk, *args))
+        return results
+
+    # chunks are submitted in order as they are read
+    with ProcessPoolExecutor(max_workers=get_nworkers(workers)) as pool:
+        futures = [pool.submit(func, chunk, *args) for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+
 # re matchers should all be compiled on toytree init
 class Matchers:
     def __init__(self, formatcode):
         self.type = {}
+        self.spec = {}
 
         for node_type in ["leaf", "single", "internal"]:
             # (node_type == "leaf") or (node_type == "single"):
@@ -448,6 +1172,16 @@ class Matchers:
             # FIRST_MATCH, SECOND_MATCH, NHX_RE)
             compiled_matcher = re.compile(matcher_str)
 
+            # fill converters and required fields for the single pass parser
+            self.spec[node_type] = (
+                container1,
+                container2,
+                converterFn1,
+                converterFn2,
+                not (flexible1 and (node_type != 'leaf')),
+                not flexible2,
+            )
+
             # fill matcher for this node
             self.type[node_type] = [
                 container1,
@@ -489,6 +1223,56 @@ def parse_nhx(NHX_string):
     return ndict
 
 
+def parse_annotations(raw):
+    """
+    Parse one or more concatenated bracketed annotations stored by a lazy
+    parser, which keeps only those that decode in their tree format.
+    """
+    features = {}
+    for annotation in ANNOTATION_RE.findall(raw):
+        features.update(parse_annotation(annotation, 10))
+    return features
+
+
+
+def parse_annotation(annotation, fmt=0):
+    """
+    Parse a bracketed node annotation to a dict of features. NHX comments 
+    are supported in all formats and MrBayes/BEAST [&...] comments in 
+    format 10. Other comments are ignored.
+    """
+    # whitespace is not allowed in feature strings
+    annotation = "".join(annotation.split())
+    if annotation.startswith("[&&NHX:"):
+        return parse_nhx(annotation)
+    if (fmt == 10) and annotation.startswith("[&"):
+        return parse_mrbayes(annotation)
+    return {}
+
+
+def parse_mrbayes(mb_string):
+    """
+    MB format: [&Z=1,Y=2,range={0.1,0.2}]. Commas inside curly braces are
+    replaced by dashes, parentheses by curly braces, and quotes removed.
+    """
+    ndict = {}
+    mb_string = CURLY_RE.sub(
+        lambda x: x.group().replace(",", "-"), mb_string[2:-1])
+    for old, new in (("(", "{"), (")", "}"), (",", ":"), ('"', ""), ("'", "")):
+        mb_string = mb_string.replace(old, new)
+
+    for field in mb_string.split(":"):
+        try:
+            pname, pvalue = field.split("=")
+            ndict[pname] = pvalue
+        except ValueError:
+            raise NewickError('Invalid MrBayes format %s' % field)
+    return ndict
+
+
+# GLOBAL PARSE CACHE (disabled until enabled by user)
+PARSE_CACHE = ParseCache()
+
 # GLOBAL RE COMPILED MATCHERS
 MATCHER = {}
 for formatcode in range(11):
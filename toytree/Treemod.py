@@ -27,22 +27,23 @@ class TreeMod:
         # make tree height = 1 * treeheight
         if nocopy:
             ctree = self._toytree
+            ctree._own_nodes()
         else:
-            ctree = self._toytree.copy()
+            ctree = self._toytree._get_edit_tree()
 
         # get total tree height
         if include_stem:
-            _height = ctree.treenode.height + ctree.treenode.dist
+            _height = ctree._nodes.treenode.height + ctree._nodes.treenode.dist
         else:
-            _height = ctree.treenode.height
+            _height = ctree._nodes.treenode.height
 
         # scale internal nodes 
         if len(ctree) == 1:
-            ctree.treenode.dist = treeheight
+            ctree._nodes.treenode.dist = treeheight
         else:
-            for node in ctree.treenode.traverse():
+            for node in ctree._nodes.treenode.traverse():
                 node.dist = (node.dist / _height) * treeheight
-        ctree._coords.update()
+        ctree._update_after_edit()
         return ctree
 
 
@@ -61,9 +62,11 @@ class TreeMod:
         assert prop < 1, "prop must be a proportion >0 and < 1."
         random.seed(seed)
 
-        # make copy and iter nodes from root to tips
-        ctree = self._toytree.copy()
-        for node in ctree.treenode.traverse():
+        # make copy and iter nodes from root to tips. Sliding a node moves
+        # only its own height, so the heights of later nodes are unchanged.
+        ctree = self._toytree._get_edit_tree()
+        heights = ctree._nodes.treenode._get_heights()
+        for node in ctree._nodes.treenode.traverse():
 
             # slide internal nodes 
             if node.up and node.children:
@@ -82,11 +85,12 @@ class TreeMod:
                 maxjit = node.dist * prop
 
                 # node.height
+                height = heights[node]
                 newheight = random.uniform(
-                    node.height - minjit, node.height + maxjit)
+                    height - minjit, height + maxjit)
 
                 # how much lower am i?
-                delta = newheight - node.height
+                delta = newheight - height
 
                 # edges from children to reach me
                 for child in node.children:
@@ -96,7 +100,7 @@ class TreeMod:
                 node.dist -= delta
 
         # update new coords
-        ctree._coords.update()
+        ctree._update_after_edit()
         return ctree
 
 
@@ -106,12 +110,12 @@ class TreeMod:
         sampled uniformly between (multiplier, 1/multiplier).
         """
         random.seed(seed)
-        ctree = self._toytree.copy()
+        ctree = self._toytree._get_edit_tree()
         low, high = sorted([multiplier, 1. / multiplier])
         mult = random.uniform(low, high)
-        for node in ctree.treenode.traverse():
+        for node in ctree._nodes.treenode.traverse():
             node.dist = node.dist * mult
-        ctree._coords.update()
+        ctree._update_after_edit()
         return ctree
 
 
@@ -130,13 +134,15 @@ class TreeMod:
         """
         if nocopy:
             ctree = self._toytree
+            ctree._own_nodes()
         else:
-            ctree = self._toytree.copy()
+            ctree = self._toytree._get_edit_tree()
 
         if strategy == 1:
-            for node in ctree.treenode.traverse():
+            heights = ctree._nodes.treenode._get_heights()
+            for node in ctree._nodes.treenode.traverse():
                 if node.is_leaf():
-                    node.dist += node.height
+                    node.dist += heights[node]
                     # node.dist = node.height + 1
 
         else:
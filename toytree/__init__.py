@@ -7,6 +7,11 @@ from .Toytree import ToyTree as tree
 from .Toytree import RawTree as _rawtree
 from .Randomtree import RandomTree as rtree
 from .Multitree import MultiTree as mtree
+from .Multitree import iter_trees
+from .TreeFileIndex import TreeFileIndex
+from .TreeArrays import load, parse_arrays
+from .ArrayTree import ArrayTree
+from .TreeParser import PARSE_CACHE as parse_cache
 from .Container import Container as container
 from .PCM import PCM as pcm
 
@@ -5,7 +5,9 @@ from __future__ import print_function, division, absolute_import
 
 import re
 import os
+import gc
 from copy import deepcopy
+from contextlib import contextmanager
 import numpy as np
 import toytree
 import toyplot
@@ -28,6 +30,22 @@ class TreeError(Exception):
         return repr(self.value)
 
 
+
+@contextmanager
+def paused_gc():
+    """
+    Pause the cyclic garbage collector while creating many linked nodes,
+    which otherwise triggers repeated full collections as trees grow.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 # TREE FORMATS
 NW_FORMAT = {
     # flexible with support
@@ -309,12 +327,12 @@ class Annotator(object):
             names=names, regex=regex, wildcard=wildcard)
 
         # get tips descended from mrca
-        tips = self.tree.idx_dict[nidx].get_leaves()
+        tips = self.tree._nodes.idx_dict[nidx].get_leaves()
         tidxs = [i.idx for i in tips]
 
         # extent to which box bounds extend outside of the exact clade size.
         if not yspace:
-            yspace = self.tree.treenode.height / 15.
+            yspace = self.tree._nodes.treenode.height / 15.
         if not xspace:
             xspace = 0.45
 
@@ -622,6 +640,28 @@ def fuzzy_match_tipnames(ttree, names, wildcard, regex, mrca=True, mono=True):
     mrca: return mrca node of selected tipnames. 
     mono: raise error if selected tipnames are not monophyletic    
     """
+    # the returned mrca node is exposed (see ToyTree.treenode), whereas
+    # tipnames are read from the nodes without exposing them.
+    if mrca:
+        treenode = ttree.treenode
+    else:
+        treenode = ttree._nodes.treenode
+    tips, node = fuzzy_match_tipnodes(treenode, names, wildcard, regex, mono)
+
+    # return tips or nodes
+    if not mrca:
+        return [i.name for i in tips]
+    else:
+        return node
+
+
+
+def fuzzy_match_tipnodes(treenode, names, wildcard, regex, mono=True):
+    """
+    Returns the list of tip nodes selected as in fuzzy_match_tipnames 
+    from the tree of treenode, and their mrca node. The nodes are those of
+    treenode, which should only be modified by a tree that owns them.
+    """
     # require arguments
     if not any([names, wildcard, regex]):
         raise ToytreeError(
@@ -632,46 +672,41 @@ def fuzzy_match_tipnames(ttree, names, wildcard, regex, mrca=True, mono=True):
     if names:
         if isinstance(names, (str, int)):
             names = [names]
-        notfound = [i for i in names if i not in ttree.get_tip_labels()]
+        leaves = treenode.get_leaves()
+        alltips = set(i.name for i in leaves)
+        notfound = [i for i in names if i not in alltips]
         if any(notfound):
             raise ToytreeError(
                 "Sample {} is not in the tree".format(notfound))
-        tips = [i for i in ttree.treenode.get_leaves() if i.name in names]
+        names = set(names)
+        tips = [i for i in leaves if i.name in names]
 
     # use regex to match tipnames
     elif regex:
         tips = [
-            i for i in ttree.treenode.get_leaves() if re.match(regex, i.name)
+            i for i in treenode.get_leaves() if re.match(regex, i.name)
         ]               
         if not any(tips):
             raise ToytreeError("No Samples matched the regular expression")
 
     # use wildcard substring matching
     elif wildcard:
-        tips = [i for i in ttree.treenode.get_leaves() if wildcard in i.name]
+        tips = [i for i in treenode.get_leaves() if wildcard in i.name]
         if not any(tips):
             raise ToytreeError("No Samples matched the wildcard")
 
-    # build list of **tipnames** from matched nodes
+    # check that nodes were matched
     if not tips:
         raise ToytreeError("no matching tipnames")       
-    tipnames = [i.name for i in tips]
 
     # if a single tipname matched no need to check for monophyly
     if len(tips) == 1:
-        if mrca:
-            return tips[0]
-        else:
-            return tipnames
+        return tips, tips[0]
 
-    # if multiple nodes matched, check if they're monophyletic
-    mbool, mtype, mnames = (
-        ttree.treenode.check_monophyly(
-            tipnames, "name", ignore_missing=True)
-    )
-
-    # get mrca node
-    node = ttree.treenode.get_common_ancestor(tips)
+    # if multiple nodes matched, they are monophyletic if they are all of
+    # the tips of their mrca node.
+    node = treenode.get_common_ancestor(tips)
+    mbool = (sum(1 for i in node.iter_leaves()) == len(tips))
 
     # raise an error if required to be monophyletic but not
     if mono:
@@ -679,8 +714,4 @@ def fuzzy_match_tipnames(ttree, names, wildcard, regex, mrca=True, mono=True):
             raise ToytreeError(
                 "Taxon list cannot be paraphyletic")
 
-    # return tips or nodes
-    if not mrca:
-        return tipnames
-    else:
-        return node
+    return tips, node